@@ -0,0 +1,234 @@
+import asyncio
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from app.core.config import (
+    ADMISSION_MAX_CONCURRENT, ADMISSION_PRIORITY_RESERVE, ADMISSION_PRIORITY_LIMIT,
+    ADMISSION_CATALOG_READ_LIMIT, ADMISSION_READ_LIMIT, ADMISSION_USER_WRITE_LIMIT, ADMISSION_ADMIN_WRITE_LIMIT,
+    ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS, ADMISSION_PRIORITY_MAX_WAIT_MS,
+)
+
+# Admission control in front of the threadpool and the DB pool. Each request
+# is put in a lane by method + path; a lane has its own concurrency limit and
+# a bounded FIFO wait queue with a deadline. All lanes share a global limit
+# sized below the DB pool, except the priority lane (admin approve / reject /
+# return), which may also use ADMISSION_PRIORITY_RESERVE extra slots and is
+# served first whenever a slot frees up. Requests that cannot get a slot in
+# time are shed early with 503 + Retry-After instead of piling onto the pool.
+
+
+# Never queued: health, docs, metrics and the long-lived SSE stream
+EXEMPT_PATHS = ("/docs", "/redoc", "/openapi.json", "/admin/events", "/admin/metrics")
+
+PRIORITY_PATH = re.compile(r"^/issues/admin/(approve|reject)-(issue|return)/")
+ADMIN_PREFIXES = ("/admin/", "/books", "/issues/admin/")
+CATALOG_PREFIXES = ("/books", "/categories")
+
+
+def classify(method: str, path: str) -> str | None:
+    if path == "/" or path.startswith(EXEMPT_PATHS):
+        return None
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "catalog_read" if path.startswith(CATALOG_PREFIXES) else "read"
+    if PRIORITY_PATH.match(path):
+        return "priority"
+    # Book / copy writes are admin-only; /books/... POST is not a user action
+    if path.startswith(ADMIN_PREFIXES):
+        return "admin_write"
+    return "user_write"
+
+
+class Lane:
+
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait_ms: int, priority: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait_ms / 1000
+        self.priority = priority
+
+        self.active = 0
+        self.waiters: deque = deque()
+
+        # EWMA of time holding a slot, for Retry-After
+        self.service_seconds = 0.05
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.wait_seconds_total = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "queue_size": self.queue_size,
+            "max_wait_ms": int(self.max_wait * 1000),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+            "avg_wait_ms": round(self.wait_seconds_total / self.queued * 1000, 2) if self.queued else 0.0,
+            "avg_service_ms": round(self.service_seconds * 1000, 2),
+        }
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "enqueued")
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class AdmissionController:
+    # Lock-protected (not loop-bound) so it works whether requests share one
+    # event loop (uvicorn) or not (TestClient); waiters are woken on their own loop.
+
+    def __init__(self, max_concurrent: int, priority_reserve: int, lanes: list[Lane]):
+        self.max_concurrent = max_concurrent
+        self.priority_reserve = priority_reserve
+        self.lanes = {lane.name: lane for lane in lanes}
+        self._by_priority = sorted(lanes, key=lambda lane: lane.priority)
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def _has_room(self, lane: Lane) -> bool:
+        if lane.active >= lane.limit:
+            return False
+        ceiling = self.max_concurrent + (self.priority_reserve if lane.name == "priority" else 0)
+        return self.active < ceiling
+
+    def _take(self, lane: Lane):
+        lane.active += 1
+        lane.admitted += 1
+        self.active += 1
+
+    def retry_after(self, lane: Lane) -> int:
+        # Time for the current queue to drain through the lane's slots
+        backlog = len(lane.waiters) + lane.active
+        return max(1, math.ceil(backlog * lane.service_seconds / max(lane.limit, 1)))
+
+    async def acquire(self, lane: Lane) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not lane.waiters and self._has_room(lane):
+                self._take(lane)
+                return True
+            if len(lane.waiters) >= lane.queue_size:
+                lane.shed_queue_full += 1
+                return False
+            waiter = _Waiter(loop, loop.create_future())
+            lane.waiters.append(waiter)
+            lane.queued += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=lane.max_wait)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter in lane.waiters:
+                    lane.waiters.remove(waiter)
+                    lane.shed_deadline += 1
+                    return False
+            # The slot was handed over just as the deadline hit: keep it
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in lane.waiters:
+                    lane.waiters.remove(waiter)
+                    raise
+            self.release(lane, 0.0)
+            raise
+
+        with self._lock:
+            lane.wait_seconds_total += time.monotonic() - waiter.enqueued
+        return True
+
+    def release(self, lane: Lane, held_seconds: float):
+        with self._lock:
+            lane.active -= 1
+            self.active -= 1
+            if held_seconds:
+                lane.service_seconds = 0.9 * lane.service_seconds + 0.1 * held_seconds
+
+            # Hand freed slots to the highest-priority lanes that can use them
+            for candidate in self._by_priority:
+                while candidate.waiters and self._has_room(candidate):
+                    waiter = candidate.waiters.popleft()
+                    self._take(candidate)
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "priority_reserve": self.priority_reserve,
+                "active": self.active,
+                "lanes": {name: lane.to_dict() for name, lane in self.lanes.items()},
+            }
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(True)
+
+
+admission = AdmissionController(
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    priority_reserve=ADMISSION_PRIORITY_RESERVE,
+    lanes=[
+        Lane("priority", ADMISSION_PRIORITY_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_PRIORITY_MAX_WAIT_MS, priority=0),
+        Lane("admin_write", ADMISSION_ADMIN_WRITE_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS, priority=1),
+        Lane("user_write", ADMISSION_USER_WRITE_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS, priority=2),
+        Lane("read", ADMISSION_READ_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS, priority=3),
+        Lane("catalog_read", ADMISSION_CATALOG_READ_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS, priority=4),
+    ],
+)
+
+
+class AdmissionMiddleware:
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lane_name = classify(scope["method"], scope["path"])
+        if lane_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.controller.lanes[lane_name]
+        if not await self.controller.acquire(lane):
+            await self._shed(send, lane)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(lane, time.monotonic() - started)
+
+    async def _shed(self, send, lane: Lane):
+        retry_after = self.controller.retry_after(lane)
+        body = json.dumps({"detail": "Server busy, retry later", "lane": lane.name}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,248 @@
+import threading
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import LOAN_PERIOD_DAYS, DEFAULT_BRANCH
+from app.core.outbox import register_handler
+from app.models.analytics import DailyBookStat, DailyCategoryStat, DailyUserStat
+from app.models.book import Book
+from app.models.issue import Issue
+from app.models.issue_archive import IssueArchive
+
+
+# ================= INCREMENTAL UPDATES (OUTBOX) =================
+
+def _bump(db: Session, model, key: dict, **increments):
+    row = db.query(model).filter_by(**key).with_for_update().first()
+    if row is None:
+        row = model(**key, **{name: 0 for name in increments})
+        db.add(row)
+    for name, value in increments.items():
+        setattr(row, name, (getattr(row, name) or 0) + value)
+
+
+def _parse_day(value):
+    return date.fromisoformat(value) if value else None
+
+
+@register_handler("issue.approved", name="analytics.borrow")
+def record_borrow(event: dict, db: Session):
+    payload = event["payload"]
+    day = _parse_day(payload["issue_date"])
+    if day is None:
+        return
+
+    category_id = db.query(Book.category_id).filter(Book.id == payload["book_id"]).scalar()
+
+    _bump(db, DailyBookStat, {"day": day, "book_id": payload["book_id"]}, borrows=1)
+    _bump(db, DailyUserStat, {"day": day, "user_id": payload["user_id"]}, borrows=1)
+    if category_id is not None:
+        _bump(db, DailyCategoryStat, {"day": day, "category_id": category_id}, borrows=1)
+
+
+@register_handler("return.approved", name="analytics.return")
+def record_return(event: dict, db: Session):
+    payload = event["payload"]
+    day = _parse_day(payload["return_date"])
+    issued = _parse_day(payload["issue_date"])
+    if day is None or issued is None:
+        return
+
+    loan_days = (day - issued).days
+    fine = payload["fine"] or 0
+    overdue = int(loan_days > LOAN_PERIOD_DAYS)
+    category_id = db.query(Book.category_id).filter(Book.id == payload["book_id"]).scalar()
+
+    _bump(db, DailyBookStat, {"day": day, "book_id": payload["book_id"]},
+          returns=1, loan_days=loan_days, fines=fine, overdue_returns=overdue)
+    _bump(db, DailyUserStat, {"day": day, "user_id": payload["user_id"]},
+          returns=1, fines=fine)
+    if category_id is not None:
+        _bump(db, DailyCategoryStat, {"day": day, "category_id": category_id},
+              returns=1, loan_days=loan_days, fines=fine, overdue_returns=overdue)
+
+
+# ================= VECTOR HELPERS =================
+
+def group_sum(keys: list, values: dict):
+    # keys: equal-length int arrays; returns (unique key columns, summed values)
+    if not len(keys[0]):
+        return [np.array([], dtype=np.int64) for _ in keys], {n: np.array([]) for n in values}
+
+    if len(keys) == 1:
+        unique, inverse = np.unique(keys[0], return_inverse=True)
+        unique = unique.reshape(-1, 1)
+    else:
+        unique, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = {
+        name: np.bincount(inverse, weights=column, minlength=len(unique))
+        for name, column in values.items()
+    }
+    return [unique[:, i] for i in range(len(keys))], sums
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def load_columns(db: Session, model, columns: list[str], start: date, end: date) -> dict:
+    rows = db.query(*[getattr(model, c) for c in columns])\
+        .filter(model.day >= start, model.day <= end)\
+        .all()
+
+    # Column-wise transpose, then one fromiter per column (no per-cell numpy boxing)
+    values = list(zip(*rows)) if rows else [() for _ in columns]
+    frame = {}
+    for name, column in zip(columns, values):
+        if name == "day":
+            ordinals = np.fromiter((d.toordinal() for d in column), dtype=np.int64, count=len(column))
+            frame[name] = (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+        else:
+            frame[name] = np.fromiter((v or 0 for v in column), dtype=np.float64, count=len(column))
+    return frame
+
+
+# Rollup rows older than this only change through rebuild_rollups, so each
+# worker loads them once and reads just the recent tail per request.
+CLOSED_AFTER_DAYS = 2
+
+# A rebuild in one worker publishes a new generation through the shared
+# cache; every other worker sees it on its next load and drops its frames.
+GENERATION_TTL_SECONDS = 30 * 86400
+
+
+class RollupFrameCache:
+
+    def __init__(self):
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, model, columns: list[str], start: date, end: date) -> dict:
+        columns = list(dict.fromkeys(["day"] + columns))
+        closed_until = date.today() - timedelta(days=CLOSED_AFTER_DAYS)
+        # Per shard: each branch has its own rollup tables
+        key = (db.info.get("branch", DEFAULT_BRANCH), model.__tablename__, tuple(columns))
+
+        version = (closed_until, cache.get("rollup_frames", "generation"))
+
+        with self._lock:
+            cached = self._frames.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, load_columns(db, model, columns, date.min, closed_until))
+            with self._lock:
+                self._frames[key] = cached
+
+        closed = cached[1]
+        mask = (closed["day"] >= np.datetime64(start)) & (closed["day"] <= np.datetime64(end))
+        frame = {name: column[mask] for name, column in closed.items()}
+
+        if end > closed_until:
+            tail = load_columns(db, model, columns, max(start, closed_until + timedelta(days=1)), end)
+            frame = {name: np.concatenate([frame[name], tail[name]]) for name in columns}
+        return frame
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+        # Other workers compare this on their next load
+        cache.invalidate("rollup_frames")
+        cache.set("rollup_frames", "generation", uuid.uuid4().hex, ttl=GENERATION_TTL_SECONDS)
+
+
+frames = RollupFrameCache()
+
+
+# ================= BATCH REBUILD =================
+
+def _days(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[D]").astype(np.int64)
+
+
+# Recomputes every rollup in [start, end] from issues plus issues_archive
+# (closed issues move there after ARCHIVE_HORIZON_DAYS, and the rollups for
+# those days must keep counting them). Meant for a nightly job over closed
+# days; running it over today while the dispatcher is live can race with
+# incremental updates.
+def rebuild_rollups(db: Session, start: date, end: date) -> dict:
+    borrows = db.execute(union_all(*[
+        select(m.issue_date, m.book_id, m.user_id, Book.category_id)
+        .join(Book, Book.id == m.book_id)
+        .where(
+            m.issue_approved == True,
+            m.issue_date >= start,
+            m.issue_date <= end
+        )
+        for m in (Issue, IssueArchive)
+    ])).all()
+
+    returns = db.execute(union_all(*[
+        select(m.return_date, m.book_id, m.user_id, Book.category_id, m.issue_date, m.fine)
+        .join(Book, Book.id == m.book_id)
+        .where(
+            m.return_approved == True,
+            m.return_date >= start,
+            m.return_date <= end
+        )
+        for m in (Issue, IssueArchive)
+    ])).all()
+
+    b_day = _days([r[0] for r in borrows])
+    b_book = np.array([r[1] for r in borrows], dtype=np.int64)
+    b_user = np.array([r[2] for r in borrows], dtype=np.int64)
+    b_cat = np.array([r[3] for r in borrows], dtype=np.int64)
+
+    r_day = _days([r[0] for r in returns])
+    r_book = np.array([r[1] for r in returns], dtype=np.int64)
+    r_user = np.array([r[2] for r in returns], dtype=np.int64)
+    r_cat = np.array([r[3] for r in returns], dtype=np.int64)
+    r_loan = r_day - _days([r[4] for r in returns])
+    r_fine = np.array([r[5] or 0 for r in returns], dtype=np.float64)
+    r_overdue = (r_loan > LOAN_PERIOD_DAYS).astype(np.float64)
+
+    # Borrow rows and return rows share one grouping so each key gets one row
+    ones_b = np.ones(len(b_day))
+    zeros_b = np.zeros(len(b_day))
+    ones_r = np.ones(len(r_day))
+    zeros_r = np.zeros(len(r_day))
+
+    def combined(key_b, key_r, with_loans=True):
+        values = {
+            "borrows": np.concatenate([ones_b, zeros_r]),
+            "returns": np.concatenate([zeros_b, ones_r]),
+            "fines": np.concatenate([zeros_b, r_fine]),
+        }
+        if with_loans:
+            values["loan_days"] = np.concatenate([zeros_b, r_loan.astype(np.float64)])
+            values["overdue_returns"] = np.concatenate([zeros_b, r_overdue])
+        return group_sum([np.concatenate([b_day, r_day]), np.concatenate([key_b, key_r])], values)
+
+    targets = [
+        (DailyBookStat, "book_id", combined(b_book, r_book)),
+        (DailyCategoryStat, "category_id", combined(b_cat, r_cat)),
+        (DailyUserStat, "user_id", combined(b_user, r_user, with_loans=False)),
+    ]
+
+    counts = {}
+    for model, key_name, ((days, keys), sums) in targets:
+        db.query(model).filter(model.day >= start, model.day <= end).delete(synchronize_session=False)
+
+        day_values = days.astype("datetime64[D]").tolist()
+        rows = []
+        for i in range(len(keys)):
+            row = {"day": day_values[i], key_name: int(keys[i])}
+            for name, column in sums.items():
+                row[name] = float(column[i]) if name == "fines" else int(column[i])
+            rows.append(row)
+
+        if rows:
+            db.execute(insert(model), rows)
+        counts[model.__tablename__] = len(rows)
+
+    db.commit()
+    frames.clear()
+    return counts
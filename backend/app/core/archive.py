@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import and_, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import (
+    ARCHIVE_HORIZON_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_PAUSE_SECONDS,
+    ARCHIVE_INTERVAL_SECONDS,
+)
+from app.database import SessionLocal, shards
+from app.models.issue import Issue
+from app.models.issue_archive import IssueArchive
+from app.core.catalog import prune_changes
+
+logger = logging.getLogger(__name__)
+
+# Columns copied verbatim from issues to issues_archive
+ARCHIVED_COLUMNS = [
+    "id", "user_id", "book_id", "copy_id", "issue_date", "return_date",
+    "issue_requested", "issue_approved", "issue_rejected",
+    "return_requested", "return_approved", "return_rejected",
+    "fine", "return_remarks", "closed_on",
+]
+
+
+# ================= MOVE CLOSED ISSUES =================
+
+def _closed_before(cutoff: date):
+    closed = or_(Issue.return_approved == True, Issue.issue_rejected == True)
+    # Rows closed before closed_on existed: fall back to the return date,
+    # and rejected rows without any date are old by definition
+    older = or_(
+        Issue.closed_on < cutoff,
+        and_(Issue.closed_on == None, Issue.return_date < cutoff),
+        and_(Issue.closed_on == None, Issue.return_date == None, Issue.issue_rejected == True),
+    )
+    return and_(closed, older)
+
+
+def archive_batch(db: Session, cutoff: date, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    ids = [row[0] for row in db.query(Issue.id)
+           .filter(_closed_before(cutoff))
+           .order_by(Issue.id)
+           .limit(batch_size)
+           .all()]
+    if not ids:
+        return 0
+
+    source = select(*[getattr(Issue, c) for c in ARCHIVED_COLUMNS]).where(Issue.id.in_(ids))
+    db.execute(insert(IssueArchive).from_select(ARCHIVED_COLUMNS, source))
+    db.query(Issue).filter(Issue.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+def archive_closed_issues(
+    session_factory=SessionLocal,
+    horizon_days: int = ARCHIVE_HORIZON_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause_seconds: float = ARCHIVE_PAUSE_SECONDS,
+    stop: threading.Event | None = None,
+) -> int:
+    cutoff = date.today() - timedelta(days=horizon_days)
+    moved = 0
+
+    # One short transaction per batch, with a pause so replication and the
+    # request path keep up
+    while not (stop and stop.is_set()):
+        with session_factory() as db:
+            count = archive_batch(db, cutoff, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+        time.sleep(pause_seconds)
+
+    if moved:
+        logger.info("Archived %s closed issues older than %s", moved, cutoff)
+    return moved
+
+
+class ArchiveWorker:
+
+    def __init__(self, interval_seconds: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="issue-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for branch in shards.branches():
+                    archive_closed_issues(session_factory=shards.sessions[branch], stop=self._stop)
+                    # Same hourly housekeeping pass: catalog change-log entries every snapshot has read
+                    with shards.session(branch) as db:
+                        prune_changes(db)
+            except Exception:
+                logger.exception("Issue archival failed")
+            self._stop.wait(self.interval_seconds)
+
+
+archive_worker = ArchiveWorker()
+
+
+# ================= HOT + ARCHIVE READS =================
+
+# Pages over issues and issues_archive as one list ordered like the original
+# history endpoints (newest issue date first). page=None returns everything.
+def history_page(db: Session, hot_filter, archive_filter, page: int | None, size: int):
+    hot = select(Issue.id, Issue.issue_date, literal(False).label("archived")).where(hot_filter)
+    cold = select(IssueArchive.id, IssueArchive.issue_date, literal(True).label("archived")).where(archive_filter)
+    combined = union_all(hot, cold).subquery()
+
+    query = select(combined.c.id, combined.c.archived)\
+        .order_by(combined.c.issue_date.desc(), combined.c.id.desc())
+    if page is not None:
+        query = query.offset((page - 1) * size).limit(size)
+    keys = db.execute(query).all()
+
+    hot_ids = [k.id for k in keys if not k.archived]
+    cold_ids = [k.id for k in keys if k.archived]
+
+    rows = {}
+    if hot_ids:
+        for issue in db.query(Issue)\
+                .options(joinedload(Issue.user), joinedload(Issue.book))\
+                .filter(Issue.id.in_(hot_ids)):
+            rows[(False, issue.id)] = issue
+    if cold_ids:
+        for issue in db.query(IssueArchive)\
+                .options(joinedload(IssueArchive.user), joinedload(IssueArchive.book))\
+                .filter(IssueArchive.id.in_(cold_ids)):
+            rows[(True, issue.id)] = issue
+
+    return [rows[(bool(k.archived), k.id)] for k in keys if (bool(k.archived), k.id) in rows]
@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import (
+    CACHE_BACKEND,
+    CACHE_SQLITE_PATH,
+    CACHE_LOCAL_MAX_ENTRIES,
+    CACHE_DEFAULT_TTL_SECONDS,
+    CACHE_INVALIDATION_POLL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Two-tier cache: a per-worker LRU in front of a backend shared by all the
+# uvicorn workers. Writes broadcast invalidations through the backend's log;
+# every worker replays that log (at most every CACHE_INVALIDATION_POLL_SECONDS)
+# and drops the matching local entries. Values must be JSON-serialisable.
+
+
+# ================= SHARED BACKENDS =================
+
+class MemoryCacheBackend:
+    # Stand-in for tests and single-worker runs; shares nothing across processes
+
+    def __init__(self):
+        self._entries = {}
+        self._log = []
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] < time.time():
+                return None
+            return entry[1]
+
+    def set(self, namespace: str, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[(namespace, key)] = (time.time() + ttl, value)
+
+    def invalidate(self, namespace: str, key: str | None):
+        with self._lock:
+            if key is None:
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[entry_key]
+            else:
+                self._entries.pop((namespace, key), None)
+            self._log.append((len(self._log) + 1, namespace, key))
+
+    def invalidations_since(self, cursor: int):
+        with self._lock:
+            return self._log[cursor:]
+
+    def last_invalidation(self) -> int:
+        with self._lock:
+            return len(self._log)
+
+
+class SQLiteCacheBackend:
+    # A WAL-mode SQLite file shared by the workers on one host. The log keeps
+    # an hour of invalidations, which is far longer than any poll interval.
+
+    LOG_RETENTION_SECONDS = 3600
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL,"
+                " key TEXT, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % 500 == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def invalidate(self, namespace: str, key: str | None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if key is None:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.execute(
+                "INSERT INTO cache_invalidations (namespace, key, created_at) VALUES (?, ?, ?)",
+                (namespace, key, now),
+            )
+            conn.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - self.LOG_RETENTION_SECONDS,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidations_since(self, cursor: int):
+        return self._connect().execute(
+            "SELECT id, namespace, key FROM cache_invalidations WHERE id > ? ORDER BY id",
+            (cursor,),
+        ).fetchall()
+
+    def last_invalidation(self) -> int:
+        row = self._connect().execute("SELECT MAX(id) FROM cache_invalidations").fetchone()
+        return row[0] or 0
+
+
+# ================= INSTRUMENTATION =================
+
+class NamespaceStats:
+    __slots__ = ("local_hits", "shared_hits", "misses", "invalidations",
+                 "get_seconds", "load_seconds", "loads")
+
+    def __init__(self):
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.get_seconds = 0.0
+        self.load_seconds = 0.0
+        self.loads = 0
+
+    def to_dict(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        hits = self.local_hits + self.shared_hits
+        return {
+            "lookups": lookups,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "avg_lookup_ms": round(self.get_seconds * 1000 / lookups, 3) if lookups else 0.0,
+            "avg_load_ms": round(self.load_seconds * 1000 / self.loads, 3) if self.loads else 0.0,
+        }
+
+
+# ================= TWO-TIER CACHE =================
+
+_MISSING = object()
+
+
+class TwoTierCache:
+
+    def __init__(
+        self,
+        backend,
+        local_max_entries: int = CACHE_LOCAL_MAX_ENTRIES,
+        default_ttl: float = CACHE_DEFAULT_TTL_SECONDS,
+        poll_seconds: float = CACHE_INVALIDATION_POLL_SECONDS,
+    ):
+        self.backend = backend
+        self.local_max_entries = local_max_entries
+        self.default_ttl = default_ttl
+        self.poll_seconds = poll_seconds
+
+        self._local: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: dict[str, NamespaceStats] = {}
+        self._cursor = backend.last_invalidation()
+        self._polled_at = time.monotonic()
+
+    def _ns_stats(self, namespace: str) -> NamespaceStats:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats.setdefault(namespace, NamespaceStats())
+        return stats
+
+    def _drop_local(self, namespace: str, key: str | None):
+        with self._lock:
+            if key is None:
+                for entry_key in [k for k in self._local if k[0] == namespace]:
+                    del self._local[entry_key]
+            else:
+                self._local.pop((namespace, key), None)
+
+    def _poll_invalidations(self):
+        if time.monotonic() - self._polled_at < self.poll_seconds:
+            return
+        self._polled_at = time.monotonic()
+        try:
+            for log_id, namespace, key in self.backend.invalidations_since(self._cursor):
+                self._drop_local(namespace, key)
+                self._cursor = max(self._cursor, log_id)
+        except Exception:
+            # Cannot tell what changed: forget everything local
+            logger.exception("Reading cache invalidations failed")
+            with self._lock:
+                self._local.clear()
+
+    def get(self, namespace: str, key: str, default=None):
+        started = time.perf_counter()
+        stats = self._ns_stats(namespace)
+        self._poll_invalidations()
+
+        with self._lock:
+            entry = self._local.get((namespace, key))
+            if entry is not None and entry[0] > time.monotonic():
+                self._local.move_to_end((namespace, key))
+                stats.local_hits += 1
+                stats.get_seconds += time.perf_counter() - started
+                return entry[1]
+
+        try:
+            raw = self.backend.get(namespace, key)
+        except Exception:
+            logger.exception("Shared cache read failed")
+            raw = None
+
+        if raw is None:
+            stats.misses += 1
+            stats.get_seconds += time.perf_counter() - started
+            return default
+
+        value = json.loads(raw)
+        # Local copies never outlive the default TTL, even for long-lived keys
+        self._set_local(namespace, key, value, self.default_ttl)
+        stats.shared_hits += 1
+        stats.get_seconds += time.perf_counter() - started
+        return value
+
+    def _set_local(self, namespace: str, key: str, value, ttl: float):
+        with self._lock:
+            self._local[(namespace, key)] = (time.monotonic() + ttl, value)
+            self._local.move_to_end((namespace, key))
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def set(self, namespace: str, key: str, value, ttl: float | None = None):
+        ttl = ttl or self.default_ttl
+        self._set_local(namespace, key, value, min(ttl, self.default_ttl))
+        try:
+            self.backend.set(namespace, key, json.dumps(value), ttl)
+        except Exception:
+            logger.exception("Shared cache write failed")
+
+    def get_or_load(self, namespace: str, key: str, loader, ttl: float | None = None):
+        value = self.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        # An invalidation that lands while the loader runs may be for data the
+        # loader already read; caching that value would outlive the write
+        try:
+            generation = self.backend.last_invalidation()
+        except Exception:
+            logger.exception("Reading cache invalidations failed")
+            generation = None
+
+        started = time.perf_counter()
+        value = loader()
+        stats = self._ns_stats(namespace)
+        stats.loads += 1
+        stats.load_seconds += time.perf_counter() - started
+
+        try:
+            unchanged = generation is not None and self.backend.last_invalidation() == generation
+        except Exception:
+            logger.exception("Reading cache invalidations failed")
+            unchanged = False
+        if unchanged:
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def invalidate(self, namespace: str, key: str | None = None):
+        # key=None drops the whole namespace, in this worker and all others
+        self._drop_local(namespace, key)
+        self._ns_stats(namespace).invalidations += 1
+        try:
+            self.backend.invalidate(namespace, key)
+        except Exception:
+            logger.exception("Broadcasting cache invalidation failed")
+
+    def stats(self) -> dict:
+        with self._lock:
+            local_entries = len(self._local)
+        return {
+            "backend": type(self.backend).__name__,
+            "local_entries": local_entries,
+            "namespaces": {name: s.to_dict() for name, s in list(self._stats.items())},
+        }
+
+
+def _make_backend():
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(CACHE_SQLITE_PATH)
+    return MemoryCacheBackend()
+
+
+cache = TwoTierCache(_make_backend())
+
+
+# ================= DASHBOARDS =================
+
+# Called after commit by anything that changes issue or book counts
+def invalidate_dashboards(*issues):
+    cache.invalidate("admin_dashboard")
+    for branch, user_id in {(issue.branch, issue.user_id) for issue in issues}:
+        cache.invalidate("user_dashboard", f"{branch}/{user_id}")
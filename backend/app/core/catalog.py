@@ -0,0 +1,277 @@
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import CATALOG_SYNC_SECONDS, CATALOG_CHANGE_RETENTION_SECONDS, DEFAULT_BRANCH
+from app.models.book import Book
+from app.models.category import Category
+from app.models.catalog_change import CatalogChange
+
+# Change ids are assigned at insert time but become visible at commit time,
+# so a slow transaction can commit an id lower than one we already applied.
+# Re-reading a short window behind the cursor picks those up (re-applying a
+# change just reloads the row, so it is harmless).
+CHANGE_LOOKBACK = 50
+
+# Sort orders kept precomputed; any other column is sorted on demand
+PRECOMPUTED_SORTS = ("title", "author", "available_copies")
+
+
+# ================= COMPACT ENTRIES =================
+
+class BookEntry:
+    __slots__ = (
+        "id", "title", "author", "isbn",
+        "total_copies", "available_copies", "category_id",
+        "title_key", "author_key",
+    )
+
+    def __init__(self, book: Book):
+        self.id = book.id
+        self.title = book.title
+        self.author = book.author
+        self.isbn = book.isbn
+        self.total_copies = book.total_copies
+        self.available_copies = book.available_copies
+        self.category_id = book.category_id
+        self.title_key = book.title.lower()
+        self.author_key = book.author.lower()
+
+
+class CategoryEntry:
+    __slots__ = ("id", "name", "description")
+
+    def __init__(self, category: Category):
+        self.id = category.id
+        self.name = category.name
+        self.description = category.description
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "description": self.description}
+
+
+def _sort_key(sort_by: str):
+    if sort_by == "title":
+        return lambda b: (b.title_key, b.id)
+    if sort_by == "author":
+        return lambda b: (b.author_key, b.id)
+    return lambda b: (getattr(b, sort_by), b.id)
+
+
+# ================= SNAPSHOT =================
+
+class CatalogSnapshot:
+
+    def __init__(self):
+        self._lock = threading.Lock()        # guards the data below
+        self._sync_lock = threading.Lock()   # one refresh at a time
+
+        self.books: dict[int, BookEntry] = {}
+        self.categories: dict[int, CategoryEntry] = {}
+        self.books_by_category: dict[int, set[int]] = {}
+        self._orders: dict[str, array] = {}
+
+        self.loaded = False
+        self.last_change_id = 0
+        self._seen_changes: set[int] = set()
+        self._synced_at = 0.0
+        self._applied_at = 0.0
+
+    # ---------------- REFRESH ----------------
+    def sync(self, db: Session, force: bool = False):
+        if not force and self.loaded and time.monotonic() - self._synced_at < CATALOG_SYNC_SECONDS:
+            return
+
+        # Readers keep serving the current data while another thread refreshes
+        if not self._sync_lock.acquire(blocking=force or not self.loaded):
+            return
+        try:
+            # Idle for too long: the entries after our cursor may have been pruned
+            stale = time.monotonic() - self._applied_at > CATALOG_CHANGE_RETENTION_SECONDS / 2
+            if not self.loaded or stale:
+                self._load_all(db)
+            else:
+                self._apply_changes(db)
+            self._synced_at = self._applied_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def invalidate(self):
+        # Next read pulls the change log instead of waiting for the interval
+        self._synced_at = 0.0
+
+    def _load_all(self, db: Session):
+        # Read the cursor first: anything committed while loading is replayed later
+        last_id = db.query(func.max(CatalogChange.id)).scalar() or 0
+        books = db.query(Book).all()
+        categories = db.query(Category).all()
+
+        with self._lock:
+            self.books = {b.id: BookEntry(b) for b in books}
+            self.categories = {c.id: CategoryEntry(c) for c in categories}
+            self.books_by_category = {}
+            for entry in self.books.values():
+                self.books_by_category.setdefault(entry.category_id, set()).add(entry.id)
+            self._orders = {}
+            self.last_change_id = last_id
+            self._seen_changes = set()
+            self.loaded = True
+
+    def _apply_changes(self, db: Session):
+        changes = db.query(CatalogChange)\
+            .filter(CatalogChange.id > self.last_change_id - CHANGE_LOOKBACK)\
+            .order_by(CatalogChange.id)\
+            .all()
+        changes = [c for c in changes if c.id not in self._seen_changes]
+        if not changes:
+            return
+
+        book_ids = {c.entity_id for c in changes if c.entity == "book"}
+        category_ids = {c.entity_id for c in changes if c.entity == "category"}
+
+        books = db.query(Book).filter(Book.id.in_(book_ids)).all() if book_ids else []
+        categories = db.query(Category).filter(Category.id.in_(category_ids)).all() if category_ids else []
+
+        with self._lock:
+            found = set()
+            for book in books:
+                found.add(book.id)
+                self._upsert_book(BookEntry(book))
+            for book_id in book_ids - found:
+                self._remove_book(book_id)
+
+            found = set()
+            for category in categories:
+                found.add(category.id)
+                self.categories[category.id] = CategoryEntry(category)
+            for category_id in category_ids - found:
+                self.categories.pop(category_id, None)
+
+            self.last_change_id = max(self.last_change_id, changes[-1].id)
+            floor = self.last_change_id - CHANGE_LOOKBACK
+            self._seen_changes = {i for i in self._seen_changes if i > floor}
+            self._seen_changes.update(c.id for c in changes)
+
+    def _upsert_book(self, entry: BookEntry):
+        old = self.books.get(entry.id)
+        self.books[entry.id] = entry
+
+        if old is None:
+            self._orders.clear()
+        else:
+            if old.title_key != entry.title_key:
+                self._orders.pop("title", None)
+            if old.author_key != entry.author_key:
+                self._orders.pop("author", None)
+            if old.available_copies != entry.available_copies:
+                self._orders.pop("available_copies", None)
+            if old.category_id != entry.category_id:
+                self.books_by_category.get(old.category_id, set()).discard(entry.id)
+
+        self.books_by_category.setdefault(entry.category_id, set()).add(entry.id)
+
+    def _remove_book(self, book_id: int):
+        old = self.books.pop(book_id, None)
+        if old is not None:
+            self.books_by_category.get(old.category_id, set()).discard(book_id)
+            self._orders.clear()
+
+    # ---------------- READS ----------------
+    def _order(self, sort_by: str) -> array:
+        order = self._orders.get(sort_by)
+        if order is None:
+            order = array("l", (b.id for b in sorted(self.books.values(), key=_sort_key(sort_by))))
+            if sort_by in PRECOMPUTED_SORTS:
+                self._orders[sort_by] = order
+        return order
+
+    def query_books(
+        self,
+        search: str | None,
+        category_id: int | None,
+        page: int,
+        size: int,
+        sort_by: str,
+        order: str,
+    ):
+        # Same safe fallback as the SQL path: unknown columns sort by title
+        if sort_by not in BookEntry.__slots__ or sort_by.endswith("_key"):
+            sort_by = "title"
+
+        with self._lock:
+            ids = self._order(sort_by)
+            if order == "desc":
+                ids = ids[::-1]
+
+            needle = search.lower() if search else None
+            members = self.books_by_category.get(category_id, set()) if category_id else None
+
+            if needle is None and members is None:
+                total = len(ids)
+                page_ids = ids[(page - 1) * size:page * size]
+            else:
+                matched = []
+                for book_id in ids:
+                    if members is not None and book_id not in members:
+                        continue
+                    if needle is not None:
+                        book = self.books[book_id]
+                        if needle not in book.title_key and needle not in book.author_key:
+                            continue
+                    matched.append(book_id)
+                total = len(matched)
+                page_ids = matched[(page - 1) * size:page * size]
+
+            return [self._book_dict(self.books[i]) for i in page_ids], total
+
+    def list_categories(self):
+        with self._lock:
+            return [c.to_dict() for c in sorted(self.categories.values(), key=lambda c: c.id)]
+
+    def _book_dict(self, book: BookEntry):
+        category = self.categories.get(book.category_id)
+        return {
+            "id": book.id,
+            "title": book.title,
+            "author": book.author,
+            "isbn": book.isbn,
+            "total_copies": book.total_copies,
+            "available_copies": book.available_copies,
+            "category_id": book.category_id,
+            "category": category.to_dict() if category else None,
+        }
+
+
+# ================= CHANGE-LOG RETENTION =================
+
+def prune_changes(db: Session, retention_seconds: float = CATALOG_CHANGE_RETENTION_SECONDS) -> int:
+    # Every snapshot has consumed these: one that has not synced for half the
+    # retention reloads in full instead of reading the log. Deletions stay,
+    # kiosks read them as tombstones whenever they next come online.
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    pruned = db.query(CatalogChange)\
+        .filter(
+            CatalogChange.deleted == False,
+            or_(CatalogChange.created_at < cutoff, CatalogChange.created_at == None)
+        )\
+        .delete(synchronize_session=False)
+    db.commit()
+    return pruned
+
+
+# One snapshot per branch shard (each shard has its own books and change log)
+_snapshots: dict[str, CatalogSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def catalog_for(db: Session) -> CatalogSnapshot:
+    branch = db.info.get("branch", DEFAULT_BRANCH)
+    snapshot = _snapshots.get(branch)
+    if snapshot is None:
+        with _snapshots_lock:
+            snapshot = _snapshots.setdefault(branch, CatalogSnapshot())
+    return snapshot
@@ -0,0 +1,190 @@
+import gzip
+import hashlib
+import threading
+
+import anyio
+
+from app.core.config import COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+# Streams (SSE and any multi-chunk body) pass through untouched
+SKIP_CONTENT_TYPES = (b"text/event-stream",)
+
+# Larger bodies are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+
+def _accepted_encodings(header: bytes) -> set[str]:
+    accepted = set()
+    for part in header.decode("latin-1").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: bytes, etag: str) -> bool:
+    for candidate in header.decode("latin-1").split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+
+class CompressionStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.compressed = 0
+        self.not_modified = 0
+        self.body_bytes = 0
+        self.wire_bytes = 0
+        self.by_encoding: dict[str, int] = {}
+
+    def record(self, body_bytes: int, wire_bytes: int, encoding: str | None = None, not_modified: bool = False):
+        with self._lock:
+            self.responses += 1
+            self.body_bytes += body_bytes
+            self.wire_bytes += wire_bytes
+            if encoding:
+                self.compressed += 1
+                self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+            if not_modified:
+                self.not_modified += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "compressed": self.compressed,
+                "not_modified": self.not_modified,
+                "by_encoding": dict(self.by_encoding),
+                "body_bytes": self.body_bytes,
+                "wire_bytes": self.wire_bytes,
+                "wire_ratio": round(self.wire_bytes / self.body_bytes, 4) if self.body_bytes else 1.0,
+                "brotli_available": brotli is not None,
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    # Buffers single-chunk responses, then:
+    #   GET 200  -> weak ETag over the uncompressed body; If-None-Match -> 304
+    #   >= minimum_size and compressible -> br (if installed and accepted) or gzip
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        accepted = _accepted_encodings(request_headers.get(b"accept-encoding", b""))
+        if_none_match = request_headers.get(b"if-none-match")
+        cacheable = scope["method"] == "GET"
+
+        start = None
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if b"content-encoding" in headers or content_type.startswith(SKIP_CONTENT_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Streaming body: send what we have and stop interfering
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            await self._finish(start, body, accepted, cacheable, if_none_match, send)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def _finish(self, start, body: bytes, accepted: set, cacheable: bool, if_none_match, send):
+        status = start["status"]
+        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+
+        if cacheable and status == 200:
+            etag = 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            headers.append((b"etag", etag.encode("latin-1")))
+            if if_none_match is not None and _etag_matches(if_none_match, etag):
+                self.stats.record(len(body), 0, not_modified=True)
+                kept = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        encoding = None
+        if len(body) >= self.minimum_size and status not in (204, 304):
+            headers.append((b"vary", b"Accept-Encoding"))
+            if brotli is not None and "br" in accepted:
+                encoding = "br"
+                body_out = await self._run(brotli.compress, body, quality=self.brotli_quality)
+            elif "gzip" in accepted:
+                encoding = "gzip"
+                body_out = await self._run(gzip.compress, body, compresslevel=self.gzip_level, mtime=0)
+
+        if encoding is not None and len(body_out) < len(body):
+            headers.append((b"content-encoding", encoding.encode()))
+            wire = body_out
+        else:
+            encoding = None
+            wire = body
+
+        headers.append((b"content-length", str(len(wire)).encode()))
+        self.stats.record(len(body), len(wire), encoding)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": wire})
+
+    @staticmethod
+    async def _run(compress, body: bytes, **options) -> bytes:
+        if len(body) < OFFLOAD_BYTES:
+            return compress(body, **options)
+        return await anyio.to_thread.run_sync(lambda: compress(body, **options))
@@ -0,0 +1,227 @@
+import os
+
+
+# ================= LOCAL DATA FILES =================
+# Shared cache file, kiosk replica and notification log live here. Resolved
+# from this file, not the working directory, so every worker and script
+# started from anywhere uses the same files.
+DATA_DIR = os.getenv(
+    "LIBRARY_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+)
+
+
+# ================= CATALOG SNAPSHOT =================
+# Serve book / category reads from the in-process snapshot
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "1") == "1"
+
+# How often (seconds) a worker pulls the change log written by other workers
+CATALOG_SYNC_SECONDS = float(os.getenv("CATALOG_SYNC_SECONDS", "2"))
+
+# Change-log entries older than this are pruned; a snapshot idle for half of it reloads in full
+CATALOG_CHANGE_RETENTION_SECONDS = float(os.getenv("CATALOG_CHANGE_RETENTION_SECONDS", "3600"))
+
+
+# ================= LOANS / HOLDS =================
+# Standard loan period, used for hold ETAs
+LOAN_PERIOD_DAYS = int(os.getenv("LOAN_PERIOD_DAYS", "7"))
+
+
+# ================= ADMIN EVENT STREAM =================
+# Events buffered per SSE subscriber before it is told to resync
+EVENT_SUBSCRIBER_BUFFER = int(os.getenv("EVENT_SUBSCRIBER_BUFFER", "256"))
+
+# Seconds of silence before a keep-alive comment is sent
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+
+# ================= OUTBOX DISPATCHER =================
+OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "1") == "1"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+
+# Exponential backoff: BASE * 2^attempts, capped at MAX; dead after MAX_ATTEMPTS
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "2"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+
+# Dispatched events (and their handler receipts) are deleted after this long;
+# dead events are kept for inspection. The sweep runs every SWEEP seconds.
+OUTBOX_RETENTION_SECONDS = float(os.getenv("OUTBOX_RETENTION_SECONDS", str(7 * 24 * 3600)))
+OUTBOX_SWEEP_SECONDS = float(os.getenv("OUTBOX_SWEEP_SECONDS", "600"))
+
+
+# ================= ISSUE ARCHIVAL =================
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "1") == "1"
+
+# Closed issues older than this many days leave the hot table
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "180"))
+
+# Throttling: rows per transaction, pause between batches, run interval
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_PAUSE_SECONDS = float(os.getenv("ARCHIVE_PAUSE_SECONDS", "0.5"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+
+# ================= IDEMPOTENCY KEYS =================
+# "memory" (per worker) or "database" (shared by all workers)
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# A claim left by a worker that died is taken over after this long
+IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = int(os.getenv("IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", "60"))
+# A duplicate waits this long for the first response, then gets a 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+
+# ================= SHARED CACHE =================
+# "sqlite" (file shared by the workers on this host) or "memory" (per worker)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", os.path.join(DATA_DIR, "library_cache.sqlite3"))
+
+# In-process LRU in front of the shared backend
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "2048"))
+CACHE_DEFAULT_TTL_SECONDS = float(os.getenv("CACHE_DEFAULT_TTL_SECONDS", "30"))
+
+# How often a worker reads other workers' invalidations (bounds local staleness)
+CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", "0.5"))
+
+
+# ================= FINES =================
+# Used when no fine_policies row covers a category
+FINE_PER_DAY = float(os.getenv("FINE_PER_DAY", "10"))
+
+# Open loans per transaction in the batch fine refresh
+FINE_REFRESH_BATCH_SIZE = int(os.getenv("FINE_REFRESH_BATCH_SIZE", "5000"))
+
+
+# ================= RECOMMENDATIONS =================
+# Neighbours kept per book
+RECOMMENDATION_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", "10"))
+
+# Readers with more distinct books than this add no pairs (pair count is quadratic)
+RECOMMENDATION_MAX_BOOKS_PER_READER = int(os.getenv("RECOMMENDATION_MAX_BOOKS_PER_READER", "500"))
+
+
+# ================= RESPONSE COMPRESSION =================
+# Bodies smaller than this go out uncompressed (headers would eat the gain)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Used only when the optional brotli package is installed
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+
+# ================= BULK USER PROVISIONING =================
+# Roster rows validated / hashed / inserted per transaction
+PROVISIONING_CHUNK_SIZE = int(os.getenv("PROVISIONING_CHUNK_SIZE", "1000"))
+
+# bcrypt processes (0 = one per CPU)
+PROVISIONING_HASH_WORKERS = int(os.getenv("PROVISIONING_HASH_WORKERS", "0"))
+
+
+# ================= QUERY BUDGETS =================
+# off | log | raise  (per-request SQL statement counting; log/raise are for dev and CI)
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
+
+# Budget for endpoints without an explicit @query_budget
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "20"))
+
+
+# ================= ADMISSION CONTROL =================
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+
+# Requests holding a slot across all lanes; keep below the DB pool (5 + 10 overflow by default)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "12"))
+# Extra slots only admin approve / reject / return may use
+ADMISSION_PRIORITY_RESERVE = int(os.getenv("ADMISSION_PRIORITY_RESERVE", "3"))
+
+# Per-lane concurrency
+ADMISSION_PRIORITY_LIMIT = int(os.getenv("ADMISSION_PRIORITY_LIMIT", "4"))
+ADMISSION_CATALOG_READ_LIMIT = int(os.getenv("ADMISSION_CATALOG_READ_LIMIT", "8"))
+ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", "6"))
+ADMISSION_USER_WRITE_LIMIT = int(os.getenv("ADMISSION_USER_WRITE_LIMIT", "6"))
+ADMISSION_ADMIN_WRITE_LIMIT = int(os.getenv("ADMISSION_ADMIN_WRITE_LIMIT", "4"))
+
+# Waiting requests per lane, and how long one may wait before it is shed (503)
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+ADMISSION_MAX_WAIT_MS = int(os.getenv("ADMISSION_MAX_WAIT_MS", "2000"))
+ADMISSION_PRIORITY_MAX_WAIT_MS = int(os.getenv("ADMISSION_PRIORITY_MAX_WAIT_MS", "5000"))
+
+
+# ================= BRANCH SHARDS =================
+# Branch every row and token belongs to when none is given
+DEFAULT_BRANCH = os.getenv("DEFAULT_BRANCH", "main")
+
+# One database per branch: "main=mysql+pymysql://...,north=mysql+pymysql://..."
+# Empty -> a single shard (DEFAULT_BRANCH) on DATABASE_URL
+SHARDS = os.getenv("SHARDS", "")
+
+# Threads for cross-shard fan-out (login lookup, admin-wide aggregates)
+SHARD_FANOUT_WORKERS = int(os.getenv("SHARD_FANOUT_WORKERS", "8"))
+
+
+# ================= BRANCH KIOSK (OFFLINE MODE) =================
+# Run this app against a local SQLite replica of one branch
+KIOSK_MODE = os.getenv("KIOSK_MODE", "0") == "1"
+KIOSK_BRANCH = os.getenv("KIOSK_BRANCH", DEFAULT_BRANCH)
+KIOSK_DB_PATH = os.getenv("KIOSK_DB_PATH", os.path.join(DATA_DIR, "kiosk.sqlite3"))
+
+# Central API the kiosk syncs with, and the branch admin account it uses
+KIOSK_CENTRAL_URL = os.getenv("KIOSK_CENTRAL_URL", "http://localhost:8000")
+KIOSK_CENTRAL_EMAIL = os.getenv("KIOSK_CENTRAL_EMAIL", "")
+KIOSK_CENTRAL_PASSWORD = os.getenv("KIOSK_CENTRAL_PASSWORD", "")
+
+# Kiosk credential sent as X-Kiosk-Key on every /sync call. Central only
+# serves /sync to a branch admin that also presents its branch's key:
+#   KIOSK_SYNC_KEYS="main=<random>,north=<random>"   (central; empty = sync off)
+#   KIOSK_SYNC_KEY="<random>"                         (kiosk)
+KIOSK_SYNC_KEY = os.getenv("KIOSK_SYNC_KEY", "")
+KIOSK_SYNC_KEYS = os.getenv("KIOSK_SYNC_KEYS", "")
+
+# Background sync interval (0 = only on demand) and rows / journal entries per request
+KIOSK_SYNC_SECONDS = float(os.getenv("KIOSK_SYNC_SECONDS", "30"))
+KIOSK_SYNC_BATCH = int(os.getenv("KIOSK_SYNC_BATCH", "500"))
+
+# Each pull re-reads this far behind its cursor: row versions are assigned
+# before commit, so a slow transaction can land behind rows already pulled
+KIOSK_PULL_LOOKBACK_SECONDS = float(os.getenv("KIOSK_PULL_LOOKBACK_SECONDS", "10"))
+
+
+# ================= DUE-DATE / OVERDUE NOTIFICATIONS =================
+NOTIFY_ENABLED = os.getenv("NOTIFY_ENABLED", "1") == "1"
+NOTIFY_INTERVAL_SECONDS = float(os.getenv("NOTIFY_INTERVAL_SECONDS", "3600"))
+
+# Remind this many days before the due date; repeat overdue notices every N days (0 = once)
+NOTIFY_DUE_SOON_DAYS = int(os.getenv("NOTIFY_DUE_SOON_DAYS", "2"))
+NOTIFY_OVERDUE_REPEAT_DAYS = int(os.getenv("NOTIFY_OVERDUE_REPEAT_DAYS", "7"))
+
+# Throttling: loans per batch (one transaction each), pause between batches, sender rate
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "500"))
+NOTIFY_PAUSE_SECONDS = float(os.getenv("NOTIFY_PAUSE_SECONDS", "0.5"))
+NOTIFY_MAX_PER_SECOND = float(os.getenv("NOTIFY_MAX_PER_SECOND", "50"))
+
+# A claim still unsent after this long belongs to a run that died mid-batch
+# and is taken over (the notice may then go out twice, never zero times)
+NOTIFY_CLAIM_TIMEOUT_SECONDS = float(os.getenv("NOTIFY_CLAIM_TIMEOUT_SECONDS", "3600"))
+
+# "file" appends to NOTIFY_FILE_PATH; "smtp" talks to NOTIFY_SMTP_HOST:PORT
+# (e.g. a local debugging server: python -m aiosmtpd -n -l localhost:1025)
+NOTIFY_SENDER = os.getenv("NOTIFY_SENDER", "file")
+NOTIFY_FILE_PATH = os.getenv("NOTIFY_FILE_PATH", os.path.join(DATA_DIR, "notifications.log"))
+NOTIFY_SMTP_HOST = os.getenv("NOTIFY_SMTP_HOST", "localhost")
+NOTIFY_SMTP_PORT = int(os.getenv("NOTIFY_SMTP_PORT", "1025"))
+NOTIFY_FROM = os.getenv("NOTIFY_FROM", "library@localhost")
+
+
+# ================= PROFILING (ADMIN ONLY) =================
+# Sampling profiler: longest run, shortest sampling interval, deepest stack kept
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_MIN_INTERVAL_MS = float(os.getenv("PROFILE_MIN_INTERVAL_MS", "1"))
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", "64"))
+
+# Per-request cProfile via "X-Profile: 1": estimated profiler overhead allowed
+# per minute across captures (checked before each capture, so a single heavy
+# capture can overshoot it), and how many captures are kept for download
+PROFILE_REQUEST_ENABLED = os.getenv("PROFILE_REQUEST_ENABLED", "1") == "1"
+PROFILE_REQUEST_BUDGET_MS = float(os.getenv("PROFILE_REQUEST_BUDGET_MS", "500"))
+PROFILE_REQUEST_KEEP = int(os.getenv("PROFILE_REQUEST_KEEP", "20"))
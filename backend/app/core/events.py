@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+from app.core.config import EVENT_SUBSCRIBER_BUFFER
+
+
+# ================= SUBSCRIPTION =================
+
+class Subscription:
+    # Bounded buffer owned by one event loop; the oldest events are dropped
+    # when a slow client falls behind and the client is told to resync.
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.buffer = deque(maxlen=maxsize)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def _push(self, event: dict):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+        self._ready.set()
+
+    async def get(self, timeout: float):
+        if not self.buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.buffer.popleft() if self.buffer else None
+
+
+# ================= BACKENDS =================
+
+class LocalBackend:
+    # Single-process fan-out. A multi-worker backend (Redis pub/sub, Postgres
+    # LISTEN/NOTIFY, ...) implements the same two methods: publish() sends the
+    # event to the shared channel and a listener calls deliver() for every
+    # event received from any worker, including its own.
+
+    def attach(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event: dict):
+        self.deliver(event)
+
+
+# ================= BROKER =================
+
+class EventBroker:
+
+    def __init__(self, backend=None):
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.set_backend(backend or LocalBackend())
+
+    def set_backend(self, backend):
+        backend.attach(self._deliver)
+        self.backend = backend
+
+    # Safe to call from the sync route threadpool
+    def publish(self, kind: str, data: dict, deltas: dict | None = None):
+        self.backend.publish({
+            "id": next(self._ids),
+            "type": kind,
+            "data": data,
+            "deltas": deltas or {},
+            "ts": time.time(),
+        })
+
+    def _deliver(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._push, event)
+            except RuntimeError:
+                # Loop already closed: the client is gone
+                self.unsubscribe(sub)
+
+    # Must be called from inside the event loop that will consume it
+    def subscribe(self) -> Subscription:
+        sub = Subscription(asyncio.get_running_loop(), EVENT_SUBSCRIBER_BUFFER)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = EventBroker()
+
+
+# ================= ISSUE LIFECYCLE =================
+
+# Dashboard counter changes per transition (keys match /admin/dashboard/summary)
+ISSUE_EVENT_DELTAS = {
+    "issue.requested": {"pending_issue_requests": 1},
+    "issue.approved": {"pending_issue_requests": -1, "issued_books": 1},
+    "issue.rejected": {"pending_issue_requests": -1},
+    "return.requested": {"pending_return_approved": 1},
+    "return.approved": {"pending_return_approved": -1, "issued_books": -1},
+    "return.rejected": {"pending_return_approved": -1},
+}
+
+
+def publish_issue_event(kind: str, issue):
+    # Call after commit so subscribers never see a rolled-back transition
+    broker.publish(
+        kind,
+        # Ids are per shard, so the branch says which database they belong to
+        {"issue_id": issue.id, "user_id": issue.user_id, "book_id": issue.book_id, "branch": issue.branch},
+        ISSUE_EVENT_DELTAS[kind],
+    )
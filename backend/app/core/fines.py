@@ -0,0 +1,180 @@
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import LOAN_PERIOD_DAYS, FINE_PER_DAY, FINE_REFRESH_BATCH_SIZE
+from app.models.book import Book
+from app.models.fine_policy import FinePolicy, Holiday
+from app.models.issue import Issue
+
+# Fines for whole result sets at once: each row is (issue_date, category_id),
+# the policy columns are gathered by policy index and the day counts come from
+# numpy date arithmetic, so the cost per row is a few array operations.
+
+
+# ================= RULES =================
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _as_days(values) -> np.ndarray:
+    # Much faster than np.array(dates, dtype="datetime64[D]") on large lists
+    ordinals = np.fromiter((d.toordinal() for d in values), dtype=np.int64, count=len(values))
+    return (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+
+
+class FineRules:
+
+    def __init__(self, policies: list[dict], holidays: list[str]):
+        default = next((p for p in policies if p["category_id"] is None), None) or {
+            "category_id": None,
+            "loan_days": LOAN_PERIOD_DAYS,
+            "grace_days": 0,
+            "daily_rate": FINE_PER_DAY,
+            "max_fine": None,
+            "skip_holidays": True,
+        }
+        # Index 0 is the default policy
+        ordered = [default] + [p for p in policies if p["category_id"] is not None]
+        self.category_index = {p["category_id"]: i for i, p in enumerate(ordered) if i}
+
+        self.loan_days = np.array([p["loan_days"] for p in ordered], dtype=np.int64)
+        self.grace_days = np.array([p["grace_days"] for p in ordered], dtype=np.int64)
+        self.daily_rate = np.array([p["daily_rate"] for p in ordered], dtype=np.float64)
+        self.max_fine = np.array(
+            [np.inf if p["max_fine"] is None else p["max_fine"] for p in ordered], dtype=np.float64
+        )
+        self.skip_holidays = np.array([p["skip_holidays"] for p in ordered], dtype=bool)
+        self.holidays = np.array(holidays, dtype="datetime64[D]")
+
+        # Nothing issued more recently than this can be overdue
+        self.min_loan_days = int(self.loan_days.min())
+
+    def policy_ids(self, category_ids) -> np.ndarray:
+        lookup = self.category_index.get
+        return np.fromiter((lookup(c, 0) for c in category_ids), dtype=np.int64, count=len(category_ids))
+
+    def due_dates(self, issue_dates, category_ids) -> np.ndarray:
+        return _as_days(issue_dates) + self.loan_days[self.policy_ids(category_ids)]
+
+    def evaluate(self, issue_dates, category_ids, as_of: date):
+        # Returns (days past the due date, fine) per row
+        policy = self.policy_ids(category_ids)
+        issued = _as_days(issue_dates)
+        due = issued + self.loan_days[policy]
+        end = np.datetime64(as_of, "D")
+
+        overdue = np.maximum((end - due).astype(np.int64), 0)
+
+        charged = overdue
+        if len(self.holidays) and self.skip_holidays[policy].any():
+            # Open days in (due, as_of]; busday_count counts [begin, end)
+            open_days = np.busday_count(
+                np.minimum(due + 1, end + 1), end + 1,
+                weekmask="1111111", holidays=self.holidays
+            )
+            charged = np.where(self.skip_holidays[policy], open_days, overdue)
+
+        charged = np.maximum(charged - self.grace_days[policy], 0)
+        fines = np.minimum(charged * self.daily_rate[policy], self.max_fine[policy])
+        return overdue, fines
+
+
+def _load_rules(db: Session) -> dict:
+    policies = [
+        {
+            "category_id": p.category_id,
+            "loan_days": p.loan_days,
+            "grace_days": p.grace_days,
+            "daily_rate": p.daily_rate,
+            "max_fine": p.max_fine,
+            "skip_holidays": p.skip_holidays,
+        }
+        for p in db.query(FinePolicy).all()
+    ]
+    holidays = [h.day.isoformat() for h in db.query(Holiday).order_by(Holiday.day)]
+    return {"policies": policies, "holidays": holidays}
+
+
+_rules_lock = threading.Lock()
+_rules: dict = {}   # branch -> (raw, FineRules)
+
+
+def load_rules(db: Session) -> FineRules:
+    # Policy rows live in the shared cache, so edits reach every worker; the
+    # arrays are rebuilt only when this worker sees a new copy of them.
+    # Each branch shard has its own policies and holidays.
+    branch = db.info.get("branch", "")
+    raw = cache.get_or_load("fine_policies", branch or "all", lambda: _load_rules(db), ttl=300)
+    with _rules_lock:
+        cached = _rules.get(branch)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        rules = FineRules(raw["policies"], raw["holidays"])
+        _rules[branch] = (raw, rules)
+        return rules
+
+
+def invalidate_rules():
+    cache.invalidate("fine_policies")
+
+
+def fine_for(db: Session, issue_date: date, category_id: int | None, as_of: date) -> float:
+    _, fines = load_rules(db).evaluate([issue_date], [category_id], as_of)
+    return float(fines[0])
+
+
+# ================= BATCH REFRESH =================
+
+def _open_loans():
+    return (
+        Issue.issue_approved == True,
+        Issue.return_date == None,
+        Issue.issue_date != None,
+    )
+
+
+def refresh_overdue_fines(db: Session, as_of: date | None = None, batch_size: int = FINE_REFRESH_BATCH_SIZE) -> int:
+    # Recomputes fine / remarks on every overdue open loan, one keyset page
+    # per transaction
+    as_of = as_of or date.today()
+    rules = load_rules(db)
+    cutoff = as_of - timedelta(days=rules.min_loan_days)
+
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.query(Issue.id, Issue.issue_date, Book.category_id, Issue.fine)\
+            .join(Book, Book.id == Issue.book_id)\
+            .filter(*_open_loans(), Issue.issue_date < cutoff, Issue.id > last_id)\
+            .order_by(Issue.id)\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            break
+
+        ids, issue_dates, category_ids, current = zip(*rows)
+        overdue, fines = rules.evaluate(issue_dates, category_ids, as_of)
+
+        changes = [
+            {"id": ids[i], "fine": float(fines[i]), "return_remarks": f"Overdue by {int(overdue[i])} days"}
+            for i in np.flatnonzero(overdue > 0)
+        ]
+        # Fines left over from a stricter earlier policy
+        stale = np.flatnonzero((overdue == 0) & (np.array(current, dtype=np.float64) > 0))
+        changes += [{"id": ids[i], "fine": 0.0} for i in stale]
+        if changes:
+            db.execute(update(Issue), changes)
+        db.commit()
+
+        updated += len(changes)
+        last_id = ids[-1]
+
+    if updated:
+        cache.invalidate("admin_dashboard")
+        cache.invalidate("user_dashboard")
+    return updated
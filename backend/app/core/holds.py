@@ -0,0 +1,77 @@
+import math
+
+from sqlalchemy.orm import Session
+
+from app.core.config import LOAN_PERIOD_DAYS
+from app.models.book import Book
+from app.models.hold import Hold
+from app.models.issue import Issue
+
+
+def active_hold_count(db: Session, book_id: int) -> int:
+    return db.query(Hold).filter(Hold.book_id == book_id, Hold.active == True).count()
+
+
+def queue_position(db: Session, hold: Hold) -> int:
+    # 1-based; counts only holds ahead of this one on the (book_id, active, id) index
+    return db.query(Hold).filter(
+        Hold.book_id == hold.book_id,
+        Hold.active == True,
+        Hold.id <= hold.id
+    ).count()
+
+
+def estimated_wait_days(position: int, book: Book) -> int:
+    copies = max(book.total_copies, 1)
+    return math.ceil(position / copies) * LOAN_PERIOD_DAYS
+
+
+def _pending_requests(db: Session, book_id: int) -> int:
+    return db.query(Issue).filter(
+        Issue.book_id == book_id,
+        Issue.issue_requested == True
+    ).count()
+
+
+# Turns the front of the queue into issue requests for every free copy.
+# Runs inside the caller's transaction, so the promotion commits (or rolls
+# back) together with the stock change that freed the copy.
+def promote_holds(db: Session, book: Book) -> list[Issue]:
+    promoted = []
+    free = book.available_copies - _pending_requests(db, book.id)
+
+    while free > 0:
+        hold = db.query(Hold)\
+            .filter(Hold.book_id == book.id, Hold.active == True)\
+            .order_by(Hold.id)\
+            .with_for_update(skip_locked=True)\
+            .first()
+        if not hold:
+            break
+
+        hold.active = False
+
+        already_open = db.query(Issue).filter(
+            Issue.user_id == hold.user_id,
+            Issue.book_id == book.id,
+            Issue.return_date == None,
+            Issue.issue_rejected == False
+        ).first()
+        if already_open:
+            hold.cancelled = True
+            continue
+
+        issue = Issue(
+            user_id=hold.user_id,
+            book_id=book.id,
+            issue_requested=True
+        )
+        db.add(issue)
+        db.flush()
+
+        hold.promoted = True
+        hold.issue_id = issue.id
+        promoted.append(issue)
+        free -= 1
+
+    return promoted
@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import anyio
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import (
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_MAX_ENTRIES,
+    IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS,
+    IDEMPOTENCY_WAIT_SECONDS,
+)
+from app.models.idempotency import IdempotencyRecord
+
+# Mutating endpoints that clients may safely retry with the same key
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+IDEMPOTENT_PREFIXES = ("/issues/", "/books", "/holds/")
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+# ================= STORES =================
+# claim(key, fingerprint) -> True for the one caller that gets to run the
+# request; put() replaces the claim with the response, release() drops it
+# (5xx / crash) so a retry runs again. get() only returns finished responses.
+
+class MemoryIdempotencyStore:
+    # Bounded LRU with TTL; entries are only visible to this worker
+
+    def __init__(
+        self,
+        ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        claim_seconds: int = IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.claim_seconds = claim_seconds
+        # A claim is stored as (expiry, None)
+        self._entries: OrderedDict[str, tuple[float, StoredResponse | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def _store(self, key: str, expires: float, response: StoredResponse | None):
+        self._entries[key] = (expires, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> StoredResponse | None:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def claim(self, key: str, fingerprint: str) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, time.monotonic() + self.claim_seconds, None)
+            return True
+
+    def put(self, key: str, response: StoredResponse):
+        with self._lock:
+            self._store(key, time.monotonic() + self.ttl_seconds, response)
+
+    def release(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is None:
+                del self._entries[key]
+
+
+class DatabaseIdempotencyStore:
+    # Shared across workers; the primary key on the claim row decides which
+    # worker runs a request. Expired rows are purged opportunistically.
+
+    def __init__(
+        self,
+        session_factory,
+        ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+        purge_every: int = 500,
+        claim_seconds: int = IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.purge_every = purge_every
+        self.claim_seconds = claim_seconds
+        self._writes = 0
+
+    def get(self, key: str) -> StoredResponse | None:
+        with self.session_factory() as db:
+            row = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.state == "done",
+                IdempotencyRecord.expires_at > datetime.utcnow()
+            ).first()
+            if row is None:
+                return None
+            return StoredResponse(row.fingerprint, row.status, json.loads(row.headers), row.body)
+
+    def claim(self, key: str, fingerprint: str) -> bool:
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            # An expired row (old response, or the claim of a worker that died) is taken over
+            db.query(IdempotencyRecord)\
+                .filter(IdempotencyRecord.key == key, IdempotencyRecord.expires_at <= now)\
+                .delete(synchronize_session=False)
+            db.add(IdempotencyRecord(
+                key=key,
+                fingerprint=fingerprint,
+                state="in_progress",
+                expires_at=now + timedelta(seconds=self.claim_seconds),
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return False
+            return True
+
+    def put(self, key: str, response: StoredResponse):
+        with self.session_factory() as db:
+            db.merge(IdempotencyRecord(
+                key=key,
+                fingerprint=response.fingerprint,
+                state="done",
+                status=response.status,
+                headers=json.dumps(response.headers),
+                body=response.body,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+            ))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                db.query(IdempotencyRecord)\
+                    .filter(IdempotencyRecord.expires_at <= datetime.utcnow())\
+                    .delete(synchronize_session=False)
+            db.commit()
+
+    def release(self, key: str):
+        with self.session_factory() as db:
+            db.query(IdempotencyRecord)\
+                .filter(IdempotencyRecord.key == key, IdempotencyRecord.state == "in_progress")\
+                .delete(synchronize_session=False)
+            db.commit()
+
+
+# ================= MIDDLEWARE =================
+
+# Returned by _claim_or_wait when the first request is still running
+_IN_PROGRESS = object()
+
+# How often a duplicate re-checks the store while it waits
+POLL_SECONDS = 0.1
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def _send_json(send, status: int, body: bytes):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    # The first response for an Idempotency-Key is stored and replayed for
+    # retries without re-running auth or the handler. Keys are scoped to the
+    # caller's credentials and the route. The key is claimed in the store
+    # before the handler runs, so a concurrent duplicate in any worker waits
+    # for the first response instead of executing (409 after wait_seconds).
+    # 5xx responses are not stored, so those retries run again.
+
+    def __init__(self, app, store=None, prefixes=IDEMPOTENT_PREFIXES, wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.store = store or MemoryIdempotencyStore()
+        self.prefixes = prefixes
+        self.wait_seconds = wait_seconds
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client_key = _header(scope, b"idempotency-key")
+        if not client_key:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key = hashlib.sha256(b"\0".join([
+            _header(scope, b"authorization") or b"",
+            scope["method"].encode(),
+            scope["path"].encode(),
+            scope.get("query_string", b""),
+            client_key,
+        ])).hexdigest()
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        stored = await anyio.to_thread.run_sync(self.store.get, key)
+        pending = self._inflight.get(key)
+        if stored is None and pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            stored = await asyncio.shield(pending)
+        if stored is None:
+            stored = await self._claim_or_wait(key, fingerprint)
+        if stored is _IN_PROGRESS:
+            await _send_json(send, 409, b'{"detail":"A request with this Idempotency-Key is still in progress"}')
+            return
+        if stored is not None:
+            await self._replay(stored, fingerprint, send)
+            return
+
+        # This request holds the claim
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._execute(scope, body, receive, send, fingerprint)
+            if response.status < 500:
+                await anyio.to_thread.run_sync(self.store.put, key, response)
+                future.set_result(response)
+            else:
+                await anyio.to_thread.run_sync(self.store.release, key)
+                future.set_result(None)
+        except BaseException:
+            # Waiters fall back to running the request themselves
+            if not future.done():
+                future.set_result(None)
+            # Shielded: a cancelled request must still give up its claim
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(self.store.release, key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _claim_or_wait(self, key: str, fingerprint: str):
+        # None: claimed, run the handler. Otherwise the stored response, or
+        # _IN_PROGRESS if the first request is still running after wait_seconds.
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            if await anyio.to_thread.run_sync(self.store.claim, key, fingerprint):
+                return None
+            stored = await anyio.to_thread.run_sync(self.store.get, key)
+            if stored is not None:
+                return stored
+            if time.monotonic() >= deadline:
+                return _IN_PROGRESS
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _execute(self, scope, body: bytes, receive, send, fingerprint: str) -> StoredResponse:
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        headers = []
+        chunks = []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        return StoredResponse(fingerprint, status, headers, b"".join(chunks))
+
+    async def _replay(self, stored: StoredResponse, fingerprint: str, send):
+        if stored.fingerprint != fingerprint:
+            await _send_json(send, 422, b'{"detail":"Idempotency-Key was already used with a different request body"}')
+            return
+
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,101 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.book_copy import BookCopy, BookAvailability
+from app.models.catalog_change import record_change
+
+# Book.total_copies / available_copies stay the constant-time book-level
+# counters; BookAvailability splits the tracked copies per branch. Every
+# function here runs inside the caller's transaction and keeps all three in
+# step.
+
+
+def _adjust_summary(db: Session, book_id: int, branch: str, total: int = 0, available: int = 0):
+    updated = db.query(BookAvailability)\
+        .filter(BookAvailability.book_id == book_id, BookAvailability.branch == branch)\
+        .update({
+            BookAvailability.total: BookAvailability.total + total,
+            BookAvailability.available: BookAvailability.available + available,
+        }, synchronize_session=False)
+
+    if not updated:
+        db.add(BookAvailability(book_id=book_id, branch=branch, total=total, available=available))
+        db.flush()
+
+
+def add_copies(db: Session, book: Book, copies: list) -> list[BookCopy]:
+    created = []
+    for copy in copies:
+        new_copy = BookCopy(
+            book_id=book.id,
+            barcode=copy.barcode,
+            branch=copy.branch,
+            condition=copy.condition,
+            available=True
+        )
+        db.add(new_copy)
+        _adjust_summary(db, book.id, copy.branch, total=1, available=1)
+        created.append(new_copy)
+
+    # In SQL so concurrent stock changes cannot lose an update; the flush
+    # expires both attributes, so callers (promote_holds) read the new values
+    book.total_copies = Book.total_copies + len(created)
+    book.available_copies = Book.available_copies + len(created)
+    record_change(db, "book", book.id)
+    db.flush()
+    return created
+
+
+def remove_copy(db: Session, book: Book, copy: BookCopy):
+    _adjust_summary(db, book.id, copy.branch, total=-1, available=-1)
+    book.total_copies = Book.total_copies - 1
+    book.available_copies = Book.available_copies - 1
+    record_change(db, "book", book.id)
+    db.delete(copy)
+    db.flush()
+
+
+def move_copy(db: Session, copy: BookCopy, branch: str):
+    if branch == copy.branch:
+        return
+    free = 1 if copy.available else 0
+    _adjust_summary(db, copy.book_id, copy.branch, total=-1, available=-free)
+    _adjust_summary(db, copy.book_id, branch, total=1, available=free)
+    copy.branch = branch
+
+
+def allocate_copy(db: Session, book_id: int, branch: str | None = None) -> BookCopy | None:
+    # SKIP LOCKED: concurrent approvals each take a different free copy
+    # instead of queueing behind the same row
+    query = db.query(BookCopy).filter(BookCopy.book_id == book_id, BookCopy.available == True)
+    if branch:
+        query = query.filter(BookCopy.branch == branch)
+
+    copy = query.order_by(BookCopy.id).limit(1).with_for_update(skip_locked=True).first()
+    if copy is None:
+        return None
+
+    copy.available = False
+    _adjust_summary(db, book_id, copy.branch, available=-1)
+    return copy
+
+
+def release_copy(db: Session, copy_id: int, condition: str | None = None):
+    copy = db.query(BookCopy).filter(BookCopy.id == copy_id).with_for_update().first()
+    if copy is None or copy.available:
+        return None
+
+    copy.available = True
+    if condition:
+        copy.condition = condition
+    _adjust_summary(db, copy.book_id, copy.branch, available=1)
+    return copy
+
+
+# Free copies that carry a barcode; the rest of book.available_copies is
+# untracked stock from before per-copy tracking (one row per branch)
+def tracked_available(db: Session, book_id: int) -> int:
+    return db.query(func.coalesce(func.sum(BookAvailability.available), 0))\
+        .filter(BookAvailability.book_id == book_id)\
+        .scalar()
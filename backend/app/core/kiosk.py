@@ -0,0 +1,752 @@
+import hmac
+import json
+import logging
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import event, func, select, and_, or_, Date, DateTime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    KIOSK_MODE, KIOSK_CENTRAL_URL, KIOSK_CENTRAL_EMAIL, KIOSK_CENTRAL_PASSWORD,
+    KIOSK_SYNC_KEY, KIOSK_SYNC_KEYS, KIOSK_SYNC_SECONDS, KIOSK_SYNC_BATCH, KIOSK_PULL_LOOKBACK_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.book import Book
+from app.models.category import Category
+from app.models.user import User
+from app.models.issue import Issue
+from app.models.outbox import OutboxEvent
+from app.models.catalog_change import CatalogChange, record_change
+from app.models.kiosk import SyncReceipt, KioskJournal, KioskSyncState
+from app.core.catalog import catalog_for
+from app.core.cache import invalidate_dashboards
+from app.core.events import publish_issue_event
+from app.core.fines import fine_for
+from app.core.holds import promote_holds
+from app.core.inventory import allocate_copy, release_copy
+from app.core.outbox import enqueue_issue_event
+
+logger = logging.getLogger(__name__)
+
+# Branch kiosk: the same app on a local SQLite replica of one branch (its
+# catalog, readers and open issues). Issue / return transitions made offline
+# are journaled next to their outbox event and pushed to central in order
+# when the link is back; central answers per entry and the kiosk then pulls
+# every row whose row_version moved past its cursor. Neither side ever ships
+# a whole table.
+#
+# Conflicts on stock: the kiosk sends transitions, not counts. Central turns
+# them into +/-1 deltas on its own available_copies, clamped to
+# [0, total_copies]. Physical events (a book handed out or taken back at the
+# kiosk) always win; decisions that did not move a book (rejections) lose to
+# what central already decided.
+
+# Pulled in this order so foreign keys resolve
+SYNC_TABLES = {
+    "categories": Category,
+    "books": Book,
+    "users": User,
+    "issues": Issue,
+}
+
+JOURNALED_OPS = (
+    "issue.requested", "issue.approved", "issue.rejected",
+    "return.requested", "return.approved", "return.rejected",
+)
+
+
+# Columns a kiosk receives. Users get only what offline login and the
+# role checks need; anything added to the table later stays at central.
+SYNC_COLUMNS = {
+    "users": ("id", "email", "password", "username", "role", "branch", "row_version"),
+}
+
+
+def row_dict(row, columns=None) -> dict:
+    return {key: getattr(row, key) for key in columns or [c.key for c in row.__table__.columns]}
+
+
+def _parse_keys(spec: str) -> dict:
+    keys = {}
+    for part in spec.split(","):
+        branch, _, key = part.partition("=")
+        if branch.strip() and key.strip():
+            keys[branch.strip()] = key.strip()
+    return keys
+
+
+_sync_keys = _parse_keys(KIOSK_SYNC_KEYS)
+
+
+def kiosk_key_valid(branch: str, key: str | None) -> bool:
+    expected = _sync_keys.get(branch)
+    return bool(expected and key) and hmac.compare_digest(expected, key)
+
+
+# ================= CENTRAL: PULL =================
+
+def pull_rows(db: Session, table: str, branch: str, since_version: int, since_id: int, limit: int) -> dict:
+    model = SYNC_TABLES[table]
+
+    # Keyset on (row_version, id): ties between rows written in the same microsecond are not skipped
+    query = db.query(model).filter(or_(
+        model.row_version > since_version,
+        and_(model.row_version == since_version, model.id > since_id),
+    ))
+    if model is not Category:
+        query = query.filter(model.branch == branch)
+
+    rows = query.order_by(model.row_version, model.id).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "rows": [row_dict(row, SYNC_COLUMNS.get(table)) for row in rows],
+        "next_version": rows[-1].row_version if rows else since_version,
+        "next_id": rows[-1].id if rows else since_id,
+        "more": more,
+    }
+
+
+def pull_deletions(db: Session, since_id: int, limit: int) -> dict:
+    # Deleted books / categories have no row left to version: read the catalog change log instead
+    changes = db.query(CatalogChange)\
+        .filter(CatalogChange.id > since_id, CatalogChange.deleted == True)\
+        .order_by(CatalogChange.id)\
+        .limit(limit + 1)\
+        .all()
+    more = len(changes) > limit
+    changes = changes[:limit]
+
+    return {
+        "rows": [{"entity": c.entity, "entity_id": c.entity_id} for c in changes],
+        "next_version": 0,
+        "next_id": changes[-1].id if changes else since_id,
+        "more": more,
+    }
+
+
+# ================= CENTRAL: PUSH =================
+
+class SyncBatch:
+    # Applies one pushed batch in a single transaction, one savepoint per
+    # entry. Each applied entry leaves a SyncReceipt, so a batch re-sent
+    # after a lost response is answered from the receipts.
+
+    def __init__(self, db: Session):
+        self.db = db
+        # Offline-created issues: kiosk (negative) id -> central id
+        self.ids: dict[int, int] = {}
+        self.events = []
+        self.stock_changed = False
+
+    def apply(self, entries) -> list[dict]:
+        results = []
+        for entry in entries:
+            receipt = self.db.get(SyncReceipt, entry.key)
+            if receipt is not None:
+                if entry.issue_id < 0 and receipt.issue_id:
+                    self.ids[entry.issue_id] = receipt.issue_id
+                # Re-sent after a lost response: same answer as the first time
+                results.append({"key": entry.key, "status": receipt.status, "issue_id": receipt.issue_id, "detail": receipt.detail})
+                continue
+
+            emitted = len(self.events)
+            savepoint = self.db.begin_nested()
+            try:
+                status, issue, detail = self._apply_one(entry)
+                self.db.add(SyncReceipt(
+                    key=entry.key, issue_id=issue.id if issue else None, status=status, detail=detail
+                ))
+                savepoint.commit()
+            except Exception as exc:
+                savepoint.rollback()
+                del self.events[emitted:]
+                logger.warning("Kiosk entry %s (%s) failed: %s", entry.key, entry.op, exc)
+                # Later entries may depend on this one: stop here, the kiosk re-sends the rest
+                results.append({"key": entry.key, "status": "error", "issue_id": None, "detail": str(exc)[:255]})
+                break
+
+            if entry.issue_id < 0 and issue is not None:
+                self.ids[entry.issue_id] = issue.id
+            results.append({"key": entry.key, "status": status, "issue_id": issue.id if issue else None, "detail": detail})
+
+        return results
+
+    def _apply_one(self, entry):
+        if entry.op == "issue.requested":
+            return self._request(entry.payload)
+
+        issue_id = self.ids.get(entry.issue_id, entry.issue_id)
+        issue = None
+        if issue_id > 0:
+            issue = self.db.query(Issue).filter(Issue.id == issue_id).with_for_update().first()
+        if issue is None:
+            return "rejected", None, "Issue not found at central"
+
+        handler = {
+            "issue.approved": self._approve,
+            "issue.rejected": self._reject,
+            "return.requested": self._request_return,
+            "return.approved": self._approve_return,
+            "return.rejected": self._reject_return,
+        }.get(entry.op)
+        if handler is None:
+            return "rejected", issue, f"Unknown operation {entry.op}"
+        return handler(issue, entry.payload)
+
+    def _emit(self, kind: str, issue):
+        enqueue_issue_event(self.db, kind, issue)
+        self.events.append((kind, issue))
+
+    def _adjust_stock(self, book_id: int, delta: int) -> bool:
+        # Kiosk delta on central's current count; True if it had to be clamped
+        book = self.db.query(Book).filter(Book.id == book_id).with_for_update().first()
+        if book is None:
+            return False
+        wanted = book.available_copies + delta
+        book.available_copies = min(max(wanted, 0), book.total_copies)
+        record_change(self.db, "book", book.id)
+        self.stock_changed = True
+        return book.available_copies != wanted
+
+    # -------- ISSUE REQUESTED (OFFLINE) --------
+    def _request(self, payload: dict):
+        existing = self.db.query(Issue).filter(
+            Issue.user_id == payload["user_id"],
+            Issue.book_id == payload["book_id"],
+            Issue.closed_on == None
+        ).first()
+        if existing:
+            return "conflict", existing, "Already issued or requested at central; merged into that issue"
+
+        if self.db.query(Book.id).filter(Book.id == payload["book_id"]).first() is None:
+            return "rejected", None, "Book not found at central"
+
+        issue = Issue(user_id=payload["user_id"], book_id=payload["book_id"], issue_requested=True)
+        self.db.add(issue)
+        self._emit("issue.requested", issue)
+        return "applied", issue, None
+
+    # -------- ISSUE APPROVED (BOOK HANDED OUT) --------
+    def _approve(self, issue, payload: dict):
+        if issue.issue_approved:
+            return "conflict", issue, "Already approved at central"
+
+        notes = []
+        if issue.issue_rejected:
+            notes.append("Rejected at central but handed out at the kiosk")
+
+        issue.issue_requested = False
+        issue.issue_approved = True
+        issue.issue_rejected = False
+        issue.closed_on = None
+        issue.issue_date = _parse_date(payload.get("issue_date")) or date.today()
+        if self._adjust_stock(issue.book_id, -1):
+            notes.append("available_copies was already 0 at central")
+
+        # Barcoded copies are tracked only here: book one out like approve_issue
+        # does, so central cannot hand the same copy out again
+        if issue.copy_id is None:
+            copy = allocate_copy(self.db, issue.book_id)
+            if copy is not None:
+                issue.copy_id = copy.id
+
+        self._emit("issue.approved", issue)
+        return ("conflict" if notes else "applied"), issue, "; ".join(notes) or None
+
+    # -------- ISSUE REJECTED --------
+    def _reject(self, issue, payload: dict):
+        if issue.issue_approved:
+            return "conflict", issue, "Approved at central; kiosk rejection dropped"
+        if issue.issue_rejected:
+            return "applied", issue, "Already rejected at central"
+
+        issue.issue_requested = False
+        issue.issue_rejected = True
+        issue.closed_on = date.today()
+        self._emit("issue.rejected", issue)
+        return "applied", issue, None
+
+    # -------- RETURN REQUESTED --------
+    def _request_return(self, issue, payload: dict):
+        if issue.return_approved or issue.return_requested:
+            return "applied", issue, "Already requested or returned at central"
+        if not issue.issue_approved:
+            return "rejected", issue, "Issue is not approved at central"
+
+        issue.return_requested = True
+        issue.return_rejected = False
+        issue.return_remarks = None
+        self._emit("return.requested", issue)
+        return "applied", issue, None
+
+    # -------- RETURN APPROVED (BOOK TAKEN BACK) --------
+    def _approve_return(self, issue, payload: dict):
+        if issue.return_approved:
+            return "conflict", issue, "Return already approved at central"
+
+        returned_on = _parse_date(payload.get("return_date")) or date.today()
+        issue.return_date = returned_on
+        issue.return_approved = True
+        issue.return_requested = False
+        issue.return_rejected = False
+        issue.closed_on = returned_on
+
+        if issue.copy_id:
+            release_copy(self.db, issue.copy_id)
+
+        book = self.db.query(Book).filter(Book.id == issue.book_id).first()
+        # Central fine policy, not the kiosk's estimate
+        issue.fine = fine_for(self.db, issue.issue_date, book.category_id if book else None, returned_on)
+
+        notes = []
+        promoted = []
+        if not issue.issue_approved:
+            notes.append("Issue was never approved at central; stock unchanged")
+        elif book:
+            if self._adjust_stock(book.id, +1):
+                notes.append("available_copies was already at total_copies at central")
+            self.db.flush()
+            promoted = promote_holds(self.db, book)
+
+        self._emit("return.approved", issue)
+        for promoted_issue in promoted:
+            self._emit("issue.requested", promoted_issue)
+        return ("conflict" if notes else "applied"), issue, "; ".join(notes) or None
+
+    # -------- RETURN REJECTED --------
+    def _reject_return(self, issue, payload: dict):
+        if issue.return_approved:
+            return "conflict", issue, "Return approved at central; kiosk rejection dropped"
+        if issue.return_rejected or not issue.return_requested:
+            return "applied", issue, "No pending return request at central"
+
+        issue.return_rejected = True
+        issue.return_requested = False
+        self._emit("return.rejected", issue)
+        return "applied", issue, None
+
+    def finish(self):
+        # After commit, like the issue routes
+        if self.stock_changed:
+            catalog_for(self.db).sync(self.db, force=True)
+        for kind, issue in self.events:
+            publish_issue_event(kind, issue)
+        invalidate_dashboards(*(issue for _, issue in self.events))
+
+
+def apply_entries(db: Session, entries) -> list[dict]:
+    batch = SyncBatch(db)
+    results = batch.apply(entries)
+    db.commit()
+    batch.finish()
+    return results
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+# ================= KIOSK: LOCAL JOURNAL =================
+
+def _assign_local_issue_id(mapper, connection, target):
+    # Offline issues count down from -1 so they never collide with pulled central ids
+    if target.id is None:
+        lowest = connection.execute(select(func.min(Issue.__table__.c.id))).scalar() or 0
+        target.id = min(lowest, 0) - 1
+
+
+def _journal_outbox(session, flush_context, instances):
+    # Every issue transition already writes an outbox event in its own
+    # transaction; the journal row rides along in the same flush
+    for obj in list(session.new):
+        if isinstance(obj, OutboxEvent) and obj.event_type in JOURNALED_OPS:
+            session.add(KioskJournal(
+                key=obj.idempotency_key,
+                op=obj.event_type,
+                issue_id=obj.aggregate_id,
+                payload=obj.payload,
+            ))
+
+
+def install_journal():
+    if not event.contains(Issue, "before_insert", _assign_local_issue_id):
+        event.listen(Issue, "before_insert", _assign_local_issue_id)
+        event.listen(SessionLocal, "before_flush", _journal_outbox)
+
+
+# Readers and staff can log in, browse, request and hand books in / out.
+# Everything else needs central (registration, catalog edits, holds, fines...).
+KIOSK_WRITE_PATHS = re.compile(
+    r"^/(auth/login"
+    r"|issues/request-issue/-?\d+|issues/request-return/-?\d+"
+    r"|issues/admin/(approve|reject)-(issue|return)/-?\d+"
+    r"|sync/run)$"
+)
+
+
+class KioskWriteGuard:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS") \
+                or KIOSK_WRITE_PATHS.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Not available in kiosk mode"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ================= KIOSK: CENTRAL CLIENT =================
+
+class CentralClient:
+    # Talks to the central API as the branch's admin account; logs in lazily
+    # and once more when the token has expired
+
+    def __init__(self, base_url: str, email: str, password: str, kiosk_key: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.password = password
+        self.kiosk_key = kiosk_key
+        self.timeout = timeout
+        self.token = None
+
+    def _login(self):
+        data = urllib.parse.urlencode({"username": self.email, "password": self.password}).encode()
+        with urllib.request.urlopen(self.base_url + "/auth/login", data=data, timeout=self.timeout) as response:
+            self.token = json.loads(response.read())["access_token"]
+
+    def _call(self, method: str, path: str, body=None):
+        for attempt in range(2):
+            if self.token is None:
+                self._login()
+            request = urllib.request.Request(
+                self.base_url + path,
+                method=method,
+                data=json.dumps(body).encode() if body is not None else None,
+                headers={
+                    "Authorization": f"Bearer {self.token}",
+                    "X-Kiosk-Key": self.kiosk_key,
+                    "Content-Type": "application/json",
+                },
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as exc:
+                if exc.code != 401 or attempt:
+                    raise
+                self.token = None
+
+    def get(self, path: str):
+        return self._call("GET", path)
+
+    def post(self, path: str, body: dict):
+        return self._call("POST", path, body)
+
+
+# ================= KIOSK: SYNC =================
+
+class KioskSync:
+
+    def __init__(self, session_factory, client, batch_size: int = KIOSK_SYNC_BATCH):
+        self.session_factory = session_factory
+        self.client = client
+        self.batch_size = batch_size
+        # The worker and POST /sync/run never sync at the same time
+        self._lock = threading.Lock()
+
+    def run_once(self) -> dict:
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                pushed = self.push()
+                pulled = self.pull()
+            except (urllib.error.URLError, OSError) as exc:
+                # Still offline (or central is shedding): everything stays journaled
+                result = {"status": "offline", "detail": str(exc)[:255]}
+            else:
+                result = {
+                    "status": "ok",
+                    "pushed": pushed,
+                    "pulled": pulled,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+
+            with self.session_factory() as db:
+                self._set_state(db, "last_result", json.dumps(result))
+                if result["status"] == "ok":
+                    self._set_state(db, "last_synced_at", datetime.utcnow().isoformat())
+                db.commit()
+            return result
+
+    # -------- PUSH: JOURNAL -> CENTRAL --------
+    def push(self) -> dict:
+        counts = Counter()
+        with self.session_factory() as db:
+            while True:
+                entries = db.query(KioskJournal)\
+                    .filter(KioskJournal.status == "pending")\
+                    .order_by(KioskJournal.id)\
+                    .limit(self.batch_size)\
+                    .all()
+                if not entries:
+                    break
+
+                response = self.client.post("/sync/push", {"entries": [
+                    {"key": e.key, "op": e.op, "issue_id": e.issue_id, "payload": json.loads(e.payload)}
+                    for e in entries
+                ]})
+                results = {r["key"]: r for r in response["results"]}
+
+                remap = {}
+                now = datetime.utcnow()
+                for entry in entries:
+                    result = results.get(entry.key)
+                    if result is None or result["status"] == "error":
+                        continue
+                    counts[result["status"]] += 1
+                    entry.status = result["status"]
+                    entry.detail = result["detail"]
+                    entry.synced_at = now
+
+                    if entry.issue_id < 0 and entry.op == "issue.requested":
+                        if result["issue_id"]:
+                            remap[entry.issue_id] = result["issue_id"]
+                        else:
+                            self._close_rejected(db, entry.issue_id)
+
+                self._remap(db, remap)
+                db.commit()
+
+                if len(results) < len(entries) or any(r["status"] == "error" for r in results.values()):
+                    # Central stopped part-way; the rest is retried next round
+                    counts["error"] += 1
+                    break
+
+        return dict(counts)
+
+    def _remap(self, db: Session, remap: dict):
+        db.flush()
+        for local_id, central_id in remap.items():
+            if db.get(Issue, central_id) is not None:
+                # Merged into an issue the kiosk already has
+                db.query(Issue).filter(Issue.id == local_id).delete(synchronize_session=False)
+            else:
+                db.query(Issue).filter(Issue.id == local_id).update({Issue.id: central_id}, synchronize_session=False)
+            db.query(KioskJournal)\
+                .filter(KioskJournal.issue_id == local_id)\
+                .update({KioskJournal.issue_id: central_id}, synchronize_session=False)
+        if remap:
+            db.expire_all()
+
+    def _close_rejected(self, db: Session, local_id: int):
+        issue = db.get(Issue, local_id)
+        if issue is not None:
+            issue.issue_requested = False
+            issue.issue_rejected = True
+            issue.closed_on = date.today()
+
+    # -------- PULL: CENTRAL -> REPLICA --------
+    def pull(self) -> dict:
+        counts = {}
+        lookback = int(KIOSK_PULL_LOOKBACK_SECONDS * 1_000_000)
+
+        with self.session_factory() as db:
+            for table in SYNC_TABLES:
+                cursor = self._cursor(db, table)
+                version, last_id = (max(cursor[0] - lookback, 0), 0) if cursor[0] else (0, 0)
+                counts[table] = 0
+
+                while True:
+                    page = self.client.get(
+                        f"/sync/pull/{table}?since_version={version}&since_id={last_id}&limit={self.batch_size}"
+                    )
+                    self._apply_rows(db, table, page["rows"])
+                    counts[table] += len(page["rows"])
+                    version, last_id = page["next_version"], page["next_id"]
+
+                    cursor = max(cursor, (version, last_id))
+                    self._set_state(db, f"cursor:{table}", f"{cursor[0]}:{cursor[1]}")
+                    db.commit()
+                    if not page["more"]:
+                        break
+
+            counts["deletions"] = self._pull_deletions(db)
+
+        if counts["books"] or counts["categories"] or counts["deletions"]:
+            with self.session_factory() as db:
+                catalog_for(db).sync(db, force=True)
+        if counts["issues"]:
+            invalidate_dashboards()
+        return counts
+
+    def _pull_deletions(self, db: Session) -> int:
+        since_id = self._cursor(db, "deletions")[1]
+        removed = 0
+        while True:
+            page = self.client.get(f"/sync/pull/deletions?since_id={since_id}&limit={self.batch_size}")
+            for row in page["rows"]:
+                model = Book if row["entity"] == "book" else Category
+                db.query(model).filter(model.id == row["entity_id"]).delete(synchronize_session=False)
+                record_change(db, row["entity"], row["entity_id"], deleted=True)
+            removed += len(page["rows"])
+            since_id = page["next_id"]
+            self._set_state(db, "cursor:deletions", f"0:{since_id}")
+            db.commit()
+            if not page["more"]:
+                return removed
+
+    def _apply_rows(self, db: Session, table: str, rows: list):
+        model = SYNC_TABLES[table]
+        columns = model.__table__.c
+
+        pending = db.query(KioskJournal).filter(KioskJournal.status == "pending").all()
+        # Local changes central has not seen yet win over the pulled row
+        pending_issues = {entry.issue_id for entry in pending}
+        stock_delta = Counter()
+        for entry in pending:
+            if entry.op in ("issue.approved", "return.approved"):
+                stock_delta[json.loads(entry.payload)["book_id"]] += -1 if entry.op == "issue.approved" else 1
+
+        upserts = []
+        for row in rows:
+            values = {key: _coerce(columns[key], value) for key, value in row.items() if key in columns}
+
+            if model is Issue:
+                if values["id"] in pending_issues:
+                    continue
+                if values["closed_on"] is not None:
+                    # Only open issues are kept at the kiosk
+                    db.query(Issue).filter(Issue.id == values["id"]).delete(synchronize_session=False)
+                    continue
+            if model is Book and stock_delta[values["id"]]:
+                wanted = values["available_copies"] + stock_delta[values["id"]]
+                values["available_copies"] = min(max(wanted, 0), values["total_copies"])
+            upserts.append(values)
+
+        if upserts:
+            try:
+                with db.begin_nested():
+                    db.execute(_upsert(model, upserts))
+            except IntegrityError:
+                # A unique value moved to another row (e.g. an ISBN re-used after a delete)
+                for values in upserts:
+                    self._upsert_one(db, model, values)
+
+        if model in (Book, Category):
+            entity = "book" if model is Book else "category"
+            for values in upserts:
+                record_change(db, entity, values["id"])
+        db.expire_all()
+
+    def _upsert_one(self, db: Session, model, values: dict):
+        for column in model.__table__.c:
+            if column.unique and column.name in values:
+                db.query(model)\
+                    .filter(column == values[column.name], model.id != values["id"])\
+                    .delete(synchronize_session=False)
+        db.execute(_upsert(model, [values]))
+
+    def _cursor(self, db: Session, name: str) -> tuple[int, int]:
+        state = db.get(KioskSyncState, f"cursor:{name}")
+        if state is None:
+            return 0, 0
+        version, last_id = state.value.split(":")
+        return int(version), int(last_id)
+
+    def _set_state(self, db: Session, name: str, value: str):
+        db.merge(KioskSyncState(name=name, value=value))
+
+    def status(self, db: Session) -> dict:
+        counts = dict(db.query(KioskJournal.status, func.count(KioskJournal.id)).group_by(KioskJournal.status).all())
+        last_result = db.get(KioskSyncState, "last_result")
+        last_synced = db.get(KioskSyncState, "last_synced_at")
+        return {
+            "journal": counts,
+            "last_result": json.loads(last_result.value) if last_result else None,
+            "last_synced_at": last_synced.value if last_synced else None,
+        }
+
+
+def _upsert(model, rows: list):
+    stmt = sqlite_insert(model.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={key: stmt.excluded[key] for key in rows[0] if key != "id"},
+    )
+
+
+def _coerce(column, value):
+    # JSON gives dates back as ISO strings
+    if value is None or not isinstance(value, str):
+        return value
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+# ================= KIOSK: BACKGROUND WORKER =================
+
+class KioskSyncWorker:
+
+    def __init__(self, sync: KioskSync, interval_seconds: float = KIOSK_SYNC_SECONDS):
+        self.sync = sync
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kiosk-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                result = self.sync.run_once()
+                if result["status"] != "ok":
+                    logger.info("Kiosk sync: %s", result["detail"])
+            except Exception:
+                logger.exception("Kiosk sync failed")
+            self._stop.wait(self.interval_seconds)
+
+
+kiosk_sync = KioskSync(
+    SessionLocal,
+    CentralClient(KIOSK_CENTRAL_URL, KIOSK_CENTRAL_EMAIL, KIOSK_CENTRAL_PASSWORD, KIOSK_SYNC_KEY)
+)
+kiosk_worker = KioskSyncWorker(kiosk_sync)
+
+if KIOSK_MODE:
+    install_journal()
@@ -0,0 +1,328 @@
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import and_, or_, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import (
+    NOTIFY_INTERVAL_SECONDS, NOTIFY_DUE_SOON_DAYS, NOTIFY_OVERDUE_REPEAT_DAYS,
+    NOTIFY_BATCH_SIZE, NOTIFY_PAUSE_SECONDS, NOTIFY_MAX_PER_SECOND, NOTIFY_CLAIM_TIMEOUT_SECONDS,
+    NOTIFY_SENDER, NOTIFY_FILE_PATH, NOTIFY_SMTP_HOST, NOTIFY_SMTP_PORT, NOTIFY_FROM,
+)
+from app.database import SessionLocal, shards
+from app.models.issue import Issue
+from app.models.notification import NotificationLog
+from app.core.fines import load_rules
+
+logger = logging.getLogger(__name__)
+
+# Due-date reminders and overdue notices. Each run walks the open loans that
+# can be due within NOTIFY_DUE_SOON_DAYS (or are already overdue) as one
+# range on ix_issues_open_loans, in keyset batches of (issue_date, id). Per
+# batch: due dates / fines for all rows at once, one lookup in the
+# notification log to drop notices already sent, a claim on the new ones,
+# then the batch goes to the sender at NOTIFY_MAX_PER_SECOND.
+
+TEMPLATES = {
+    "due_soon": (
+        'Reminder: "{title}" is due on {due_date}',
+        'Hi {username},\n\n"{title}" by {author} is due back on {due_date} '
+        "({days_left} day(s) left).\n\nThank you,\nThe Library\n",
+    ),
+    "overdue": (
+        'Overdue: "{title}" was due on {due_date}',
+        'Hi {username},\n\n"{title}" by {author} was due on {due_date} and is '
+        "{overdue_days} day(s) overdue. The fine so far is {fine:.2f}.\n"
+        "Please return it as soon as possible.\n\nThe Library\n",
+    ),
+}
+
+
+# ================= SENDERS =================
+# A sender takes a list of messages ({"to", "subject", "body", ...}) and
+# returns one success flag per message. Add new channels to SENDERS.
+
+class FileSender:
+    # Local stand-in: one JSON line per message
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, messages: list[dict]) -> list[bool]:
+        with self._lock, open(self.path, "a", encoding="utf-8") as out:
+            for message in messages:
+                out.write(json.dumps(message, default=str) + "\n")
+        return [True] * len(messages)
+
+
+class SmtpSender:
+    # One connection per batch; point it at a debugging SMTP server in development
+    def __init__(self, host: str, port: int, sender: str):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, messages: list[dict]) -> list[bool]:
+        results = []
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message["to"]
+                email["Subject"] = message["subject"]
+                email.set_content(message["body"])
+                try:
+                    smtp.send_message(email)
+                    results.append(True)
+                except smtplib.SMTPException as exc:
+                    logger.warning("Notification to %s failed: %s", message["to"], exc)
+                    results.append(False)
+        return results
+
+
+SENDERS = {
+    "file": lambda: FileSender(NOTIFY_FILE_PATH),
+    "smtp": lambda: SmtpSender(NOTIFY_SMTP_HOST, NOTIFY_SMTP_PORT, NOTIFY_FROM),
+}
+
+
+def make_sender(name: str = NOTIFY_SENDER):
+    if name not in SENDERS:
+        raise ValueError(f"Unknown notification sender: {name}")
+    return SENDERS[name]()
+
+
+class RateLimiter:
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self.interval = 1 / per_second if per_second > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self, count: int = 1):
+        # Blocks until `count` more sends fit under the rate
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(self._next, now)
+        self._next = start + count * self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# ================= SCAN =================
+
+def _open_loans_page(db: Session, horizon: date, after: tuple | None, batch_size: int) -> list[Issue]:
+    # Open loans issued on or before the horizon; everything later is not due yet
+    query = db.query(Issue)\
+        .options(joinedload(Issue.user), joinedload(Issue.book))\
+        .filter(
+            Issue.issue_approved == True,
+            Issue.return_date == None,
+            Issue.issue_date != None,
+            Issue.issue_date <= horizon
+        )
+    if after is not None:
+        query = query.filter(or_(
+            Issue.issue_date > after[0],
+            and_(Issue.issue_date == after[0], Issue.id > after[1]),
+        ))
+    return query.order_by(Issue.issue_date, Issue.id).limit(batch_size).all()
+
+
+def _notices(db: Session, issues: list[Issue], today: date, due_soon_days: int, repeat_days: int) -> list[dict]:
+    rules = load_rules(db)
+    issue_dates = [issue.issue_date for issue in issues]
+    category_ids = [issue.book.category_id if issue.book else None for issue in issues]
+    due_dates = rules.due_dates(issue_dates, category_ids).tolist()
+    overdue, fines = rules.evaluate(issue_dates, category_ids, today)
+
+    notices = []
+    for issue, due_date, overdue_days, fine in zip(issues, due_dates, overdue.tolist(), fines.tolist()):
+        if issue.user is None:
+            continue
+        if overdue_days > 0:
+            kind = "overdue"
+            stage = (overdue_days - 1) // repeat_days if repeat_days else 0
+        elif (due_date - today).days <= due_soon_days:
+            kind, stage = "due_soon", 0
+        else:
+            continue
+        notices.append({
+            "issue": issue, "kind": kind, "stage": stage, "due_date": due_date,
+            "overdue_days": overdue_days, "fine": fine,
+        })
+    return notices
+
+
+def render(notice: dict, today: date) -> dict:
+    issue = notice["issue"]
+    fields = {
+        "username": issue.user.username,
+        "title": issue.book.title if issue.book else "your book",
+        "author": issue.book.author if issue.book else "unknown",
+        "due_date": notice["due_date"].isoformat(),
+        "days_left": (notice["due_date"] - today).days,
+        "overdue_days": notice["overdue_days"],
+        "fine": notice["fine"],
+    }
+    subject, body = TEMPLATES[notice["kind"]]
+    return {
+        "to": issue.user.email,
+        "subject": subject.format(**fields),
+        "body": body.format(**fields),
+        "kind": notice["kind"],
+        "issue_id": issue.id,
+    }
+
+
+# ================= RUN =================
+
+def _send_batch(db: Session, issues: list[Issue], sender, limiter: RateLimiter, today: date,
+                due_soon_days: int, repeat_days: int, stats: Counter):
+    notices = _notices(db, issues, today, due_soon_days, repeat_days)
+    if not notices:
+        return
+
+    logged = db.query(NotificationLog.id, NotificationLog.issue_id, NotificationLog.kind, NotificationLog.stage,
+                      NotificationLog.status, NotificationLog.created_at)\
+        .filter(NotificationLog.issue_id.in_({n["issue"].id for n in notices}))\
+        .all()
+
+    # Sent, or claimed by a run that may still be sending. Older claims were
+    # left by a run that died between claim and send: drop them and claim again.
+    cutoff = datetime.utcnow() - timedelta(seconds=NOTIFY_CLAIM_TIMEOUT_SECONDS)
+    stale = {row.id for row in logged
+             if row.status == "claimed" and (row.created_at is None or row.created_at < cutoff)}
+    done = {(row.issue_id, row.kind, row.stage) for row in logged if row.id not in stale}
+    if stale:
+        db.query(NotificationLog)\
+            .filter(NotificationLog.id.in_(stale), NotificationLog.status == "claimed")\
+            .delete(synchronize_session=False)
+        stats["reclaimed"] += len(stale)
+
+    fresh = [n for n in notices if (n["issue"].id, n["kind"], n["stage"]) not in done]
+    stats["already_sent"] += len(notices) - len(fresh)
+    if not fresh:
+        db.commit()
+        return
+
+    # Claim first (one executemany): a concurrent worker hitting the unique key skips the batch
+    messages = [render(n, today) for n in fresh]
+    keys = [(n["issue"].id, n["kind"], n["stage"]) for n in fresh]
+    try:
+        db.execute(insert(NotificationLog), [
+            {"issue_id": n["issue"].id, "user_id": n["issue"].user_id, "kind": n["kind"],
+             "stage": n["stage"], "due_date": n["due_date"], "status": "claimed"}
+            for n in fresh
+        ])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stats["claimed_elsewhere"] += len(fresh)
+        return
+
+    # About one second of sends per call to the sender
+    chunk = max(1, int(limiter.per_second)) if limiter.per_second > 0 else len(messages)
+    results = []
+    for start in range(0, len(messages), chunk):
+        part = messages[start:start + chunk]
+        limiter.wait(len(part))
+        try:
+            results += sender.send(part)
+        except Exception as exc:
+            logger.warning("Notification sender failed: %s", exc)
+            results += [False] * len(part)
+
+    sent, failed = [], []
+    for key, message, ok in zip(keys, messages, results):
+        (sent if ok else failed).append(key)
+        stats[message["kind"] if ok else "failed"] += 1
+
+    once = tuple_(NotificationLog.issue_id, NotificationLog.kind, NotificationLog.stage)
+    if sent:
+        db.query(NotificationLog).filter(once.in_(sent))\
+            .update({NotificationLog.status: "sent", NotificationLog.sent_at: datetime.utcnow()}, synchronize_session=False)
+    if failed:
+        # Unclaimed, so the next run tries again
+        db.query(NotificationLog).filter(once.in_(failed)).delete(synchronize_session=False)
+    db.commit()
+
+
+def send_due_notifications(
+    session_factory=SessionLocal,
+    sender=None,
+    today: date | None = None,
+    due_soon_days: int = NOTIFY_DUE_SOON_DAYS,
+    repeat_days: int = NOTIFY_OVERDUE_REPEAT_DAYS,
+    batch_size: int = NOTIFY_BATCH_SIZE,
+    pause_seconds: float = NOTIFY_PAUSE_SECONDS,
+    max_per_second: float = NOTIFY_MAX_PER_SECOND,
+    stop: threading.Event | None = None,
+) -> dict:
+    sender = sender or make_sender()
+    today = today or date.today()
+    limiter = RateLimiter(max_per_second)
+    stats = Counter()
+    after = None
+
+    while not (stop and stop.is_set()):
+        with session_factory() as db:
+            # The shortest loan period bounds every category's due date
+            horizon = today + timedelta(days=due_soon_days - load_rules(db).min_loan_days)
+            issues = _open_loans_page(db, horizon, after, batch_size)
+            if not issues:
+                break
+            stats["scanned"] += len(issues)
+            after = (issues[-1].issue_date, issues[-1].id)
+            _send_batch(db, issues, sender, limiter, today, due_soon_days, repeat_days, stats)
+
+        if len(issues) < batch_size:
+            break
+        # Short transactions with a pause in between, like the archiver
+        time.sleep(pause_seconds)
+
+    if stats["due_soon"] or stats["overdue"]:
+        logger.info("Sent %s due-soon and %s overdue notices", stats["due_soon"], stats["overdue"])
+    return dict(stats)
+
+
+class NotificationWorker:
+
+    def __init__(self, interval_seconds: float = NOTIFY_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="due-notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for branch in shards.branches():
+                    send_due_notifications(session_factory=shards.sessions[branch], stop=self._stop)
+            except Exception:
+                logger.exception("Due-date notifications failed")
+            self._stop.wait(self.interval_seconds)
+
+
+notification_worker = NotificationWorker()
@@ -0,0 +1,277 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_BACKOFF_BASE_SECONDS,
+    OUTBOX_BACKOFF_MAX_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETENTION_SECONDS,
+    OUTBOX_SWEEP_SECONDS,
+)
+from app.database import SessionLocal, shards
+from app.models.outbox import OutboxEvent, OutboxReceipt
+
+logger = logging.getLogger(__name__)
+
+# event_type -> [(handler name, fn)]; "*" receives every event
+_handlers: dict[str, list] = {}
+
+
+# ================= WRITE SIDE =================
+
+def enqueue(db: Session, event_type: str, aggregate_id: int | None, payload: dict):
+    # Added to the caller's session: the event exists only if the transition commits
+    db.add(OutboxEvent(
+        event_type=event_type,
+        aggregate_id=aggregate_id,
+        payload=json.dumps(payload, default=str),
+        idempotency_key=uuid.uuid4().hex,
+    ))
+
+
+def enqueue_issue_event(db: Session, event_type: str, issue):
+    if issue.id is None:
+        db.flush()
+
+    enqueue(db, event_type, issue.id, {
+        "issue_id": issue.id,
+        "user_id": issue.user_id,
+        "book_id": issue.book_id,
+        "issue_date": issue.issue_date,
+        "return_date": issue.return_date,
+        "fine": issue.fine,
+    })
+
+
+# ================= HANDLERS =================
+
+# Handlers run with the dispatcher's session and must be idempotent per
+# event["idempotency_key"]. Database work done through that session commits
+# together with the handler's receipt, so it is applied exactly once; any
+# external side effect is at-least-once.
+def register_handler(event_type: str, name: str | None = None):
+    def decorator(fn):
+        handler_name = name or f"{fn.__module__}.{fn.__name__}"
+        _handlers.setdefault(event_type, []).append((handler_name, fn))
+        return fn
+    return decorator
+
+
+def _handlers_for(event_type: str):
+    return _handlers.get(event_type, []) + _handlers.get("*", [])
+
+
+# ================= METRICS =================
+
+class OutboxMetrics:
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.dispatched = 0
+        self.failures = 0
+        self.dead = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def record_batch(self, dispatched: int, failures: int, dead: int, elapsed: float):
+        now = time.monotonic()
+        with self._lock:
+            self.dispatched += dispatched
+            self.failures += failures
+            self.dead += dead
+            self.batches += 1
+            self.last_batch_ms = elapsed * 1000
+            if dispatched:
+                self._recent.append((now, dispatched))
+            while self._recent and now - self._recent[0][0] > self.window_seconds:
+                self._recent.popleft()
+
+    def throughput(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(n for t, n in self._recent if now - t <= self.window_seconds)
+        return recent / self.window_seconds
+
+
+# ================= DISPATCHER =================
+
+class OutboxDispatcher:
+
+    def __init__(self, session_factory, batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.metrics = OutboxMetrics()
+        self._stop = threading.Event()
+        self._thread = None
+        self._swept_at = 0.0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                drained = self.drain_once()
+            except Exception:
+                logger.exception("Outbox batch failed")
+                drained = 0
+            if time.monotonic() - self._swept_at >= OUTBOX_SWEEP_SECONDS:
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception("Outbox retention sweep failed")
+                self._swept_at = time.monotonic()
+            # Keep draining while there is a backlog
+            if drained < self.batch_size:
+                self._stop.wait(self.poll_seconds)
+
+    def drain_once(self) -> int:
+        started = time.perf_counter()
+        dispatched = failures = dead = 0
+
+        with self.session_factory() as db:
+            now = datetime.utcnow()
+            events = db.query(OutboxEvent)\
+                .filter(
+                    OutboxEvent.dispatched == False,
+                    OutboxEvent.dead == False,
+                    OutboxEvent.next_attempt_at <= now
+                )\
+                .order_by(OutboxEvent.id)\
+                .limit(self.batch_size)\
+                .with_for_update(skip_locked=True)\
+                .all()
+
+            for event in events:
+                error = self._deliver(db, event)
+                if error is None:
+                    event.dispatched = True
+                    event.dispatched_at = datetime.utcnow()
+                    dispatched += 1
+                    continue
+
+                failures += 1
+                event.attempts += 1
+                event.last_error = error[:255]
+                if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    event.dead = True
+                    dead += 1
+                    logger.error("Outbox event %s is dead after %s attempts", event.id, event.attempts)
+                else:
+                    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** event.attempts, OUTBOX_BACKOFF_MAX_SECONDS)
+                    event.next_attempt_at = now + timedelta(seconds=delay)
+
+            db.commit()
+
+        self.metrics.record_batch(dispatched, failures, dead, time.perf_counter() - started)
+        return len(events)
+
+    # ---------------- RETENTION ----------------
+    def sweep(self, retention_seconds: float = OUTBOX_RETENTION_SECONDS) -> int:
+        # Dispatched events are never read again; their receipts only guard
+        # redelivery, which cannot happen once the event is gone. One short
+        # transaction per batch, like the archiver.
+        cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+        deleted = 0
+        while not self._stop.is_set():
+            with self.session_factory() as db:
+                ids = [row[0] for row in db.query(OutboxEvent.id)
+                       .filter(OutboxEvent.dispatched == True, OutboxEvent.dispatched_at < cutoff)
+                       .limit(self.batch_size)]
+                if ids:
+                    db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+            deleted += len(ids)
+            if len(ids) < self.batch_size:
+                break
+
+        with self.session_factory() as db:
+            db.query(OutboxReceipt).filter(OutboxReceipt.processed_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+
+        if deleted:
+            logger.info("Deleted %s dispatched outbox events older than %s", deleted, cutoff)
+        return deleted
+
+    def _deliver(self, db: Session, event: OutboxEvent) -> str | None:
+        data = {
+            "id": event.id,
+            "type": event.event_type,
+            "aggregate_id": event.aggregate_id,
+            "idempotency_key": event.idempotency_key,
+            "payload": json.loads(event.payload),
+            "created_at": event.created_at,
+        }
+
+        for name, fn in _handlers_for(event.event_type):
+            done = db.query(OutboxReceipt).filter(
+                OutboxReceipt.handler == name,
+                OutboxReceipt.idempotency_key == event.idempotency_key
+            ).first()
+            if done:
+                continue
+
+            # Savepoint per handler: a failure rolls back only its own writes
+            savepoint = db.begin_nested()
+            try:
+                fn(data, db)
+                db.add(OutboxReceipt(handler=name, idempotency_key=event.idempotency_key))
+                savepoint.commit()
+            except Exception as exc:
+                savepoint.rollback()
+                logger.warning("Outbox handler %s failed for event %s: %s", name, event.id, exc)
+                return f"{name}: {exc}"
+
+        return None
+
+    def stats(self, db: Session) -> dict:
+        pending = db.query(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at))\
+            .filter(OutboxEvent.dispatched == False, OutboxEvent.dead == False)\
+            .one()
+        dead_rows = db.query(OutboxEvent).filter(OutboxEvent.dead == True).count()
+
+        oldest = pending[1]
+        lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+        return {
+            "pending": pending[0],
+            "dead": dead_rows,
+            "lag_seconds": round(lag, 3),
+            "throughput_per_second": round(self.metrics.throughput(), 3),
+            "dispatched_total": self.metrics.dispatched,
+            "failures_total": self.metrics.failures,
+            "batches_total": self.metrics.batches,
+            "last_batch_ms": round(self.metrics.last_batch_ms, 3),
+            "running": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+dispatcher = OutboxDispatcher(SessionLocal)
+
+# Each branch shard has its own outbox table and its own dispatcher
+dispatchers = {
+    branch: dispatcher if branch == shards.default else OutboxDispatcher(shards.sessions[branch])
+    for branch in shards.branches()
+}
@@ -0,0 +1,394 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import fastapi.routing
+from starlette.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+
+from app.core.config import (
+    PROFILE_MAX_SECONDS, PROFILE_MIN_INTERVAL_MS, PROFILE_MAX_DEPTH,
+    PROFILE_REQUEST_ENABLED, PROFILE_REQUEST_BUDGET_MS, PROFILE_REQUEST_KEEP,
+)
+from app.core.jwt import SECRET_KEY, ALGORITHM
+
+
+# ================= SAMPLING PROFILER (WHOLE WORKER) =================
+# A background thread reads every thread's current stack through
+# sys._current_frames() at a fixed interval and counts identical stacks.
+# Nothing is hooked into the code being measured, so the cost is the sampler
+# thread's own CPU time, which is reported with every profile.
+
+# Leaf frames of threads that are parked (idle pool workers, the event loop
+# waiting in select, ...): dropped unless idle=True
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("thread.py", "_worker"),
+}
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_BACKEND_ROOT):
+        return filename[len(_BACKEND_ROOT) + 1:]
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+@functools.lru_cache(maxsize=16384)
+def _frame_label(code) -> str:
+    # One label per function (not per line) so samples inside it aggregate
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+
+    def __init__(self, max_depth: int = PROFILE_MAX_DEPTH):
+        self.max_depth = max_depth
+        # One profile at a time per worker
+        self._lock = threading.Lock()
+
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, interval: float, idle: bool = False) -> dict:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            return self._sample(seconds, interval, idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, idle: bool) -> dict:
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        deadline = started + seconds
+        next_tick = started
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            next_tick += interval
+
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+
+        elapsed = time.perf_counter() - started
+        sampler_cpu = time.thread_time() - cpu_started
+        return {
+            "stacks": stacks,
+            "samples": samples,
+            "seconds": round(elapsed, 3),
+            "interval_ms": round(interval * 1000, 3),
+            # CPU the sampler itself used, as a share of one core over the run
+            "overhead_pct": round(sampler_cpu / elapsed * 100, 3) if elapsed else 0.0,
+        }
+
+    async def profile(self, seconds: float, interval_ms: float, idle: bool = False) -> dict:
+        seconds = min(seconds, PROFILE_MAX_SECONDS)
+        interval = max(interval_ms, PROFILE_MIN_INTERVAL_MS) / 1000
+        # Own thread, outside the request threadpool
+        return await asyncio.to_thread(self.run, seconds, interval, idle)
+
+
+def collapsed(stacks: Counter) -> str:
+    # Brendan Gregg's folded format: flamegraph.pl, speedscope, inferno
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+sampling_profiler = SamplingProfiler()
+
+
+# ================= PER-REQUEST cPROFILE (OPT-IN) =================
+# An ADMIN request with "X-Profile: 1" runs its endpoint under cProfile. The
+# profile covers the endpoint function on the thread that runs it (cProfile
+# is per thread), not dependencies or response serialization. The response
+# carries X-Profile-Id; GET /admin/metrics/profile/requests/{id} returns it.
+#
+# Requests without the header pay one header lookup and one context variable
+# read. Profiled requests are charged their estimated profiler overhead
+# (calls made x cost per profiled call, measured once when profiling is
+# installed) against PROFILE_REQUEST_BUDGET_MS per minute; over budget, or
+# while another capture runs, the header is ignored and X-Profile says why.
+# The budget is checked before a capture starts and cProfile cannot be
+# stopped part way, so one heavy capture may overshoot it; the overshoot is
+# charged, and later captures are skipped until the minute's total is back
+# under budget. The bound therefore holds for the total over time, not for
+# each capture.
+
+_capture = contextvars.ContextVar("profile_capture", default=None)
+
+
+class Capture:
+
+    def __init__(self, capture_id: int, method: str, path: str):
+        self.id = capture_id
+        self.method = method
+        self.path = path
+        self.profile = cProfile.Profile()
+        self.status = None
+        self.wall_ms = 0.0
+        self.calls = 0
+        self.overhead_ms = 0.0
+        self.stats_text = ""
+        self.raw = b""
+
+    def run(self, call, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.profile.runcall(call, *args, **kwargs)
+        finally:
+            self.wall_ms += (time.perf_counter() - started) * 1000
+
+    async def run_async(self, call, *args, **kwargs):
+        # Coroutine endpoints: other tasks on the event loop between awaits are included
+        started = time.perf_counter()
+        self.profile.enable()
+        try:
+            return await call(*args, **kwargs)
+        finally:
+            self.profile.disable()
+            self.wall_ms += (time.perf_counter() - started) * 1000
+
+    def finish(self, cost_per_call_ns: float, limit: int = 40):
+        self.profile.create_stats()
+        if not self.profile.stats:
+            # Rejected before the endpoint ran (401, 403, 422 ...)
+            self.stats_text = "No calls recorded: the endpoint did not run\n"
+            self.profile = None
+            return
+
+        # (primitive calls, total calls, own time, cumulative time, callers) per function
+        self.calls = sum(entry[1] for entry in self.profile.stats.values())
+        self.overhead_ms = self.calls * cost_per_call_ns / 1e6
+
+        # Same format as cProfile -o / pstats.dump_stats (snakeviz, gprof2dot);
+        # taken first because pstats.Stats() empties the profile's stats
+        self.raw = marshal.dumps(self.profile.stats)
+
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        self.stats_text = out.getvalue()
+        self.profile = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "wall_ms": round(self.wall_ms, 3),
+            "calls": self.calls,
+            "overhead_ms": round(self.overhead_ms, 3),
+        }
+
+
+def _calibrate(calls: int = 20000) -> float:
+    # Extra nanoseconds cProfile adds to one Python function call here
+    def leaf():
+        return None
+
+    def loop():
+        for _ in range(calls):
+            leaf()
+
+    started = time.perf_counter_ns()
+    loop()
+    plain = time.perf_counter_ns() - started
+
+    profile = cProfile.Profile()
+    started = time.perf_counter_ns()
+    profile.runcall(loop)
+    profiled = time.perf_counter_ns() - started
+    return max(profiled - plain, 0) / calls
+
+
+class RequestProfiler:
+
+    def __init__(self, budget_ms_per_minute: float = PROFILE_REQUEST_BUDGET_MS, keep: int = PROFILE_REQUEST_KEEP):
+        self.budget_ms = budget_ms_per_minute
+        self.captures: deque = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = False
+        self._cost_per_call_ns = None
+        # (monotonic time, overhead ms) charged in the last minute
+        self._spent: deque = deque()
+
+        self.profiled = 0
+        self.skipped_busy = 0
+        self.skipped_budget = 0
+
+    def cost_per_call_ns(self) -> float:
+        if self._cost_per_call_ns is None:
+            self._cost_per_call_ns = _calibrate()
+        return self._cost_per_call_ns
+
+    def _spent_last_minute(self, now: float) -> float:
+        while self._spent and now - self._spent[0][0] > 60:
+            self._spent.popleft()
+        return sum(ms for _, ms in self._spent)
+
+    def begin(self, method: str, path: str):
+        # Returns (capture, None) or (None, reason it was skipped)
+        with self._lock:
+            if self._active:
+                self.skipped_busy += 1
+                return None, "busy"
+            if self._spent_last_minute(time.monotonic()) >= self.budget_ms:
+                self.skipped_budget += 1
+                return None, "over-budget"
+            self._active = True
+        return Capture(next(self._ids), method, path), None
+
+    def end(self, capture: Capture):
+        try:
+            capture.finish(self.cost_per_call_ns())
+        finally:
+            with self._lock:
+                self._active = False
+                self._spent.append((time.monotonic(), capture.overhead_ms))
+                self.captures.append(capture)
+                self.profiled += 1
+
+    def get(self, capture_id: int):
+        with self._lock:
+            return next((c for c in self.captures if c.id == capture_id), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            spent = self._spent_last_minute(time.monotonic())
+            recent = [c.to_dict() for c in reversed(self.captures)]
+        return {
+            "enabled": PROFILE_REQUEST_ENABLED,
+            "cost_per_call_ns": round(self._cost_per_call_ns or 0.0, 1),
+            "budget_ms_per_minute": self.budget_ms,
+            "spent_ms_last_minute": round(spent, 3),
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "skipped_budget": self.skipped_budget,
+            "recent": recent,
+        }
+
+
+request_profiler = RequestProfiler()
+
+
+def _is_admin(headers) -> bool:
+    # Signed role claim from the access token; no DB lookup on this path
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("role") == "ADMIN"
+
+
+class RequestProfileMiddleware:
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILE_REQUEST_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") not in (b"1", b"true") or not _is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+
+        capture, skipped = self.profiler.begin(scope["method"], scope["path"])
+        if capture is None:
+            await self.app(scope, receive, _with_headers(send, [(b"x-profile", f"skipped ({skipped})".encode())]))
+            return
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"x-profile-id", str(capture.id).encode()),
+                        (b"x-profile-wall-ms", f"{capture.wall_ms:.3f}".encode()),
+                    ],
+                }
+            await send(message)
+
+        token = _capture.set(capture)
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            _capture.reset(token)
+            self.profiler.end(capture)
+
+
+def _with_headers(send, extra: list):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": list(message.get("headers", [])) + extra}
+        await send(message)
+    return wrapped
+
+
+def install_request_profiling():
+    # FastAPI runs every endpoint through fastapi.routing.run_endpoint_function
+    # (kept separate upstream for profiling); wrap it once at startup
+    original = fastapi.routing.run_endpoint_function
+    if getattr(original, "__profiled__", False):
+        return
+
+    async def run_endpoint_function(*, dependant, values, is_coroutine):
+        capture = _capture.get()
+        if capture is None:
+            return await original(dependant=dependant, values=values, is_coroutine=is_coroutine)
+        if is_coroutine:
+            return await capture.run_async(dependant.call, **values)
+        # Sync endpoints: profile on the threadpool thread that runs them
+        return await run_in_threadpool(capture.run, dependant.call, **values)
+
+    run_endpoint_function.__profiled__ = True
+    fastapi.routing.run_endpoint_function = run_endpoint_function
+    # Calibrate now rather than on the event loop during the first capture
+    request_profiler.cost_per_call_ns()
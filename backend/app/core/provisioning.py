@@ -0,0 +1,213 @@
+import csv
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import PROVISIONING_CHUNK_SIZE, PROVISIONING_HASH_WORKERS
+from app.core.security import hash_password
+from app.database import shards
+from app.models.user import User
+from app.schemas.user_schema import UserRegister
+
+logger = logging.getLogger(__name__)
+
+# CSV roster import: rows are read, validated, de-duplicated, hashed and
+# inserted one chunk at a time, so memory stays flat for any roster size.
+# Required columns: username, email, password. Bulk import only creates USER
+# accounts.
+
+REQUIRED_COLUMNS = {"username", "email", "password"}
+
+
+def _row_error(line: int, row: dict, error: str) -> dict:
+    return {"line": line, "email": (row.get("email") or "").strip(), "error": error}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in exc.errors()
+    )
+
+
+class RosterImport:
+
+    def __init__(self, db: Session, executor, chunk_size: int = PROVISIONING_CHUNK_SIZE):
+        self.db = db
+        self.executor = executor
+        self.chunk_size = chunk_size
+
+        self.created = 0
+        self.errors: list[dict] = []
+        # Emails / usernames taken earlier in this roster
+        self._seen_emails: set[str] = set()
+        self._seen_usernames: set[str] = set()
+
+    # ---------------- VALIDATE + DE-DUPLICATE ----------------
+    def _validate(self, chunk: list) -> list:
+        valid = []
+        for line, row in chunk:
+            try:
+                user = UserRegister(
+                    username=(row.get("username") or "").strip(),
+                    email=(row.get("email") or "").strip(),
+                    password=row.get("password") or "",
+                )
+            except ValidationError as exc:
+                self.errors.append(_row_error(line, row, _validation_message(exc)))
+                continue
+
+            email = user.email.lower()
+            if email in self._seen_emails:
+                self.errors.append(_row_error(line, row, "Duplicate email in roster"))
+                continue
+            if user.username in self._seen_usernames:
+                self.errors.append(_row_error(line, row, "Duplicate username in roster"))
+                continue
+
+            self._seen_emails.add(email)
+            self._seen_usernames.add(user.username)
+            valid.append((line, row, user))
+        return valid
+
+    def _drop_existing(self, valid: list) -> list:
+        # Two IN queries per chunk instead of one lookup per row (plain IN so
+        # the unique indexes are used; MySQL's default collation ignores case)
+        emails = {u.email for _, _, u in valid}
+        usernames = {u.username for _, _, u in valid}
+        # Emails are unique across branches (login looks them up on every shard)
+        taken_emails = {
+            e.lower()
+            for found in shards.fan_out(
+                lambda db: [e for (e,) in db.query(User.email).filter(User.email.in_(emails))]
+            ).values()
+            for e in found
+        } if emails else set()
+        taken_usernames = {
+            n for (n,) in self.db.query(User.username).filter(User.username.in_(usernames))
+        } if usernames else set()
+
+        fresh = []
+        for line, row, user in valid:
+            if user.email.lower() in taken_emails:
+                self.errors.append(_row_error(line, row, "Email already registered"))
+            elif user.username in taken_usernames:
+                self.errors.append(_row_error(line, row, "Username already taken"))
+            else:
+                fresh.append((line, row, user))
+        return fresh
+
+    # ---------------- HASH + INSERT ----------------
+    def _insert(self, fresh: list):
+        hashes = list(self.executor.map(
+            hash_password,
+            [u.password for _, _, u in fresh],
+            chunksize=max(1, len(fresh) // 64)
+        ))
+        rows = [
+            {"username": u.username, "email": u.email, "password": h, "role": "USER"}
+            for (_, _, u), h in zip(fresh, hashes)
+        ]
+
+        try:
+            self.db.execute(insert(User), rows)
+            self.db.commit()
+            self.created += len(rows)
+            return
+        except IntegrityError:
+            # Someone registered one of these meanwhile: isolate the bad rows
+            self.db.rollback()
+
+        for (line, row, _), values in zip(fresh, rows):
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(User), [values])
+                self.created += 1
+            except IntegrityError:
+                self.errors.append(_row_error(line, row, "Email or username already registered"))
+        self.db.commit()
+
+    def process(self, chunk: list):
+        fresh = self._drop_existing(self._validate(chunk))
+        if fresh:
+            self._insert(fresh)
+
+    # ---------------- DRIVER ----------------
+    def run(self, stream) -> dict:
+        started = time.perf_counter()
+        reader = csv.DictReader(stream)
+
+        columns = {c.strip().lower() for c in (reader.fieldnames or [])}
+        missing = REQUIRED_COLUMNS - columns
+        if missing:
+            raise ValueError(f"Roster is missing columns: {', '.join(sorted(missing))}")
+
+        # Header is line 1; normalise header case / whitespace once
+        reader.fieldnames = [c.strip().lower() for c in reader.fieldnames]
+        rows = ((reader.line_num, row) for row in reader)
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.process(chunk)
+
+        elapsed = time.perf_counter() - started
+        logger.info("Roster import: %s created, %s rejected in %.1fs", self.created, len(self.errors), elapsed)
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "seconds": round(elapsed, 2),
+            "errors": self.errors,
+        }
+
+
+def hash_pool(workers: int = PROVISIONING_HASH_WORKERS) -> ProcessPoolExecutor:
+    # spawn: forking a server process with live threads and DB connections is unsafe
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# One pool per server process, started by the first import: each spawned
+# worker re-imports the app and opens engines for every shard, so imports
+# share it instead of paying that start-up each time. Stopped by the app's
+# shutdown hook.
+_pool_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+
+
+def shared_hash_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = hash_pool()
+        return _pool
+
+
+def shutdown_hash_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def import_roster(db: Session, stream, chunk_size: int = PROVISIONING_CHUNK_SIZE, executor=None) -> dict:
+    try:
+        return RosterImport(db, executor or shared_hash_pool(), chunk_size).run(stream)
+    except BrokenProcessPool:
+        # A hashing process died; the next import starts a fresh pool
+        if executor is None:
+            shutdown_hash_pool()
+        raise
@@ -0,0 +1,194 @@
+import contextvars
+import json
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.core.config import QUERY_BUDGET_MODE, QUERY_BUDGET_DEFAULT
+from app.database import shards
+
+logger = logging.getLogger(__name__)
+
+# Counts the SQL statements issued on behalf of one request (or one `with`
+# block in a test). A cursor hook on the engine bumps whichever counter is
+# active in the current context; sync handlers run in the threadpool with a
+# copy of the request context, so their queries land on the request's counter.
+# Background workers have no counter and are never counted.
+
+# The same statement this many times in one request is reported as a likely N+1
+REPEAT_THRESHOLD = 3
+
+_active = contextvars.ContextVar("query_counter", default=None)
+
+# Counters that see every thread (tests driving the app through TestClient,
+# which runs requests on its own thread and context)
+_global_lock = threading.Lock()
+_global_counters: list = []
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self.statements: list[str] = []
+        # Shard fan-out records from several threads at once
+        self._lock = threading.Lock()
+
+    def record(self, statement: str):
+        with self._lock:
+            self.count += 1
+            self.statements.append(statement)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> list[dict]:
+        return [
+            {"statement": statement[:200], "times": times}
+            for statement, times in Counter(self.statements).most_common()
+            if times >= threshold
+        ]
+
+    def report(self, budget: int, label: str = "block") -> str:
+        lines = [f"{label} ran {self.count} queries (budget {budget})"]
+        for r in self.repeated():
+            lines.append(f"  x{r['times']}  {r['statement']}")
+        return "\n".join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _active.get()
+    if counter is not None:
+        counter.record(statement)
+    if _global_counters:
+        with _global_lock:
+            for shared in _global_counters:
+                shared.record(statement)
+
+
+def install(engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+# ================= TEST HELPERS =================
+#     with max_queries(3, all_threads=True):
+#         client.get("/admin/dashboard/pending-issues", headers=admin)
+# all_threads also counts background workers, so keep them off in tests.
+
+@contextmanager
+def count_queries(all_threads: bool = False):
+    counter = QueryCounter()
+    if all_threads:
+        # Not also the context counter: threads that inherit this context
+        # (TestClient's portal) would record every statement twice
+        with _global_lock:
+            _global_counters.append(counter)
+        token = _active.set(None)
+    else:
+        token = _active.set(counter)
+    try:
+        yield counter
+    finally:
+        _active.reset(token)
+        if all_threads:
+            with _global_lock:
+                _global_counters.remove(counter)
+
+
+@contextmanager
+def max_queries(budget: int, all_threads: bool = False):
+    with count_queries(all_threads) as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(counter.report(budget))
+
+
+# ================= PER-ENDPOINT BUDGETS =================
+# Goes under the router decorator:
+#     @router.get("/dashboard/books")
+#     @query_budget(2)
+#     def book_inventory(...)
+# per_shard: extra queries for each branch shard an endpoint fans out to
+# (shards.fan_out workers count against the request that started them).
+
+def query_budget(budget: int, per_shard: int = 0):
+    def mark(endpoint):
+        endpoint.query_budget = budget
+        endpoint.query_budget_per_shard = per_shard
+        return endpoint
+    return mark
+
+
+def budget_for(endpoint) -> int:
+    per_shard = getattr(endpoint, "query_budget_per_shard", 0)
+    return getattr(endpoint, "query_budget", QUERY_BUDGET_DEFAULT) + per_shard * len(shards.engines)
+
+
+# ================= DEV-MODE GUARD =================
+
+class QueryBudgetMiddleware:
+    # QUERY_BUDGET_MODE:
+    #   log   -> X-Query-Count header on every response, warning when over budget
+    #   raise -> same, but an over-budget response is replaced by a 500 that
+    #            lists the repeated statements (dev / CI only)
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode not in ("log", "raise"):
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter()
+        token = _active.set(counter)
+        blocked = False
+
+        async def checked_send(message):
+            nonlocal blocked
+            if blocked:
+                return
+
+            if message["type"] == "http.response.start":
+                endpoint = scope.get("endpoint")
+                budget = budget_for(endpoint)
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(counter.count).encode()))
+
+                if endpoint is not None and counter.count > budget:
+                    label = f"{scope['method']} {scope['path']}"
+                    logger.warning("Query budget exceeded: %s", counter.report(budget, label))
+
+                    if self.mode == "raise":
+                        blocked = True
+                        body = json.dumps({
+                            "detail": "Query budget exceeded",
+                            "queries": counter.count,
+                            "budget": budget,
+                            "repeated": counter.repeated(),
+                        }).encode()
+                        await send({
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"x-query-count", str(counter.count).encode()),
+                            ],
+                        })
+                        await send({"type": "http.response.body", "body": body})
+                        return
+
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, checked_send)
+        finally:
+            _active.reset(token)
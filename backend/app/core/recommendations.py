@@ -0,0 +1,198 @@
+import logging
+
+import numpy as np
+from sqlalchemy import and_, insert, or_, select, union
+from sqlalchemy.orm import Session
+
+from app.core.config import RECOMMENDATION_TOP_K, RECOMMENDATION_MAX_BOOKS_PER_READER
+from app.core.outbox import register_handler
+from app.models.issue import Issue
+from app.models.issue_archive import IssueArchive
+from app.models.recommendation import ReaderBook, BookPair, BookNeighbor
+
+logger = logging.getLogger(__name__)
+
+# Item-item co-occurrence: two books are related by the number of distinct
+# readers who borrowed both. book_pairs holds the sparse upper triangle and
+# book_neighbors the top-K per book (score = shared readers, ties by id).
+
+
+# ================= INCREMENTAL UPDATES (OUTBOX) =================
+
+def _write_neighbors(db: Session, book_id: int, ranked: list):
+    db.query(BookNeighbor).filter(BookNeighbor.book_id == book_id).delete(synchronize_session=False)
+    for rank, (neighbor_id, score) in enumerate(ranked):
+        db.add(BookNeighbor(book_id=book_id, rank=rank, neighbor_id=neighbor_id, score=score))
+
+
+def _ranked(candidates, top_k: int) -> list:
+    return sorted(candidates, key=lambda c: (-c[1], c[0]))[:top_k]
+
+
+@register_handler("issue.approved", name="recommendations.co_borrow")
+def record_co_borrow(event: dict, db: Session, top_k: int = RECOMMENDATION_TOP_K):
+    payload = event["payload"]
+    user_id, book_id = payload["user_id"], payload["book_id"]
+
+    if db.query(ReaderBook).filter_by(user_id=user_id, book_id=book_id).first():
+        return
+
+    others = [row[0] for row in db.query(ReaderBook.book_id).filter(ReaderBook.user_id == user_id)]
+    db.add(ReaderBook(user_id=user_id, book_id=book_id))
+    if not others or len(others) >= RECOMMENDATION_MAX_BOOKS_PER_READER:
+        return
+
+    # One +1 per (book, other) pair, rows locked so concurrent readers cannot lose counts
+    pairs = {
+        (p.book_a, p.book_b): p
+        for p in db.query(BookPair).filter(or_(
+            and_(BookPair.book_a == book_id, BookPair.book_b.in_([o for o in others if o > book_id])),
+            and_(BookPair.book_b == book_id, BookPair.book_a.in_([o for o in others if o < book_id])),
+        )).with_for_update()
+    }
+    shared = {}
+    for other in others:
+        key = (min(book_id, other), max(book_id, other))
+        pair = pairs.get(key)
+        if pair is None:
+            pair = BookPair(book_a=key[0], book_b=key[1], readers=0)
+            db.add(pair)
+        pair.readers += 1
+        shared[other] = pair.readers
+    db.flush()
+
+    # The new book: rank its whole row of the matrix
+    row = db.query(BookPair.book_a, BookPair.book_b, BookPair.readers)\
+        .filter(or_(BookPair.book_a == book_id, BookPair.book_b == book_id))\
+        .all()
+    candidates = [(b if a == book_id else a, float(n)) for a, b, n in row]
+    _write_neighbors(db, book_id, _ranked(candidates, top_k))
+
+    # Every other book: only its score for book_id went up, so merging that
+    # one candidate into the stored top-K is exact
+    stored = {}
+    for n in db.query(BookNeighbor).filter(BookNeighbor.book_id.in_(others)):
+        stored.setdefault(n.book_id, []).append((n.neighbor_id, n.score))
+
+    for other, readers in shared.items():
+        current = stored.get(other, [])
+        merged = _ranked([c for c in current if c[0] != book_id] + [(book_id, float(readers))], top_k)
+        if merged != _ranked(current, top_k):
+            _write_neighbors(db, other, merged)
+
+
+# ================= BATCH REBUILD =================
+
+def co_occurrence(users: np.ndarray, books: np.ndarray, max_books: int = RECOMMENDATION_MAX_BOOKS_PER_READER,
+                  chunk: int = 5_000_000):
+    # users / books: distinct (reader, book) pairs. Returns the upper
+    # triangle as (book_a, book_b, readers) arrays.
+    empty = np.array([], dtype=np.int64)
+    if not len(books):
+        return empty, empty, empty
+
+    order = np.lexsort((books, users))
+    users, books = users[order], books[order]
+
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    counts = np.diff(np.r_[starts, len(users)])
+    keep = np.repeat(counts <= max_books, counts)
+    books = books[keep]
+    counts = counts[counts <= max_books]
+    if not len(books):
+        return empty, empty, empty
+
+    group_end = np.repeat(np.cumsum(counts), counts)
+    width = int(books.max()) + 1
+
+    keys = empty
+    totals = empty
+    buffer = []
+    buffered = 0
+
+    def merge():
+        nonlocal keys, totals, buffer, buffered
+        all_keys = np.concatenate(buffer + [keys])
+        weights = np.concatenate([np.ones(buffered, dtype=np.int64), totals])
+        keys, inverse = np.unique(all_keys, return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=weights, minlength=len(keys)).astype(np.int64)
+        buffer, buffered = [], 0
+
+    # Offset k pairs every book with the one k places later in the same
+    # reader's sorted list, so each reader's pairs come out with book_a < book_b
+    positions = np.arange(len(books))
+    for k in range(1, int(counts.max())):
+        positions = positions[positions + k < group_end[positions]]
+        if not len(positions):
+            break
+        buffer.append(books[positions] * width + books[positions + k])
+        buffered += len(positions)
+        if buffered >= chunk:
+            merge()
+    if buffered:
+        merge()
+
+    return keys // width, keys % width, totals
+
+
+def top_neighbors(book_a: np.ndarray, book_b: np.ndarray, readers: np.ndarray, top_k: int = RECOMMENDATION_TOP_K):
+    # Both directions of every pair, ranked per source book
+    source = np.concatenate([book_a, book_b])
+    neighbor = np.concatenate([book_b, book_a])
+    score = np.concatenate([readers, readers])
+
+    order = np.lexsort((neighbor, -score, source))
+    source, neighbor, score = source[order], neighbor[order], score[order]
+
+    starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]]) if len(source) else np.array([], dtype=np.int64)
+    rank = np.arange(len(source)) - np.repeat(starts, np.diff(np.r_[starts, len(source)]))
+    keep = rank < top_k
+    return source[keep], rank[keep], neighbor[keep], score[keep]
+
+
+def _bulk_insert(db: Session, model, columns: list[str], arrays: list, batch_size: int = 10000):
+    values = [a.tolist() for a in arrays]
+    for start in range(0, len(values[0]), batch_size):
+        rows = [dict(zip(columns, r)) for r in zip(*(v[start:start + batch_size] for v in values))]
+        db.execute(insert(model), rows)
+
+
+# Recomputes all three tables from issues + issues_archive. Events the
+# dispatcher handles while this runs may be counted twice; run it while the
+# dispatcher is paused or at a quiet hour.
+def rebuild_recommendations(db: Session, top_k: int = RECOMMENDATION_TOP_K) -> dict:
+    borrowed = union(
+        select(Issue.user_id, Issue.book_id).where(Issue.issue_approved == True),
+        select(IssueArchive.user_id, IssueArchive.book_id).where(IssueArchive.issue_approved == True),
+    )
+    rows = db.execute(borrowed).all()
+    users = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    books = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    del rows
+
+    book_a, book_b, readers = co_occurrence(users, books)
+    source, rank, neighbor, score = top_neighbors(book_a, book_b, readers, top_k)
+
+    db.query(BookNeighbor).delete(synchronize_session=False)
+    db.query(BookPair).delete(synchronize_session=False)
+    db.query(ReaderBook).delete(synchronize_session=False)
+
+    _bulk_insert(db, ReaderBook, ["user_id", "book_id"], [users, books])
+    _bulk_insert(db, BookPair, ["book_a", "book_b", "readers"], [book_a, book_b, readers])
+    _bulk_insert(db, BookNeighbor, ["book_id", "rank", "neighbor_id", "score"],
+                 [source, rank, neighbor, score.astype(np.float64)])
+    db.commit()
+
+    counts = {"reader_books": len(users), "book_pairs": len(book_a), "book_neighbors": len(source)}
+    logger.info("Rebuilt recommendations: %s", counts)
+    return counts
+
+
+# ================= SERVING =================
+
+def neighbors_of(db: Session, book_id: int, limit: int = RECOMMENDATION_TOP_K) -> list:
+    return db.query(BookNeighbor.neighbor_id, BookNeighbor.score)\
+        .filter(BookNeighbor.book_id == book_id)\
+        .order_by(BookNeighbor.rank)\
+        .limit(limit)\
+        .all()
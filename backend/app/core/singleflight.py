@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+# Collapses identical concurrent calls into one execution: the first caller
+# for a key runs the function, callers arriving while it is in flight wait
+# and get the same result (or exception). Nothing is cached afterwards, so
+# results must be treated as read-only by every waiter.
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self._async_calls: dict = {}
+
+        self.calls = 0
+        self.executions = 0
+        self.errors = 0
+
+    # ---------------- SYNC (threadpool handlers) ----------------
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    # ---------------- ASYNC (event loop handlers) ----------------
+    async def do_async(self, key, fn, *args, **kwargs):
+        # Futures belong to one loop, so async calls are grouped per loop
+        loop_key = (id(asyncio.get_running_loop()), key)
+
+        with self._lock:
+            self.calls += 1
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = asyncio.get_running_loop().create_future()
+                self._async_calls[loop_key] = future
+                self.executions += 1
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a leader-only failure does not log a warning
+            future.exception()
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._async_calls.pop(loop_key, None)
+
+    # ---------------- METRICS ----------------
+    def stats(self) -> dict:
+        with self._lock:
+            coalesced = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else 0.0,
+                "errors": self.errors,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
+
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def stats() -> dict:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
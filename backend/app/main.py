@@ -1,14 +1,62 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
-from app.models import user, book, issue, category
+from app.database import Base, SessionLocal, shards
+from app.models import user, book, issue, category, catalog_change, hold, outbox, analytics, issue_archive, book_copy, idempotency, fine_policy, recommendation, kiosk, notification
 from app.routes import auth_routes, book_routes, issue_routes
 from app.routes import admin_routes, category_routes
-from app.routes import user_routes
+from app.routes import user_routes, hold_routes, metrics_routes, analytics_routes, fine_routes, sync_routes
+from app.core.config import OUTBOX_DISPATCHER_ENABLED, ARCHIVE_ENABLED, IDEMPOTENCY_BACKEND, ADMISSION_ENABLED, KIOSK_MODE, NOTIFY_ENABLED
+from app.core.outbox import dispatchers
+from app.core.archive import archive_worker
+from app.core.notifications import notification_worker
+from app.core.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore, DatabaseIdempotencyStore
+from app.core.compression import CompressionMiddleware
+from app.core.admission import AdmissionMiddleware
+from app.core.kiosk import KioskWriteGuard, kiosk_worker
+from app.core.query_budget import QueryBudgetMiddleware, install as install_query_counter
+from app.core.profiling import RequestProfileMiddleware, install_request_profiling
+from app.core.provisioning import shutdown_hash_pool
 
 app = FastAPI(title="Library Management System")
 
+# =======================
+# QUERY BUDGETS (innermost, so it sees the matched endpoint; no-op unless QUERY_BUDGET_MODE is set)
+# =======================
+for shard_engine in shards.engines.values():
+    install_query_counter(shard_engine)
+app.add_middleware(QueryBudgetMiddleware)
+
+# =======================
+# PER-REQUEST PROFILING (ADMIN requests with "X-Profile: 1" only)
+# =======================
+app.add_middleware(RequestProfileMiddleware)
+
+# =======================
+# IDEMPOTENCY KEYS (inside CORS so replays get CORS headers)
+# =======================
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=DatabaseIdempotencyStore(SessionLocal) if IDEMPOTENCY_BACKEND == "database" else MemoryIdempotencyStore(),
+)
+
+# =======================
+# COMPRESSION + ETAGS (outside idempotency, so stored replays are compressed per client)
+# =======================
+app.add_middleware(CompressionMiddleware)
+
+# =======================
+# ADMISSION CONTROL (just inside CORS: shed requests do no other work but still get CORS headers)
+# =======================
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# =======================
+# KIOSK MODE (offline branch replica: only issue / return transitions are writable)
+# =======================
+if KIOSK_MODE:
+    app.add_middleware(KioskWriteGuard)
+
 # =======================
 # CORS CONFIGURATION
 # =======================
@@ -25,7 +73,34 @@ app.add_middleware(
 # =======================
 # CREATE DATABASE TABLES
 # =======================
-Base.metadata.create_all(bind=engine)
+# (on every branch shard)
+for shard_engine in shards.engines.values():
+    Base.metadata.create_all(bind=shard_engine)
+
+# =======================
+# BACKGROUND WORKERS
+# =======================
+@app.on_event("startup")
+def start_background_workers():
+    if OUTBOX_DISPATCHER_ENABLED:
+        for dispatcher in dispatchers.values():
+            dispatcher.start()
+    if ARCHIVE_ENABLED and not KIOSK_MODE:
+        archive_worker.start()
+    if NOTIFY_ENABLED and not KIOSK_MODE:
+        notification_worker.start()
+    if KIOSK_MODE:
+        kiosk_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    for dispatcher in dispatchers.values():
+        dispatcher.stop()
+    archive_worker.stop()
+    notification_worker.stop()
+    kiosk_worker.stop()
+    shutdown_hash_pool()
 
 # =======================
 # ROOT ENDPOINT
@@ -42,4 +117,12 @@ app.include_router(book_routes.router)
 app.include_router(issue_routes.router)
 app.include_router(admin_routes.router)
 app.include_router(category_routes.router,prefix="/categories")
-app.include_router(user_routes.router)
\ No newline at end of file
+app.include_router(user_routes.router)
+app.include_router(hold_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(analytics_routes.router)
+app.include_router(fine_routes.router)
+app.include_router(sync_routes.router)
+
+# Endpoints run under cProfile when the request opted in (see app.core.profiling)
+install_request_profiling()
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, Date, Float
+from app.database import Base
+
+# Daily circulation rollups, one row per (day, key) with activity.
+# Borrows are counted on the issue date, returns on the return date.
+# No foreign keys: history outlives deleted books and users.
+
+
+class DailyBookStat(Base):
+    __tablename__ = "daily_book_stats"
+
+    day = Column(Date, primary_key=True)
+    book_id = Column(Integer, primary_key=True)
+
+    borrows = Column(Integer, default=0)
+    returns = Column(Integer, default=0)
+    loan_days = Column(Integer, default=0)
+    fines = Column(Float, default=0)
+    overdue_returns = Column(Integer, default=0)
+
+
+class DailyCategoryStat(Base):
+    __tablename__ = "daily_category_stats"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+
+    borrows = Column(Integer, default=0)
+    returns = Column(Integer, default=0)
+    loan_days = Column(Integer, default=0)
+    fines = Column(Float, default=0)
+    overdue_returns = Column(Integer, default=0)
+
+
+class DailyUserStat(Base):
+    __tablename__ = "daily_user_stats"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+
+    borrows = Column(Integer, default=0)
+    returns = Column(Integer, default=0)
+    fines = Column(Float, default=0)
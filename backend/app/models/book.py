@@ -1,6 +1,6 @@
-from sqlalchemy import Column, ForeignKey,Integer,String
+from sqlalchemy import Column, ForeignKey,Integer,String,BigInteger
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, branch_default, next_row_version
 from app.models.category import Category
 
 class Book(Base):
@@ -16,4 +16,10 @@ class Book(Base):
     available_copies = Column(Integer,nullable=False)
     
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
-    category = relationship("Category")
\ No newline at end of file
+    category = relationship("Category")
+
+    # Owning library branch (= the shard the row lives in)
+    branch = Column(String(32), nullable=False, default=branch_default, index=True)
+
+    # Bumped on every write; kiosks pull rows changed since their cursor
+    row_version = Column(BigInteger, nullable=False, default=next_row_version, onupdate=next_row_version, index=True)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class BookCopy(Base):
+    __tablename__ = "book_copies"
+
+    # Allocation picks the first free copy of a book (optionally per branch)
+    __table_args__ = (
+        Index("ix_book_copies_free", "book_id", "available", "branch", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+
+    barcode = Column(String(50), unique=True, nullable=False)
+    branch = Column(String(50), nullable=False, default="main")
+    condition = Column(String(20), nullable=False, default="GOOD")
+
+    available = Column(Boolean, default=True)
+
+    book = relationship("Book")
+
+
+class BookAvailability(Base):
+    __tablename__ = "book_availability"
+
+    # Maintained in the same transaction as every copy allocation / release,
+    # so availability per branch is a primary-key read
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    branch = Column(String(50), primary_key=True)
+
+    total = Column(Integer, nullable=False, default=0)
+    available = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class CatalogChange(Base):
+    __tablename__ = "catalog_changes"
+
+    id = Column(Integer, primary_key=True)
+
+    # "book" or "category"
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, default=False)
+
+    # Entries older than CATALOG_CHANGE_RETENTION_SECONDS are pruned (deletions are kept)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+def record_change(db, entity: str, entity_id: int, deleted: bool = False):
+    # Added to the caller's session so it commits with the change itself
+    db.add(CatalogChange(entity=entity, entity_id=entity_id, deleted=deleted))
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String
-from app.database import Base
+from sqlalchemy import Column, Integer, String, BigInteger
+from app.database import Base, next_row_version
 
 class Category(Base):
     __tablename__ = "categories"
@@ -7,4 +7,6 @@ class Category(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False)
     description = Column(String(255),nullable=True)
-    
\ No newline at end of file
+
+    # Bumped on every write; kiosks pull rows changed since their cursor
+    row_version = Column(BigInteger, nullable=False, default=next_row_version, onupdate=next_row_version, index=True)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Date, Float, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class FinePolicy(Base):
+    __tablename__ = "fine_policies"
+
+    id = Column(Integer, primary_key=True)
+
+    # NULL = library-wide default for categories without their own policy
+    category_id = Column(Integer, ForeignKey("categories.id"), unique=True, nullable=True)
+
+    loan_days = Column(Integer, nullable=False, default=7)
+    grace_days = Column(Integer, nullable=False, default=0)
+    daily_rate = Column(Float, nullable=False, default=10)
+    max_fine = Column(Float, nullable=True)
+
+    # Library holidays are not charged
+    skip_holidays = Column(Boolean, nullable=False, default=True)
+
+    category = relationship("Category")
+
+
+class Holiday(Base):
+    __tablename__ = "holidays"
+
+    day = Column(Date, primary_key=True)
+    name = Column(String(100), nullable=True)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Boolean, Index
+from sqlalchemy.orm import relationship
+from datetime import date
+from app.database import Base
+
+
+class Hold(Base):
+    __tablename__ = "holds"
+
+    # Next-in-line and queue positions are range reads on this index
+    __table_args__ = (
+        Index("ix_holds_book_queue", "book_id", "active", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+
+    hold_date = Column(Date, default=date.today)
+
+    active = Column(Boolean, default=True)
+    promoted = Column(Boolean, default=False)
+    cancelled = Column(Boolean, default=False)
+
+    # Issue request created when this hold reached the front of the queue.
+    # No foreign key: closed issues move to issues_archive with the same id.
+    issue_id = Column(Integer, nullable=True)
+
+    user = relationship("User")
+    book = relationship("Book")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime, Index
+from app.database import Base
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_records"
+
+    __table_args__ = (
+        Index("ix_idempotency_expires", "expires_at"),
+    )
+
+    # sha256 of (credentials, method, path, Idempotency-Key)
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+
+    # "in_progress" while the first request runs (no response yet), then "done"
+    state = Column(String(16), nullable=False, default="done")
+    status = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+
+    expires_at = Column(DateTime, nullable=False)
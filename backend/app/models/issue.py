@@ -1,16 +1,25 @@
-from sqlalchemy import Column,Integer,String,Date,ForeignKey,Float,Boolean
+from sqlalchemy import Column,Integer,String,Date,ForeignKey,Float,Boolean,Index,BigInteger
 from sqlalchemy.orm import relationship
 from datetime import date
-from app.database import Base
+from app.database import Base, branch_default, next_row_version
 
 
 class Issue(Base):
     __tablename__ = "issues"
 
+    # Open loans (issued / overdue queries) and the admin request queues
+    __table_args__ = (
+        Index("ix_issues_open_loans", "issue_approved", "return_date", "issue_date"),
+        Index("ix_issues_pending", "issue_requested", "return_requested"),
+    )
+
     id = Column(Integer,primary_key=True)
     user_id = Column(Integer,ForeignKey("users.id"))
     book_id = Column(Integer,ForeignKey("books.id"))
 
+    # Physical copy handed out (NULL for books without per-copy tracking)
+    copy_id = Column(Integer,ForeignKey("book_copies.id"),nullable=True)
+
     issue_date = Column(Date,nullable=True)
     return_date = Column(Date,nullable=True)
 
@@ -27,6 +36,15 @@ class Issue(Base):
 
     return_remarks = Column(String(255),nullable=True)
 
+    # Set when the issue is rejected or its return approved (archival horizon)
+    closed_on = Column(Date,nullable=True)
+
+    # Owning library branch (= the shard the row lives in)
+    branch = Column(String(32), nullable=False, default=branch_default, index=True)
+
+    # Bumped on every write; kiosks pull rows changed since their cursor
+    row_version = Column(BigInteger, nullable=False, default=next_row_version, onupdate=next_row_version, index=True)
+
     user = relationship("User")
     book = relationship("Book")
     
\ No newline at end of file
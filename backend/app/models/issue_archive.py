@@ -0,0 +1,41 @@
+from sqlalchemy import Column,Integer,String,Date,DateTime,ForeignKey,Float,Boolean,Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+
+class IssueArchive(Base):
+    # Closed issues moved out of the hot `issues` table; same columns and ids.
+    # On MySQL this table can be RANGE-partitioned on closed_on by year.
+    __tablename__ = "issues_archive"
+
+    __table_args__ = (
+        Index("ix_issues_archive_user_date", "user_id", "issue_date"),
+        Index("ix_issues_archive_date", "issue_date"),
+    )
+
+    id = Column(Integer,primary_key=True,autoincrement=False)
+    user_id = Column(Integer,ForeignKey("users.id"))
+    book_id = Column(Integer,ForeignKey("books.id"))
+    copy_id = Column(Integer,nullable=True)
+
+    issue_date = Column(Date,nullable=True)
+    return_date = Column(Date,nullable=True)
+
+    issue_requested = Column(Boolean,default=False)
+    issue_approved = Column(Boolean,default=False)
+    issue_rejected = Column(Boolean,default=False)
+
+    return_requested = Column(Boolean,default=False)
+    return_approved = Column(Boolean,default=False)
+    return_rejected = Column(Boolean,default=False)
+
+    fine = Column(Float,default=0)
+
+    return_remarks = Column(String(255),nullable=True)
+
+    closed_on = Column(Date,nullable=True)
+    archived_at = Column(DateTime,default=datetime.utcnow)
+
+    user = relationship("User")
+    book = relationship("Book")
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+
+# ================= CENTRAL SIDE =================
+
+class SyncReceipt(Base):
+    __tablename__ = "sync_receipts"
+
+    # One row per kiosk journal entry already applied, so a re-sent batch is a no-op
+    key = Column(String(64), primary_key=True)
+    issue_id = Column(Integer, nullable=True)
+    status = Column(String(20), nullable=False)
+    detail = Column(String(255), nullable=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
+# ================= KIOSK SIDE =================
+
+class KioskJournal(Base):
+    __tablename__ = "kiosk_journal"
+
+    # Push reads pending entries in id (= local commit) order
+    __table_args__ = (
+        Index("ix_kiosk_journal_pending", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    # Same key as the local outbox event; the central receipt key
+    key = Column(String(64), unique=True, nullable=False)
+
+    # issue.requested / issue.approved / issue.rejected / return.*
+    op = Column(String(50), nullable=False)
+    issue_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # pending -> applied / conflict / rejected once central has answered
+    status = Column(String(20), default="pending", nullable=False)
+    detail = Column(String(255), nullable=True)
+    synced_at = Column(DateTime, nullable=True)
+
+
+class KioskSyncState(Base):
+    __tablename__ = "kiosk_sync_state"
+
+    # Pull cursors ("books" -> "row_version:id") and last sync status
+    name = Column(String(50), primary_key=True)
+    value = Column(String(255), nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+
+class NotificationLog(Base):
+    __tablename__ = "notification_log"
+
+    # One notice per (loan, kind, stage): stage 0 for "due_soon", and the
+    # n-th repeat period for "overdue". Claimed before sending, so two
+    # workers never send the same notice.
+    __table_args__ = (
+        UniqueConstraint("issue_id", "kind", "stage", name="uq_notification_once"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    issue_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+
+    kind = Column(String(20), nullable=False)
+    stage = Column(Integer, nullable=False, default=0)
+    due_date = Column(Date, nullable=False)
+
+    # claimed -> sent (failed claims are removed and retried next run)
+    status = Column(String(20), nullable=False, default="claimed")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
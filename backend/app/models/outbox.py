@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
+from datetime import datetime
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    # Dispatcher scans pending rows in id order once they are due
+    __table_args__ = (
+        Index("ix_outbox_pending", "dispatched", "next_attempt_at", "id"),
+        # Retention sweep
+        Index("ix_outbox_dispatched_at", "dispatched", "dispatched_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    aggregate_id = Column(Integer, nullable=True)
+    payload = Column(Text, nullable=False)
+
+    idempotency_key = Column(String(64), unique=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    dispatched = Column(Boolean, default=False)
+    dispatched_at = Column(DateTime, nullable=True)
+
+    # Retry bookkeeping; dead rows stop being retried
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String(255), nullable=True)
+    dead = Column(Boolean, default=False)
+
+
+class OutboxReceipt(Base):
+    __tablename__ = "outbox_receipts"
+
+    # One row per (handler, event) that completed, so redelivery skips it
+    handler = Column(String(100), primary_key=True)
+    idempotency_key = Column(String(64), primary_key=True)
+    processed_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, Float
+from app.database import Base
+
+# Co-borrowing data for "readers who borrowed this also borrowed".
+# No foreign keys: history outlives deleted books and users.
+
+
+class ReaderBook(Base):
+    # Distinct (reader, book) pairs seen so far; re-borrowing does not count twice
+    __tablename__ = "reader_books"
+
+    user_id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, primary_key=True)
+
+
+class BookPair(Base):
+    # Sparse item-item co-occurrence matrix, upper triangle only (book_a < book_b)
+    __tablename__ = "book_pairs"
+
+    book_a = Column(Integer, primary_key=True)
+    book_b = Column(Integer, primary_key=True)
+    readers = Column(Integer, nullable=False, default=0)
+
+
+class BookNeighbor(Base):
+    # Precomputed top-K per book; serving is one primary-key range read
+    __tablename__ = "book_neighbors"
+
+    book_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
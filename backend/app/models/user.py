@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Enum
-from app.database import Base
+from sqlalchemy import Column, Integer, String, Enum, BigInteger
+from app.database import Base, branch_default, next_row_version
 import enum
 
 
@@ -19,4 +19,10 @@ class User(Base):
     password = Column(String(255),nullable=False)
 
     username = Column(String(50),unique=True,nullable=False)
-    role = Column(Enum(RoleEnum),default=RoleEnum.USER)
\ No newline at end of file
+    role = Column(Enum(RoleEnum),default=RoleEnum.USER)
+
+    # Owning library branch (= the shard the row lives in)
+    branch = Column(String(32), nullable=False, default=branch_default, index=True)
+
+    # Bumped on every write; kiosks pull rows changed since their cursor
+    row_version = Column(BigInteger, nullable=False, default=next_row_version, onupdate=next_row_version, index=True)
\ No newline at end of file
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException,status
-from sqlalchemy.orm import Session
+import io
+import json
+
+from fastapi import APIRouter, Depends, HTTPException,status, Request, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session, joinedload
 #from datetime import date,timedelta
 
 
-from app.database import get_db
+from app.database import get_db, shards, branch_from_token
 from app.models.issue import Issue
 from app.models.book import Book
 from app.models.user import User
 #from app. schemas.issue_schema import IssueAdminResponse, IssueCreate, IssueResponse, IssueReturnResponse
-from app.core.security import get_current_user 
+from app.core.security import get_current_user, oauth2_scheme, user_from_token
+from app.core.events import broker
+from app.core.config import EVENT_KEEPALIVE_SECONDS
+from app.core.cache import cache, invalidate_dashboards
+from app.core.provisioning import import_roster
+from app.core.query_budget import query_budget
+from app.schemas.issue_schema import IssueAdminResponse
+from app.schemas.book_schema import BookResponse
+from app.core.config import PROVISIONING_CHUNK_SIZE
 
 router = APIRouter(
     prefix = "/admin",
@@ -18,6 +31,8 @@ router = APIRouter(
 # ==== DASHBOARD SUMMARY (COUNTS)  =================
 
 @router.get("/dashboard/summary")
+# Auth + one summary query per shard (on a cache miss)
+@query_budget(1, per_shard=1)
 def admin_dashboard_summary(
     db:Session = Depends(get_db),
     current_user:User = Depends(get_current_user)
@@ -28,39 +43,49 @@ def admin_dashboard_summary(
             detail="Only ADMIN allowed"
         )
     
-    total_users = db.query(User).count()
-    total_books = db.query(Book).count()
+    # Shared by all workers; issue / book / user writes invalidate it
+    return cache.get_or_load("admin_dashboard", "summary", _all_branches_summary)
 
-    issued_books = db.query(Issue).filter(
-        Issue.issue_approved == True,
-        Issue.return_date == None
-    ).count()
 
+SUMMARY_FIELDS = ("total_users", "total_books", "issued_books", "pending_issue_requests", "pending_return_approved")
 
-    pending_issue_requests = db.query(Issue).filter(
-        Issue.issue_requested == True,
-        Issue.issue_approved == False,
-        Issue.issue_rejected == False
-    ).count()
 
-    pending_return_requests = db.query(Issue).filter(
-        Issue.return_requested == True,
-        Issue.return_approved == False
-    ).count()
+def _all_branches_summary():
+    # Same counts on every shard in parallel, then summed; per-branch figures under "branches"
+    per_branch = shards.fan_out(_dashboard_summary)
+    summary = {field: sum(counts[field] for counts in per_branch.values()) for field in SUMMARY_FIELDS}
+    summary["branches"] = per_branch
+    return summary
+
+
+def _dashboard_summary(db: Session):
+    # All five counts in one round trip (each is still an indexed COUNT)
+    def count(model, *criteria):
+        return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+    row = db.execute(select(
+        count(User).label("total_users"),
+        count(Book).label("total_books"),
+        count(Issue, Issue.issue_approved == True, Issue.return_date == None).label("issued_books"),
+        count(Issue, Issue.issue_requested == True, Issue.issue_approved == False,
+              Issue.issue_rejected == False).label("pending_issue_requests"),
+        count(Issue, Issue.return_requested == True, Issue.return_approved == False).label("pending_return_approved"),
+    )).one()
 
     return {
-        "total_users" : total_users,
-        "total_books" : total_books,
-        "issued_books" : issued_books,
-        "pending_issue_requests" : pending_issue_requests,
-        "pending_return_approved" : pending_return_requests
+        "total_users" : row.total_users,
+        "total_books" : row.total_books,
+        "issued_books" : row.issued_books,
+        "pending_issue_requests" : row.pending_issue_requests,
+        "pending_return_approved" : row.pending_return_approved
     }
 
 
 
 #  PENDING ISSUE REQUESTS  =================
 
-@router.get("/dashboard/pending-issues")
+@router.get("/dashboard/pending-issues", response_model=list[IssueAdminResponse])
+@query_budget(2)
 def pending_issue_requests(
     db:Session = Depends(get_db),
     current_user : User = Depends(get_current_user)
@@ -71,7 +96,10 @@ def pending_issue_requests(
             detail="Only ADMIN allowed"
         )
     
-    return db.query(Issue).filter(
+    # user / book come back in the same query instead of one lazy load per row
+    return db.query(Issue)\
+    .options(joinedload(Issue.user), joinedload(Issue.book))\
+    .filter(
         Issue.issue_requested == True,
         Issue.issue_approved == False,
         Issue.issue_rejected == False
@@ -80,7 +108,8 @@ def pending_issue_requests(
 
 #   PENDING RETURN REQUESTS ====================
 
-@router.get("/dashboard/pending-returns")
+@router.get("/dashboard/pending-returns", response_model=list[IssueAdminResponse])
+@query_budget(2)
 def pending_return_requests(
     db : Session = Depends(get_db),
     current_user : User = Depends(get_current_user)
@@ -91,7 +120,9 @@ def pending_return_requests(
             detail="Only ADMIN allowed"
         )
     
-    return db.query(Issue).filter(
+    return db.query(Issue)\
+    .options(joinedload(Issue.user), joinedload(Issue.book))\
+    .filter(
         Issue.return_requested == True,
         Issue.return_approved == False
     ).all()
@@ -100,7 +131,8 @@ def pending_return_requests(
 
 #  BOOK INVENTORY OVERVIEW ==============
 
-@router.get("/dashboard/books")
+@router.get("/dashboard/books", response_model=list[BookResponse])
+@query_budget(2)
 def book_inventory(
         db : Session = Depends(get_db),
         current_user : User = Depends(get_current_user)
@@ -111,4 +143,81 @@ def book_inventory(
             detail="Only ADMIN allowed"
         )
     
-    return db.query(Book).all()
+    return db.query(Book).options(joinedload(Book.category)).all()
+
+
+#  BULK USER IMPORT (CSV ROSTER) ==============
+# Columns: username,email,password. Rows are streamed in chunks; bad rows are
+# reported with their line number and the rest are still created.
+
+@router.post("/users/import")
+def import_users(
+        file : UploadFile = File(...),
+        chunk_size : int = Query(PROVISIONING_CHUNK_SIZE, ge=1, le=10000),
+        db : Session = Depends(get_db),
+        current_user : User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ADMIN allowed"
+        )
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = import_roster(db, stream, chunk_size=chunk_size)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if result["created"]:
+        broker.publish("users.imported", {"created": result["created"]}, {"total_users": result["created"]})
+        invalidate_dashboards()
+    return result
+
+
+#  LIVE EVENT STREAM (SSE) ==============
+# One initial load of the summary / queues, then apply the streamed deltas.
+
+def require_stream_admin(token: str = Depends(oauth2_scheme)):
+    # Sync dependency, so the lookup runs in the threadpool instead of on the
+    # event loop. Short-lived session: the stream must not pin a pooled connection.
+    with shards.session(branch_from_token(token)) as db:
+        role = user_from_token(token, db).role
+
+    if role != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ADMIN allowed"
+        )
+
+
+@router.get("/events", dependencies=[Depends(require_stream_admin)])
+async def admin_event_stream(request : Request):
+
+    async def stream():
+        sub = broker.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await sub.get(EVENT_KEEPALIVE_SECONDS)
+
+                if sub.dropped:
+                    # Buffer overflowed: deltas are no longer reliable
+                    sub.dropped = 0
+                    sub.buffer.clear()
+                    yield "event: resync\ndata: {}\n\n"
+                    continue
+
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,223 @@
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.models.analytics import DailyBookStat, DailyCategoryStat, DailyUserStat
+from app.dependencies import require_admin
+from app.core.analytics import frames, group_sum, rebuild_rollups
+from app.core.catalog import catalog_for
+from app.core.recommendations import rebuild_recommendations
+
+router = APIRouter(
+    prefix="/admin/analytics",
+    tags=["Analytics"]
+)
+
+
+def _range(start: date | None, end: date | None):
+    end = end or date.today()
+    start = start or end - timedelta(days=365)
+    return start, end
+
+
+def _category_name(catalog, category_id: int):
+    category = catalog.categories.get(category_id)
+    return category.name if category else None
+
+
+# -------- MOST BORROWED TITLES --------
+@router.get("/top-books")
+def top_books(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyBookStat, ["book_id", "borrows"], start, end)
+
+    (book_ids,), sums = group_sum([frame["book_id"].astype(np.int64)], {"borrows": frame["borrows"]})
+    top = np.argsort(-sums["borrows"], kind="stable")[:limit]
+
+    catalog = catalog_for(db)
+    catalog.sync(db)
+    result = []
+    for i in top:
+        book = catalog.books.get(int(book_ids[i]))
+        result.append({
+            "book_id": int(book_ids[i]),
+            "title": book.title if book else None,
+            "borrows": int(sums["borrows"][i]),
+        })
+    return result
+
+
+# -------- TOP READERS --------
+@router.get("/top-readers")
+def top_readers(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyUserStat, ["user_id", "borrows", "fines"], start, end)
+
+    (user_ids,), sums = group_sum(
+        [frame["user_id"].astype(np.int64)],
+        {"borrows": frame["borrows"], "fines": frame["fines"]}
+    )
+    top = np.argsort(-sums["borrows"], kind="stable")[:limit]
+
+    return [
+        {
+            "user_id": int(user_ids[i]),
+            "borrows": int(sums["borrows"][i]),
+            "fines": float(sums["fines"][i]),
+        }
+        for i in top
+    ]
+
+
+# -------- BORROWS PER CATEGORY PER DAY --------
+@router.get("/category-daily")
+def category_daily(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyCategoryStat, ["day", "category_id", "borrows"], start, end)
+
+    catalog = catalog_for(db)
+    catalog.sync(db)
+    order = np.lexsort((frame["category_id"], frame["day"]))
+    days = frame["day"][order].astype(str)
+
+    return [
+        {
+            "day": days[n],
+            "category_id": int(frame["category_id"][i]),
+            "category": _category_name(catalog, int(frame["category_id"][i])),
+            "borrows": int(frame["borrows"][i]),
+        }
+        for n, i in enumerate(order)
+        if frame["borrows"][i]
+    ]
+
+
+# -------- AVERAGE LOAN DURATION --------
+@router.get("/loan-duration")
+def loan_duration(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyCategoryStat, ["category_id", "returns", "loan_days"], start, end)
+
+    (category_ids,), sums = group_sum(
+        [frame["category_id"].astype(np.int64)],
+        {"returns": frame["returns"], "loan_days": frame["loan_days"]}
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        averages = np.where(sums["returns"] > 0, sums["loan_days"] / sums["returns"], 0.0)
+
+    total_returns = frame["returns"].sum()
+    overall = frame["loan_days"].sum() / total_returns if total_returns else 0.0
+
+    catalog = catalog_for(db)
+    catalog.sync(db)
+    return {
+        "average_days": round(float(overall), 2),
+        "by_category": [
+            {
+                "category_id": int(category_ids[i]),
+                "category": _category_name(catalog, int(category_ids[i])),
+                "returns": int(sums["returns"][i]),
+                "average_days": round(float(averages[i]), 2),
+            }
+            for i in range(len(category_ids))
+        ],
+    }
+
+
+# -------- FINE REVENUE BY MONTH --------
+@router.get("/fine-revenue")
+def fine_revenue(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyCategoryStat, ["day", "fines"], start, end)
+
+    months = frame["day"].astype("datetime64[M]")
+    (month_keys,), sums = group_sum([months.astype(np.int64)], {"fines": frame["fines"]})
+
+    labels = month_keys.astype("datetime64[M]").astype(str)
+    return [
+        {"month": labels[i], "fines": round(float(sums["fines"][i]), 2)}
+        for i in range(len(month_keys))
+    ]
+
+
+# -------- OVERDUE RATE --------
+@router.get("/overdue-rate")
+def overdue_rate(
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    start, end = _range(start, end)
+    frame = frames.load(db, DailyCategoryStat, ["day", "returns", "overdue_returns"], start, end)
+
+    months = frame["day"].astype("datetime64[M]")
+    (month_keys,), sums = group_sum(
+        [months.astype(np.int64)],
+        {"returns": frame["returns"], "overdue": frame["overdue_returns"]}
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(sums["returns"] > 0, sums["overdue"] / sums["returns"], 0.0)
+
+    total_returns = frame["returns"].sum()
+    overall = frame["overdue_returns"].sum() / total_returns if total_returns else 0.0
+
+    labels = month_keys.astype("datetime64[M]").astype(str)
+    return {
+        "overall": round(float(overall), 4),
+        "by_month": [
+            {"month": labels[i], "returns": int(sums["returns"][i]), "rate": round(float(rates[i]), 4)}
+            for i in range(len(month_keys))
+        ],
+    }
+
+
+# -------- NIGHTLY / MANUAL REBUILD --------
+@router.post("/rebuild")
+def rebuild(
+    start: date = Query(...),
+    end: date = Query(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    return rebuild_rollups(db, start, end)
+
+
+# -------- RECOMMENDATIONS (FULL RECOMPUTE) --------
+@router.post("/recommendations/rebuild")
+def rebuild_book_recommendations(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    return rebuild_recommendations(db)
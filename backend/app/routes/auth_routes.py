@@ -1,48 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.database import get_db
+from app.database import shards
 from app.models.user import User
 from app.schemas.user_schema import UserRegister, TokenResponse
 from app.core.security import hash_password, verify_password
 from app.core.jwt import create_access_token
+from app.core.events import broker
+from app.core.cache import invalidate_dashboards
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 # ---------------- REGISTER ----------------
 @router.post("/register")
-def register(user: UserRegister, db: Session = Depends(get_db)):
+def register(user: UserRegister):
 
+    branch = user.branch or shards.default
+    if not shards.has(branch):
+        raise HTTPException(status_code=400, detail="Unknown branch")
 
-    if user.role == "ADMIN":
-        existing_admin = db.query(User).filter(User.role == "ADMIN").first()
-        if existing_admin:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Admin already exists. Multiple admins are not allowed."
-            )
-        
+    with shards.session(branch) as db:
 
+        if user.role == "ADMIN":
+            existing_admin = db.query(User).filter(User.role == "ADMIN").first()
+            if existing_admin:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Admin already exists. Multiple admins are not allowed."
+                )
 
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=400,
-            detail="You can not register as Admin"
+        # Emails are unique across branches, so login can find the right shard
+        taken = shards.fan_out(
+            lambda shard_db: shard_db.query(User.id).filter(User.email == user.email).first() is not None
         )
+        if any(taken.values()):
+            raise HTTPException(
+                status_code=400,
+                detail="You can not register as Admin"
+            )
 
-    new_user = User(
-        email=user.email,
-        username=user.username,
-        password=hash_password(user.password),
-        role=user.role
-    )
+        new_user = User(
+            email=user.email,
+            username=user.username,
+            password=hash_password(user.password),
+            role=user.role
+        )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        broker.publish("user.registered", {"user_id": new_user.id, "branch": branch}, {"total_users": 1})
+    invalidate_dashboards()
 
     return {"message": "User registered successfully"}
 
@@ -50,10 +59,13 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
 # ---------------- LOGIN (OAuth2) ----------------
 @router.post("/login", response_model=TokenResponse)
 def login(
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
+    # The token does not say which branch yet: ask every shard in parallel
+    found = shards.fan_out(
+        lambda db: db.query(User).filter(User.email == form_data.username).first()
+    )
+    user = next((u for u in found.values() if u is not None), None)
 
     if not user or not verify_password(form_data.password, user.password):
         raise HTTPException(
@@ -62,7 +74,7 @@ def login(
         )
 
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role}
+        data={"sub": user.email, "role": user.role, "branch": user.branch}
     )
 
     return {
@@ -5,8 +5,23 @@ from sqlalchemy import or_
 from app.database import get_db
 from app.models.book import Book
 from app.models.user import User
-from app.schemas.book_schema import BookCreate, BookUpdate, BookResponse, PaginatedBooksResponse
+from app.models.book_copy import BookCopy, BookAvailability
+from app.schemas.book_schema import BookCreate, BookUpdate, BookResponse, PaginatedBooksResponse, RecommendationResponse
+from app.schemas.copy_schema import CopyCreate, CopyUpdate, CopyResponse, AvailabilityResponse
 from app.core.security import get_current_user
+from app.core.catalog import catalog_for
+from app.core.config import CATALOG_SNAPSHOT_ENABLED, RECOMMENDATION_TOP_K
+from app.models.catalog_change import record_change
+from app.core.holds import promote_holds
+from app.core.events import broker, publish_issue_event
+from app.core.outbox import enqueue_issue_event
+from app.core.inventory import add_copies, remove_copy, move_copy, tracked_available
+from app.core.singleflight import group
+from app.core.cache import invalidate_dashboards
+from app.core.recommendations import neighbors_of
+
+# Identical concurrent catalog queries share one execution
+book_queries = group("books.list")
 
 router = APIRouter(
     prefix="/books",
@@ -36,8 +51,14 @@ def add_book(
     )
 
     db.add(new_book)
+    db.flush()
+    record_change(db, "book", new_book.id)
     db.commit()
     db.refresh(new_book)
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    broker.publish("book.added", {"book_id": new_book.id}, {"total_books": 1})
+    invalidate_dashboards()
     return new_book
 
 # ---------------- GET BOOKS (SEARCH + FILTER + PAGINATION) ----------------
@@ -57,6 +78,32 @@ def get_books(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # Both paths match case-insensitively and treat empty filters as unset
+    search = search.lower() if search else None
+    category_id = category_id or None
+    order = "desc" if order.lower() == "desc" else "asc"
+
+    key = (db.info.get("branch"), search, category_id, page, size, sort_by, order)
+    books, total = book_queries.do(key, _query_books, db, search, category_id, page, size, sort_by, order)
+
+    return {
+        "data": books,
+        "total": total,
+        "page": page,
+        "size": size
+    }
+
+
+def _query_books(db, search, category_id, page, size, sort_by, order):
+    # Served from the in-process snapshot (refreshed from the change log)
+    if CATALOG_SNAPSHOT_ENABLED:
+        catalog = catalog_for(db)
+        catalog.sync(db)
+        return catalog.query_books(search, category_id, page, size, sort_by, order)
+    return _query_books_db(db, search, category_id, page, size, sort_by, order)
+
+
+def _query_books_db(db, search, category_id, page, size, sort_by, order):
     # IMPORTANT: joinedload category
     query = db.query(Book).options(joinedload(Book.category))
 
@@ -89,15 +136,42 @@ def get_books(
         .all()
     )
 
-    return {
-        "data": books,
-        "total": total,
-        "page": page,
-        "size": size
-    }
+    return books, total
 
 
 
+# ---------------- ALSO BORROWED (RECOMMENDATIONS) ----------------
+@router.get("/{book_id}/recommendations", response_model=list[RecommendationResponse])
+def book_recommendations(
+    book_id: int,
+    limit: int = Query(RECOMMENDATION_TOP_K, ge=1, le=RECOMMENDATION_TOP_K),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    neighbors = neighbors_of(db, book_id, limit)
+    ids = [n.neighbor_id for n in neighbors]
+
+    if CATALOG_SNAPSHOT_ENABLED:
+        catalog = catalog_for(db)
+        catalog.sync(db)
+        books = {i: catalog.books[i] for i in ids if i in catalog.books}
+    else:
+        books = {b.id: b for b in db.query(Book).filter(Book.id.in_(ids))}
+
+    # Deleted books drop out of the list
+    return [
+        RecommendationResponse(
+            book_id=n.neighbor_id,
+            title=books[n.neighbor_id].title,
+            author=books[n.neighbor_id].author,
+            available_copies=books[n.neighbor_id].available_copies,
+            score=n.score
+        )
+        for n in neighbors
+        if n.neighbor_id in books
+    ]
+
+
 # ---------------- UPDATE BOOK (ADMIN ONLY) ----------------
 @router.put("/{book_id}", response_model=BookResponse)
 def update_book(
@@ -119,13 +193,30 @@ def update_book(
         db_book.author = book.author
     if book.category_id is not None:
         db_book.category_id = book.category_id
+    promoted = []
     if book.total_copies is not None:
         diff = book.total_copies - db_book.total_copies
+        # Only untracked stock that is on the shelf can be removed here
+        if db_book.available_copies + diff < tracked_available(db, book_id):
+            raise HTTPException(status_code=400, detail="Cannot remove copies that are currently issued")
         db_book.total_copies = book.total_copies
-        db_book.available_copies += diff
+        # In SQL so a concurrent approve or return is not overwritten; the
+        # flush expires the attribute, so promote_holds reads the new value
+        db_book.available_copies = Book.available_copies + diff
+        db.flush()
+        if diff > 0:
+            promoted = promote_holds(db, db_book)
+            for promoted_issue in promoted:
+                enqueue_issue_event(db, "issue.requested", promoted_issue)
 
+    record_change(db, "book", db_book.id)
     db.commit()
     db.refresh(db_book)
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    for promoted_issue in promoted:
+        publish_issue_event("issue.requested", promoted_issue)
+    invalidate_dashboards(*promoted)
     return db_book
 
 
@@ -144,5 +235,135 @@ def delete_book(
         raise HTTPException(status_code=404, detail="Book not found")
 
     db.delete(book)
+    record_change(db, "book", book_id, deleted=True)
     db.commit()
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    broker.publish("book.deleted", {"book_id": book_id}, {"total_books": -1})
+    invalidate_dashboards()
     return {"message": "Book deleted successfully"}
+
+
+# =====================================================
+# PER-COPY INVENTORY
+# =====================================================
+
+# ---------------- ADD COPIES (ADMIN ONLY) ----------------
+@router.post("/{book_id}/copies", response_model=list[CopyResponse])
+def add_book_copies(
+    book_id: int,
+    copies: list[CopyCreate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can add copies")
+
+    db_book = db.query(Book).filter(Book.id == book_id).first()
+    if not db_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    barcodes = [c.barcode for c in copies]
+    if len(set(barcodes)) != len(barcodes):
+        raise HTTPException(status_code=400, detail="Duplicate barcodes in request")
+    taken = db.query(BookCopy.barcode).filter(BookCopy.barcode.in_(barcodes)).all()
+    if taken:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Barcodes already registered: {', '.join(t[0] for t in taken)}"
+        )
+
+    created = add_copies(db, db_book, copies)
+    promoted = promote_holds(db, db_book)
+    for promoted_issue in promoted:
+        enqueue_issue_event(db, "issue.requested", promoted_issue)
+
+    db.commit()
+    for copy in created:
+        db.refresh(copy)
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    for promoted_issue in promoted:
+        publish_issue_event("issue.requested", promoted_issue)
+    if promoted:
+        invalidate_dashboards(*promoted)
+    return created
+
+
+# ---------------- LIST COPIES (ADMIN ONLY) ----------------
+@router.get("/{book_id}/copies", response_model=list[CopyResponse])
+def list_book_copies(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can view copies")
+
+    return db.query(BookCopy)\
+        .filter(BookCopy.book_id == book_id)\
+        .order_by(BookCopy.branch, BookCopy.id)\
+        .all()
+
+
+# ---------------- AVAILABILITY PER BRANCH ----------------
+@router.get("/{book_id}/availability", response_model=list[AvailabilityResponse])
+def book_availability(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return db.query(BookAvailability)\
+        .filter(BookAvailability.book_id == book_id)\
+        .order_by(BookAvailability.branch)\
+        .all()
+
+
+# ---------------- UPDATE COPY (ADMIN ONLY) ----------------
+@router.put("/copies/{copy_id}", response_model=CopyResponse)
+def update_book_copy(
+    copy_id: int,
+    payload: CopyUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can update copies")
+
+    copy = db.query(BookCopy).filter(BookCopy.id == copy_id).with_for_update().first()
+    if not copy:
+        raise HTTPException(status_code=404, detail="Copy not found")
+
+    if payload.branch is not None:
+        move_copy(db, copy, payload.branch)
+    if payload.condition is not None:
+        copy.condition = payload.condition
+
+    db.commit()
+    db.refresh(copy)
+    return copy
+
+
+# ---------------- WITHDRAW COPY (ADMIN ONLY) ----------------
+@router.delete("/copies/{copy_id}")
+def delete_book_copy(
+    copy_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can delete copies")
+
+    copy = db.query(BookCopy).filter(BookCopy.id == copy_id).with_for_update().first()
+    if not copy:
+        raise HTTPException(status_code=404, detail="Copy not found")
+    if not copy.available:
+        raise HTTPException(status_code=400, detail="Copy is currently issued")
+
+    book = db.query(Book).filter(Book.id == copy.book_id).first()
+    remove_copy(db, book, copy)
+
+    db.commit()
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    return {"message": "Copy withdrawn successfully"}
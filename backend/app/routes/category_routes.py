@@ -1,18 +1,105 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.models.book import Book
 from app.models.category import Category
 from app.models.user import User
+from app.models.catalog_change import record_change
 from app.core.security import get_current_user
+from app.core.catalog import catalog_for
+from app.core.config import CATALOG_SNAPSHOT_ENABLED
+from app.core.query_budget import query_budget
+from app.schemas.category_schema import CategoryCreate, CategoryResponse
 
 router = APIRouter(
     prefix="",
     tags=["Categories"]
 )
 
-@router.get("/")
+@router.get("/", response_model=list[CategoryResponse])
+# Auth + snapshot change-log poll; the first call in a worker loads the snapshot
+@query_budget(4)
 def get_categories(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    if CATALOG_SNAPSHOT_ENABLED:
+        catalog = catalog_for(db)
+        catalog.sync(db)
+        return catalog.list_categories()
+
     return db.query(Category).all()
+
+
+# ---------------- CREATE CATEGORY (ADMIN ONLY) ----------------
+@router.post("/", response_model=CategoryResponse)
+def add_category(
+    category: CategoryCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can add categories")
+
+    if db.query(Category).filter(Category.name == category.name).first():
+        raise HTTPException(status_code=400, detail="Category already exists")
+
+    new_category = Category(name=category.name, description=category.description)
+    db.add(new_category)
+    db.flush()
+    record_change(db, "category", new_category.id)
+    db.commit()
+    db.refresh(new_category)
+    catalog_for(db).sync(db, force=True)
+    return new_category
+
+
+# ---------------- UPDATE CATEGORY (ADMIN ONLY) ----------------
+@router.put("/{category_id}", response_model=CategoryResponse)
+def update_category(
+    category_id: int,
+    category: CategoryCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can update categories")
+
+    db_category = db.query(Category).filter(Category.id == category_id).first()
+    if not db_category:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    if db.query(Category).filter(Category.name == category.name, Category.id != category_id).first():
+        raise HTTPException(status_code=400, detail="Category already exists")
+
+    db_category.name = category.name
+    db_category.description = category.description
+    record_change(db, "category", category_id)
+    db.commit()
+    db.refresh(db_category)
+    catalog_for(db).sync(db, force=True)
+    return db_category
+
+
+# ---------------- DELETE CATEGORY (ADMIN ONLY) ----------------
+@router.delete("/{category_id}")
+def delete_category(
+    category_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN can delete categories")
+
+    db_category = db.query(Category).filter(Category.id == category_id).first()
+    if not db_category:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    if db.query(Book.id).filter(Book.category_id == category_id).first():
+        raise HTTPException(status_code=400, detail="Category still has books")
+
+    db.delete(db_category)
+    record_change(db, "category", category_id, deleted=True)
+    db.commit()
+    catalog_for(db).sync(db, force=True)
+    return {"message": "Category deleted successfully"}
@@ -0,0 +1,121 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.category import Category
+from app.models.fine_policy import FinePolicy, Holiday
+from app.models.user import User
+from app.schemas.fine_schema import FinePolicyUpsert, FinePolicyResponse, HolidayCreate, HolidayResponse
+from app.dependencies import require_admin
+from app.core.fines import invalidate_rules, refresh_overdue_fines
+
+router = APIRouter(
+    prefix="/admin/fines",
+    tags=["Fines"]
+)
+
+
+# -------- LIST POLICIES --------
+@router.get("/policies", response_model=list[FinePolicyResponse])
+def list_policies(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    return db.query(FinePolicy).order_by(FinePolicy.id).all()
+
+
+# -------- CREATE / REPLACE POLICY (ONE PER CATEGORY) --------
+@router.put("/policies", response_model=FinePolicyResponse)
+def upsert_policy(
+    payload: FinePolicyUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    if payload.category_id is not None and not db.query(Category).filter(Category.id == payload.category_id).first():
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    policy = db.query(FinePolicy).filter(FinePolicy.category_id == payload.category_id).first()
+    if not policy:
+        policy = FinePolicy(category_id=payload.category_id)
+        db.add(policy)
+
+    policy.loan_days = payload.loan_days
+    policy.grace_days = payload.grace_days
+    policy.daily_rate = payload.daily_rate
+    policy.max_fine = payload.max_fine
+    policy.skip_holidays = payload.skip_holidays
+
+    db.commit()
+    db.refresh(policy)
+    invalidate_rules()
+    return policy
+
+
+# -------- DELETE POLICY (CATEGORY FALLS BACK TO DEFAULT) --------
+@router.delete("/policies/{policy_id}")
+def delete_policy(
+    policy_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    policy = db.query(FinePolicy).filter(FinePolicy.id == policy_id).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+    db.delete(policy)
+    db.commit()
+    invalidate_rules()
+    return {"message": "Policy deleted successfully"}
+
+
+# -------- HOLIDAY CALENDAR --------
+@router.get("/holidays", response_model=list[HolidayResponse])
+def list_holidays(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    return db.query(Holiday).order_by(Holiday.day).all()
+
+
+@router.post("/holidays", response_model=HolidayResponse)
+def add_holiday(
+    payload: HolidayCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    if db.query(Holiday).filter(Holiday.day == payload.day).first():
+        raise HTTPException(status_code=400, detail="Holiday already exists")
+
+    holiday = Holiday(day=payload.day, name=payload.name)
+    db.add(holiday)
+    db.commit()
+    db.refresh(holiday)
+    invalidate_rules()
+    return holiday
+
+
+@router.delete("/holidays/{day}")
+def delete_holiday(
+    day: date,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    holiday = db.query(Holiday).filter(Holiday.day == day).first()
+    if not holiday:
+        raise HTTPException(status_code=404, detail="Holiday not found")
+
+    db.delete(holiday)
+    db.commit()
+    invalidate_rules()
+    return {"message": "Holiday deleted successfully"}
+
+
+# -------- RECOMPUTE FINES ON ALL OPEN LOANS --------
+@router.post("/refresh")
+def refresh_fines(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    return {"updated": refresh_overdue_fines(db)}
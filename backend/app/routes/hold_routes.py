@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import get_db
+from app.models.book import Book
+from app.models.hold import Hold
+from app.models.issue import Issue
+from app.models.user import User
+from app.schemas.hold_schema import HoldResponse, HoldQueueEntry
+from app.core.security import get_current_user
+from app.core.holds import active_hold_count, queue_position, estimated_wait_days, promote_holds
+from app.core.events import publish_issue_event
+from app.core.outbox import enqueue_issue_event
+from app.core.cache import invalidate_dashboards
+
+router = APIRouter(
+    prefix="/holds",
+    tags=["Holds"]
+)
+
+
+def _hold_response(db: Session, hold: Hold) -> HoldResponse:
+    position = queue_position(db, hold)
+    return HoldResponse(
+        id=hold.id,
+        book_id=hold.book_id,
+        title=hold.book.title,
+        hold_date=hold.hold_date,
+        position=position,
+        eta_days=estimated_wait_days(position, hold.book)
+    )
+
+
+# -------- PLACE HOLD (USER) --------
+@router.post("/{book_id}", response_model=HoldResponse)
+def place_hold(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "USER":
+        raise HTTPException(status_code=403, detail="Only USER allowed")
+
+    book = db.query(Book).filter(Book.id == book_id).first()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    if book.available_copies > 0 and active_hold_count(db, book_id) == 0:
+        raise HTTPException(status_code=400, detail="Copies available, request issue instead")
+
+    existing_issue = db.query(Issue).filter(
+        Issue.user_id == current_user.id,
+        Issue.book_id == book_id,
+        Issue.return_date == None,
+        Issue.issue_rejected == False
+    ).first()
+    if existing_issue:
+        raise HTTPException(status_code=400, detail="Book already issued or requested")
+
+    existing_hold = db.query(Hold).filter(
+        Hold.user_id == current_user.id,
+        Hold.book_id == book_id,
+        Hold.active == True
+    ).first()
+    if existing_hold:
+        raise HTTPException(status_code=400, detail="Already in the queue for this book")
+
+    hold = Hold(user_id=current_user.id, book_id=book_id)
+    db.add(hold)
+    db.commit()
+    db.refresh(hold)
+
+    return _hold_response(db, hold)
+
+
+# -------- MY HOLDS (USER) --------
+@router.get("/my-holds", response_model=list[HoldResponse])
+def my_holds(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    holds = db.query(Hold)\
+        .options(joinedload(Hold.book))\
+        .filter(Hold.user_id == current_user.id, Hold.active == True)\
+        .order_by(Hold.id)\
+        .all()
+
+    return [_hold_response(db, h) for h in holds]
+
+
+# -------- CANCEL HOLD (USER) --------
+@router.delete("/{hold_id}")
+def cancel_hold(
+    hold_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    hold = db.query(Hold).filter(Hold.id == hold_id).first()
+    if not hold or hold.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    if not hold.active:
+        raise HTTPException(status_code=400, detail="Hold is no longer active")
+
+    hold.active = False
+    hold.cancelled = True
+
+    # Copies left free while this hold was ahead in the queue go to the next reader
+    db.flush()
+    promoted = promote_holds(db, hold.book)
+    for promoted_issue in promoted:
+        enqueue_issue_event(db, "issue.requested", promoted_issue)
+
+    db.commit()
+    for promoted_issue in promoted:
+        publish_issue_event("issue.requested", promoted_issue)
+    if promoted:
+        invalidate_dashboards(*promoted)
+
+    return {"message": "Hold cancelled"}
+
+
+# -------- BOOK QUEUE (ADMIN) --------
+@router.get("/admin/book/{book_id}", response_model=list[HoldQueueEntry])
+def book_queue(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ADMIN allowed"
+        )
+
+    holds = db.query(Hold)\
+        .options(joinedload(Hold.user))\
+        .filter(Hold.book_id == book_id, Hold.active == True)\
+        .order_by(Hold.id)\
+        .all()
+
+    return [
+        HoldQueueEntry(
+            id=h.id,
+            user_id=h.user_id,
+            username=h.user.username,
+            hold_date=h.hold_date,
+            position=position
+        )
+        for position, h in enumerate(holds, start=1)
+    ]
@@ -1,20 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import or_, true
 from sqlalchemy.orm import Session,joinedload
-from datetime import date
+from datetime import date, timedelta
 
 from app.database import get_db
 from app.models.issue import Issue
+from app.models.issue_archive import IssueArchive
 from app.models.book import Book
 from app.models.user import User
 from app.schemas.issue_schema import  IssueAdminResponse, IssueReturnResponse, IssueUserResponse, RejectReturnRequest
+from app.schemas.issue_schema import IssueCompact, CompactIssueList, UserBase, BookBase
 from app.core.security import get_current_user
+from app.core.catalog import catalog_for
+from app.core.holds import active_hold_count, promote_holds
+from app.core.events import publish_issue_event
+from app.core.outbox import enqueue_issue_event
+from app.core.archive import history_page
+from app.core.inventory import allocate_copy, release_copy, tracked_available
+from app.models.catalog_change import record_change
+from app.core.cache import invalidate_dashboards
+from app.core.fines import fine_for, load_rules
 
 router = APIRouter(
     prefix="/issues",
     tags=["Issue Management"]
 )
 
+
+# ?compact=true: nested user / book objects go to side tables keyed by id
+def _issue_list(issues, compact: bool):
+    if not compact:
+        return issues
+
+    users, books = {}, {}
+    for issue in issues:
+        if issue.user is not None:
+            users[issue.user.id] = issue.user
+        if issue.book is not None:
+            books[issue.book.id] = issue.book
+
+    return CompactIssueList(
+        items=[IssueCompact.model_validate(issue) for issue in issues],
+        users={i: UserBase.model_validate(u) for i, u in users.items()},
+        books={i: BookBase.model_validate(b) for i, b in books.items()}
+    )
+
+
 # =====================================================
 # USER APIs
 # =====================================================
@@ -36,6 +67,10 @@ def request_issue(
     if book.available_copies <= 0:
         raise HTTPException(status_code=400, detail="No copies available")
 
+    # Freed copies go to the hold queue first
+    if active_hold_count(db, book_id) > 0:
+        raise HTTPException(status_code=400, detail="Book is reserved for readers in the hold queue")
+
     existing = db.query(Issue).filter(
         Issue.user_id == current_user.id,
         Issue.book_id == book_id,
@@ -52,7 +87,10 @@ def request_issue(
     )
 
     db.add(issue)
+    enqueue_issue_event(db, "issue.requested", issue)
     db.commit()
+    publish_issue_event("issue.requested", issue)
+    invalidate_dashboards(issue)
 
     return {"message": "Issue request sent to Admin"}
 
@@ -80,45 +118,57 @@ def request_return(
     issue.return_requested = True
     issue.return_rejected = False
     issue.return_remarks = None
+    enqueue_issue_event(db, "return.requested", issue)
 
     db.commit()
+    publish_issue_event("return.requested", issue)
+    invalidate_dashboards(issue)
 
     return {"message": "Return request sent to Admin"}
 
 
 # -------- USER CURRENTLY ISSUED BOOKS --------
-@router.get("/my-books", response_model=list[IssueUserResponse])
+@router.get("/my-books", response_model=list[IssueUserResponse] | CompactIssueList)
 def my_books(
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != "USER":
         raise HTTPException(status_code=403, detail="Only USER allowed")
 
-    return db.query(Issue)\
+    issues = db.query(Issue)\
     .options(joinedload(Issue.user), joinedload(Issue.book))\
     .filter(
         Issue.user_id == current_user.id,
         Issue.issue_approved == True,
         Issue.return_date == None
     ).all()
+    return _issue_list(issues, compact)
 
 
 
 # -------- USER ISSUE & RETURN HISTORY --------
-@router.get("/my-history", response_model=list[IssueUserResponse])
+@router.get("/my-history", response_model=list[IssueUserResponse] | CompactIssueList)
 def my_history(
+    compact: bool = Query(False),
+    page: int | None = Query(default=None, ge=1),
+    size: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != "USER":
         raise HTTPException(status_code=403, detail="Only USER allowed")
 
-    return db.query(Issue)\
-    .options(joinedload(Issue.user), joinedload(Issue.book))\
-    .filter(Issue.user_id == current_user.id)\
-    .order_by(Issue.issue_date.desc())\
-    .all()
+    # Hot table + archived closed issues, newest first
+    issues = history_page(
+        db,
+        Issue.user_id == current_user.id,
+        IssueArchive.user_id == current_user.id,
+        page,
+        size
+    )
+    return _issue_list(issues, compact)
 
 
 
@@ -127,19 +177,21 @@ def my_history(
 # =====================================================
 
 # -------- PENDING ISSUE REQUESTS --------
-@router.get("/admin/pending-issues", response_model=list[IssueAdminResponse])
+@router.get("/admin/pending-issues", response_model=list[IssueAdminResponse] | CompactIssueList)
 def pending_issue_requests(
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Only ADMIN allowed")
 
-    return db.query(Issue)\
+    issues = db.query(Issue)\
     .options(joinedload(Issue.user), joinedload(Issue.book))\
     .filter(Issue.issue_requested == True)\
     .order_by(Issue.issue_date.desc())\
     .all()
+    return _issue_list(issues, compact)
 
 
 
@@ -153,7 +205,8 @@ def approve_issue(
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Only ADMIN allowed")
 
-    issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    # Locked so two admins approving the same request cannot both pass the checks
+    issue = db.query(Issue).filter(Issue.id == issue_id).with_for_update().first()
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found")
 
@@ -168,13 +221,33 @@ def approve_issue(
     if not book or book.available_copies <= 0:
         raise HTTPException(status_code=400, detail="No copies available")
 
+    # Hand out a barcoded copy if one is free; otherwise untracked stock
+    copy = allocate_copy(db, book.id)
+    if copy is None and book.available_copies <= tracked_available(db, book.id):
+        raise HTTPException(status_code=400, detail="No copies available")
+
+    # Conditional decrement: the check above read a value another approval
+    # may already have taken, so the last copy can only be handed out once
+    taken = db.query(Book)\
+        .filter(Book.id == book.id, Book.available_copies > 0)\
+        .update({Book.available_copies: Book.available_copies - 1}, synchronize_session=False)
+    if taken != 1:
+        raise HTTPException(status_code=400, detail="No copies available")
+    db.expire(book, ["available_copies"])
+
     issue.issue_requested = False
     issue.issue_approved = True
     issue.issue_date = date.today()
-    book.available_copies -= 1
+    issue.copy_id = copy.id if copy else None
+    record_change(db, "book", book.id)
+    enqueue_issue_event(db, "issue.approved", issue)
 
     db.commit()
     db.refresh(issue)
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    publish_issue_event("issue.approved", issue)
+    invalidate_dashboards(issue)
 
     return {"message": "Issue approved successfully"}
 
@@ -202,28 +275,45 @@ def reject_issue(
 
     issue.issue_requested = False
     issue.issue_rejected = True
+    issue.closed_on = date.today()
+    enqueue_issue_event(db, "issue.rejected", issue)
+
+    # The copy this request was holding goes to the next reader in the queue
+    promoted = []
+    book = db.query(Book).filter(Book.id == issue.book_id).first()
+    if book:
+        db.flush()
+        promoted = promote_holds(db, book)
+    for promoted_issue in promoted:
+        enqueue_issue_event(db, "issue.requested", promoted_issue)
 
     db.commit()
     db.refresh(issue)
+    publish_issue_event("issue.rejected", issue)
+    for promoted_issue in promoted:
+        publish_issue_event("issue.requested", promoted_issue)
+    invalidate_dashboards(issue, *promoted)
 
     return {"message": "Issue rejected successfully"}
 
 
 # -------- PENDING RETURN REQUESTS --------
-@router.get("/admin/pending-returns", response_model=list[IssueAdminResponse])
+@router.get("/admin/pending-returns", response_model=list[IssueAdminResponse] | CompactIssueList)
 def pending_return_requests(
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != "ADMIN":
         raise HTTPException(status_code=403, detail="Only ADMIN allowed")
 
-    return db.query(Issue)\
+    issues = db.query(Issue)\
     .options(joinedload(Issue.user), joinedload(Issue.book))\
     .filter(
         Issue.return_requested == True,
         Issue.return_approved == False
     ).all()
+    return _issue_list(issues, compact)
 
 
 
@@ -232,6 +322,7 @@ def pending_return_requests(
 def approve_return(
     issue_id: int,
     remarks:str | None = None,
+    condition:str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -254,18 +345,37 @@ def approve_return(
     issue.return_approved = True
     issue.return_requested = False
     issue.return_remarks = remarks
-
-    # Fine logic
-    days = (today - issue.issue_date).days
-    issue.fine = max(0, (days - 7) * 10)
+    issue.closed_on = today
 
     # Update book stock
+    if issue.copy_id:
+        release_copy(db, issue.copy_id, condition)
+
     book = db.query(Book).filter(Book.id == issue.book_id).first()
+
+    # Fine from the category's policy (loan period, grace, cap, holidays)
+    issue.fine = fine_for(db, issue.issue_date, book.category_id if book else None, today)
+    promoted = []
     if book:
-        book.available_copies += 1
+        book.available_copies = Book.available_copies + 1
+        db.flush()
+        record_change(db, "book", book.id)
+
+        # Next reader in the hold queue gets the copy in the same transaction
+        promoted = promote_holds(db, book)
+
+    enqueue_issue_event(db, "return.approved", issue)
+    for promoted_issue in promoted:
+        enqueue_issue_event(db, "issue.requested", promoted_issue)
 
     db.commit()
     db.refresh(issue)
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    publish_issue_event("return.approved", issue)
+    for promoted_issue in promoted:
+        publish_issue_event("issue.requested", promoted_issue)
+    invalidate_dashboards(issue, *promoted)
 
     return issue
 
@@ -295,33 +405,48 @@ def reject_return(
     issue.return_rejected = True
     issue.return_requested = False
     issue.return_remarks = payload.reason
+    enqueue_issue_event(db, "return.rejected", issue)
 
     db.commit()
     db.refresh(issue)
+    publish_issue_event("return.rejected", issue)
+    invalidate_dashboards(issue)
 
     return issue
 
 
 # -------- ADMIN ISSUE & RETURN HISTORY --------
-@router.get("/admin/history", response_model=list[IssueAdminResponse])
-def admin_history(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(Issue)\
-        .options(joinedload(Issue.user), joinedload(Issue.book))\
-        .filter(
-            or_(
-                Issue.issue_approved == True,
-                Issue.issue_rejected == True,
-                Issue.return_approved == True,
-                Issue.return_rejected == True,
-            )
-        )\
-        .order_by(Issue.issue_date.desc())\
-        .all()
+@router.get("/admin/history", response_model=list[IssueAdminResponse] | CompactIssueList)
+def admin_history(
+    compact: bool = Query(False),
+    page: int | None = Query(default=None, ge=1),
+    size: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Only ADMIN allowed")
+
+    # Everything in the archive is closed, so it all belongs in history
+    issues = history_page(
+        db,
+        or_(
+            Issue.issue_approved == True,
+            Issue.issue_rejected == True,
+            Issue.return_approved == True,
+            Issue.return_rejected == True,
+        ),
+        true(),
+        page,
+        size
+    )
+    return _issue_list(issues, compact)
 
 
 # -------- ADMIN OVERDUE BOOKS --------
-@router.get("/admin/overdue", response_model=list[IssueAdminResponse])
+@router.get("/admin/overdue", response_model=list[IssueAdminResponse] | CompactIssueList)
 def overdue_books(
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -329,23 +454,35 @@ def overdue_books(
         raise HTTPException(status_code=403, detail="Only ADMIN allowed")
 
     today = date.today()
-    allowed_days = 7
-    fine_per_day = 10
+    rules = load_rules(db)
 
-    overdue_issues = db.query(Issue)\
+    candidates = db.query(Issue)\
     .options(joinedload(Issue.user), joinedload(Issue.book))\
     .filter(
         Issue.issue_approved == True,
         Issue.return_date == None,
         Issue.issue_date != None,
-        func.datediff(today, Issue.issue_date) > allowed_days
+        # Range on issue_date so ix_issues_open_loans is used (datediff() is not sargable);
+        # the shortest loan period bounds every category's due date
+        Issue.issue_date < today - timedelta(days=rules.min_loan_days)
     ).all()
 
+    overdue, fines = rules.evaluate(
+        [issue.issue_date for issue in candidates],
+        [issue.book.category_id if issue.book else None for issue in candidates],
+        today
+    )
 
-    for issue in overdue_issues:
-        overdue_days = (today - issue.issue_date).days - allowed_days
-        issue.fine = overdue_days * fine_per_day
+    overdue_issues = []
+    for issue, overdue_days, fine in zip(candidates, overdue.tolist(), fines.tolist()):
+        # Also clears fines left over from a stricter earlier policy
+        issue.fine = fine
+        if overdue_days <= 0:
+            continue
         issue.return_remarks = f"Overdue by {overdue_days} days"
+        overdue_issues.append(issue)
 
     db.commit()
-    return overdue_issues
+    if overdue_issues:
+        invalidate_dashboards(*overdue_issues)
+    return _issue_list(overdue_issues, compact)
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.dependencies import require_admin
+from app.core.outbox import dispatchers
+from app.core import singleflight
+from app.core.cache import cache
+from app.core.compression import compression_stats
+from app.core.admission import admission
+from app.core.profiling import sampling_profiler, request_profiler, collapsed
+
+router = APIRouter(
+    prefix="/admin/metrics",
+    tags=["Metrics"]
+)
+
+
+# -------- OUTBOX LAG / THROUGHPUT --------
+@router.get("/outbox")
+def outbox_metrics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    # The caller's branch shard
+    return dispatchers[db.info["branch"]].stats(db)
+
+
+# -------- REQUEST COALESCING --------
+@router.get("/singleflight")
+def singleflight_metrics(
+    current_user: User = Depends(require_admin)
+):
+    return singleflight.stats()
+
+
+# -------- TWO-TIER CACHE (HIT RATIO / LATENCY PER NAMESPACE) --------
+@router.get("/cache")
+def cache_metrics(
+    current_user: User = Depends(require_admin)
+):
+    return cache.stats()
+
+
+# -------- RESPONSE BYTES VS WIRE BYTES --------
+@router.get("/compression")
+def compression_metrics(
+    current_user: User = Depends(require_admin)
+):
+    return compression_stats.to_dict()
+
+
+# -------- ADMISSION CONTROL (LANE OCCUPANCY / SHEDDING) --------
+@router.get("/admission")
+def admission_metrics(
+    current_user: User = Depends(require_admin)
+):
+    return admission.stats()
+
+
+# -------- SAMPLING PROFILE OF THIS WORKER --------
+# format=collapsed is a flamegraph-ready file:
+#   curl -H "Authorization: Bearer ..." ".../admin/metrics/profile?seconds=30" > worker.folded
+#   flamegraph.pl worker.folded > worker.svg     (or drop it on speedscope.app)
+@router.get("/profile")
+async def sampling_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(10, gt=0),
+    idle: bool = Query(False),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    current_user: User = Depends(require_admin)
+):
+    if sampling_profiler.busy():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    try:
+        result = await sampling_profiler.profile(seconds, interval_ms, idle)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    summary = {key: value for key, value in result.items() if key != "stacks"}
+    if format == "json":
+        return {**summary, "stacks": dict(result["stacks"].most_common(200))}
+
+    return PlainTextResponse(
+        collapsed(result["stacks"]),
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.folded"',
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Overhead-Pct": str(summary["overhead_pct"]),
+        },
+    )
+
+
+# -------- PER-REQUEST cPROFILE CAPTURES (X-Profile: 1) --------
+@router.get("/profile/requests")
+def request_profiles(
+    current_user: User = Depends(require_admin)
+):
+    return request_profiler.stats()
+
+
+@router.get("/profile/requests/{capture_id}")
+def request_profile(
+    capture_id: int,
+    format: str = Query("text", pattern="^(text|prof)$"),
+    current_user: User = Depends(require_admin)
+):
+    capture = request_profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found (only the latest captures are kept)")
+
+    if format == "prof":
+        # Load with pstats / snakeviz / gprof2dot
+        return Response(
+            capture.raw,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="request-{capture.id}.prof"'},
+        )
+    return PlainTextResponse(capture.stats_text)
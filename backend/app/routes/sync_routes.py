@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.dependencies import require_admin
+from app.schemas.sync_schema import SyncPushRequest, SyncPushResponse, SyncPullResponse
+from app.core.config import KIOSK_MODE, KIOSK_SYNC_BATCH
+from app.core.kiosk import SYNC_TABLES, pull_rows, pull_deletions, apply_entries, kiosk_sync, kiosk_key_valid
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Kiosk Sync"]
+)
+
+
+# =====================================================
+# CENTRAL APIs (called by branch kiosks with their admin account)
+# =====================================================
+
+# A branch admin token alone is not enough: the caller must also present
+# the branch's kiosk key (KIOSK_SYNC_KEYS), since pulls carry password hashes.
+def require_kiosk(
+    x_kiosk_key: str | None = Header(None),
+    current_user: User = Depends(require_admin)
+):
+    if not kiosk_key_valid(current_user.branch, x_kiosk_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Kiosk credential required"
+        )
+    return current_user
+
+
+# -------- PULL CHANGED ROWS --------
+# categories / books / users / issues changed after (since_version, since_id),
+# or /pull/deletions?since_id=... for deleted books and categories.
+# users carries the login columns only (SYNC_COLUMNS), so readers can log in
+# at the kiosk while offline.
+@router.get("/pull/{table}", response_model=SyncPullResponse)
+def pull_changes(
+    table: str,
+    since_version: int = Query(0, ge=0),
+    since_id: int = Query(0),
+    limit: int = Query(KIOSK_SYNC_BATCH, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_kiosk)
+):
+    if table == "deletions":
+        return pull_deletions(db, since_id, limit)
+    if table not in SYNC_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown table")
+
+    return pull_rows(db, table, current_user.branch, since_version, since_id, limit)
+
+
+# -------- APPLY JOURNALED KIOSK OPERATIONS --------
+@router.post("/push", response_model=SyncPushResponse)
+def push_changes(
+    body: SyncPushRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_kiosk)
+):
+    if KIOSK_MODE:
+        raise HTTPException(status_code=400, detail="A kiosk does not accept pushes")
+
+    return {"results": apply_entries(db, body.entries)}
+
+
+# =====================================================
+# KIOSK APIs
+# =====================================================
+
+# -------- SYNC NOW --------
+@router.post("/run")
+def run_sync(
+    current_user: User = Depends(require_admin)
+):
+    if not KIOSK_MODE:
+        raise HTTPException(status_code=400, detail="Not running in kiosk mode")
+
+    return kiosk_sync.run_once()
+
+
+# -------- JOURNAL / LAST SYNC --------
+@router.get("/status")
+def sync_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    if not KIOSK_MODE:
+        raise HTTPException(status_code=400, detail="Not running in kiosk mode")
+
+    return kiosk_sync.status(db)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter,Depends,HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import date
 
 from app.core.security import get_current_user
@@ -7,6 +7,8 @@ from app.database import get_db
 from app.models.issue import Issue
 from app.models.user import User
 from app.schemas.dashboard_schema import UserDashboardResponse
+from app.core.cache import cache
+from app.core.fines import load_rules
 
 router = APIRouter(
     prefix="/user",
@@ -18,9 +20,18 @@ def user_dashboard(
     db : Session = Depends(get_db),
     current_user : User = Depends(get_current_user)
 ):
+    # Cached per user (ids repeat across branch shards); issue transitions for this user invalidate it
+    summary = cache.get_or_load(
+        "user_dashboard", f"{current_user.branch}/{current_user.id}",
+        lambda: _user_dashboard(db, current_user).model_dump()
+    )
+    return UserDashboardResponse(**summary)
+
+
+def _user_dashboard(db: Session, current_user: User) -> UserDashboardResponse:
     today = date.today()
 
-    issues = db.query(Issue).filter(
+    issues = db.query(Issue).options(joinedload(Issue.book)).filter(
         Issue.user_id == current_user.id
     ).all()
 
@@ -40,10 +51,12 @@ def user_dashboard(
         if i.return_requested and not i.return_approved and not i.return_rejected
     ]
 
-    overdue = [
-        i for i in currently_issued
-        if (today - i.issue_date).days > 7
-    ]
+    overdue_days, _ = load_rules(db).evaluate(
+        [i.issue_date for i in currently_issued],
+        [i.book.category_id if i.book else None for i in currently_issued],
+        today
+    )
+    overdue = [i for i, days in zip(currently_issued, overdue_days) if days > 0]
 
 
     total_fine =  sum(i.fine for i in currently_issued)
@@ -40,4 +40,12 @@ class PaginatedBooksResponse(BaseModel):
     items: List[BookResponse]
     total: int
     page: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+# ---------------RECOMMENDATIONS -------------
+class RecommendationResponse(BaseModel):
+    book_id: int
+    title: str
+    author: str
+    available_copies: int
+    score: float
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class CopyCreate(BaseModel):
+    barcode: str = Field(..., min_length=1, max_length=50)
+    branch: str = Field("main", min_length=1, max_length=50)
+    condition: str = Field("GOOD", max_length=20)
+
+
+class CopyUpdate(BaseModel):
+    branch: Optional[str] = Field(None, min_length=1, max_length=50)
+    condition: Optional[str] = Field(None, max_length=20)
+
+
+class CopyResponse(BaseModel):
+    id: int
+    book_id: int
+    barcode: str
+    branch: str
+    condition: str
+    available: bool
+
+    class Config:
+        from_attributes = True
+
+
+class AvailabilityResponse(BaseModel):
+    branch: str
+    total: int
+    available: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+
+
+class FinePolicyUpsert(BaseModel):
+    # category_id None = library-wide default
+    category_id: Optional[int] = None
+    loan_days: int = Field(7, ge=1)
+    grace_days: int = Field(0, ge=0)
+    daily_rate: float = Field(10, ge=0)
+    max_fine: Optional[float] = Field(None, ge=0)
+    skip_holidays: bool = True
+
+
+class FinePolicyResponse(FinePolicyUpsert):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class HolidayCreate(BaseModel):
+    day: date
+    name: Optional[str] = Field(None, max_length=100)
+
+
+class HolidayResponse(HolidayCreate):
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+
+class HoldResponse(BaseModel):
+    id: int
+    book_id: int
+    title: str
+    hold_date: Optional[date]
+    position: int
+    eta_days: int
+
+
+class HoldQueueEntry(BaseModel):
+    id: int
+    user_id: int
+    username: str
+    hold_date: Optional[date]
+    position: int
@@ -50,6 +50,19 @@ class IssueAdminResponse(IssueBase):
     book: Optional[BookBase]
 
 
+# ---------------- COMPACT list (?compact=true) ----------------
+# Each user / book is sent once in a side table instead of on every row
+class IssueCompact(IssueBase):
+    user_id: Optional[int]
+    book_id: Optional[int]
+
+
+class CompactIssueList(BaseModel):
+    items: list[IssueCompact]
+    users: dict[int, UserBase]
+    books: dict[int, BookBase]
+
+
 # ---------------- Approve/Reject return response ----------------
 class IssueReturnResponse(IssueBase):
     user_id: int
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Any
+
+
+# One journaled kiosk operation (issue ids already translated to central ids where known)
+class SyncEntry(BaseModel):
+    key: str = Field(..., max_length=64)
+    op: str
+    issue_id: int
+    payload: dict[str, Any]
+
+
+class SyncPushRequest(BaseModel):
+    entries: list[SyncEntry]
+
+
+class SyncResult(BaseModel):
+    key: str
+    # applied / conflict / rejected (a re-sent entry gets its first answer again), error = not applied
+    status: str
+    issue_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class SyncPushResponse(BaseModel):
+    results: list[SyncResult]
+
+
+class SyncPullResponse(BaseModel):
+    rows: list[dict[str, Any]]
+    # Cursor of the last row returned; pass back as since_version / since_id
+    next_version: int
+    next_id: int
+    more: bool
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 import re
+from typing import Optional
 
 
 class UserRegister(BaseModel):
@@ -7,6 +8,8 @@ class UserRegister(BaseModel):
     email:EmailStr = Field(..., max_length=255)
     password:str = Field(..., min_length=8)
     role: str = "USER"
+    # Library branch to register at (default branch when omitted)
+    branch: Optional[str] = None
 
 
     @validator("password")
@@ -0,0 +1,21 @@
+# Moves closed issues past the archive horizon out of the hot table.
+#   cd backend
+#   python scripts/archive_issues.py            # ARCHIVE_HORIZON_DAYS from config
+#   python scripts/archive_issues.py 365
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.archive import archive_closed_issues  # noqa: E402
+from app.core.config import ARCHIVE_HORIZON_DAYS  # noqa: E402
+
+
+def main():
+    horizon = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_HORIZON_DAYS
+    moved = archive_closed_issues(horizon_days=horizon)
+    print(f"Archived {moved} closed issues older than {horizon} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Times the hot-table queries behind overdue_books and admin_dashboard_summary
+# before and after archiving closed history.
+#   cd backend
+#   python scripts/bench_archive.py [closed_rows] [database_url]
+# Defaults to 1,000,000 closed rows in a throwaway SQLite file.
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import user, book, issue, category, catalog_change, hold, outbox, analytics, issue_archive  # noqa: E402,F401
+from app.models.book import Book  # noqa: E402
+from app.models.category import Category  # noqa: E402
+from app.models.issue import Issue  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.routes.admin_routes import admin_dashboard_summary  # noqa: E402
+from app.routes.issue_routes import overdue_books  # noqa: E402
+from app.core.archive import archive_closed_issues  # noqa: E402
+
+OPEN_ROWS = 20_000
+CHUNK = 50_000
+
+
+def seed(Session, closed_rows):
+    today = date.today()
+    with Session() as db:
+        db.add(Category(id=1, name="Bench"))
+        db.add(User(id=1, email="admin@bench", username="admin", password="x", role="ADMIN"))
+        db.add_all([User(id=i, email=f"u{i}@bench", username=f"u{i}", password="x") for i in range(2, 1002)])
+        db.add_all([Book(id=i, title=f"B{i}", author="A", isbn=str(i), total_copies=10,
+                         available_copies=10, category_id=1) for i in range(1, 1001)])
+        db.commit()
+
+        rows = []
+        for n in range(closed_rows + OPEN_ROWS):
+            issued = today - timedelta(days=400 + n % 3000) if n < closed_rows else today - timedelta(days=n % 30)
+            closed = n < closed_rows
+            rows.append({
+                "user_id": 2 + n % 1000,
+                "book_id": 1 + n % 1000,
+                "issue_date": issued,
+                "return_date": issued + timedelta(days=10) if closed else None,
+                "issue_approved": True,
+                "return_approved": closed,
+                "closed_on": issued + timedelta(days=10) if closed else None,
+                "fine": 0,
+            })
+            if len(rows) == CHUNK:
+                db.execute(insert(Issue), rows)
+                rows = []
+        if rows:
+            db.execute(insert(Issue), rows)
+        db.commit()
+
+
+def timed(Session, admin, runs=5):
+    results = {}
+    for name, fn in (("overdue_books", overdue_books), ("admin_dashboard_summary", admin_dashboard_summary)):
+        best = float("inf")
+        for _ in range(runs):
+            with Session() as db:
+                started = time.perf_counter()
+                fn(db=db, current_user=admin)
+                best = min(best, time.perf_counter() - started)
+        results[name] = best * 1000
+    return results
+
+
+def main():
+    closed_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    url = sys.argv[2] if len(sys.argv) > 2 else "sqlite:///bench_archive.db"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    admin = User(id=1, role="ADMIN")
+
+    started = time.perf_counter()
+    seed(Session, closed_rows)
+    print(f"Seeded {closed_rows:,} closed + {OPEN_ROWS:,} open issues in {time.perf_counter() - started:.1f}s")
+
+    before = timed(Session, admin)
+
+    started = time.perf_counter()
+    moved = archive_closed_issues(Session, horizon_days=180, batch_size=10_000, pause_seconds=0)
+    print(f"Archived {moved:,} rows in {time.perf_counter() - started:.1f}s")
+
+    after = timed(Session, admin)
+
+    print(f"{'query':<26}{'before ms':>12}{'after ms':>12}")
+    for name in before:
+        print(f"{name:<26}{before[name]:>12.1f}{after[name]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
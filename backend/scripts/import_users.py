@@ -0,0 +1,39 @@
+# Bulk-creates USER accounts from a CSV roster (username,email,password).
+#   cd backend
+#   python scripts/import_users.py roster.csv
+#   python scripts/import_users.py roster.csv 2000 8      # chunk size, hash processes
+#   Rejected rows are written to roster.csv.errors.csv
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal  # noqa: E402
+from app.core.config import PROVISIONING_CHUNK_SIZE, PROVISIONING_HASH_WORKERS  # noqa: E402
+from app.core.provisioning import hash_pool, import_roster  # noqa: E402
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("usage: import_users.py ROSTER.csv [CHUNK_SIZE] [HASH_WORKERS]")
+    path = sys.argv[1]
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else PROVISIONING_CHUNK_SIZE
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else PROVISIONING_HASH_WORKERS
+
+    with open(path, encoding="utf-8-sig", newline="") as stream, SessionLocal() as db, hash_pool(workers) as executor:
+        result = import_roster(db, stream, chunk_size=chunk_size, executor=executor)
+
+    if result["errors"]:
+        with open(path + ".errors.csv", "w", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=["line", "email", "error"])
+            writer.writeheader()
+            writer.writerows(result["errors"])
+
+    rate = result["created"] / result["seconds"] * 60 if result["seconds"] else 0
+    print(f"Created {result['created']} users, rejected {result['failed']} "
+          f"in {result['seconds']}s ({rate:.0f}/min)")
+
+
+if __name__ == "__main__":
+    main()
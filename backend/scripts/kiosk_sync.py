@@ -0,0 +1,33 @@
+# One push + pull round between this kiosk and central (same as POST /sync/run).
+#   cd backend
+#   KIOSK_MODE=1 KIOSK_CENTRAL_URL=https://library.example.org \
+#   KIOSK_CENTRAL_EMAIL=branch-admin@example.com KIOSK_CENTRAL_PASSWORD=secret \
+#   KIOSK_SYNC_KEY=<this branch's key from central's KIOSK_SYNC_KEYS> \
+#   python scripts/kiosk_sync.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.config import KIOSK_MODE  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.models import user, book, issue, category, catalog_change, hold, outbox, analytics, issue_archive, book_copy, idempotency, fine_policy, recommendation, kiosk  # noqa: E402,F401
+from app.core.kiosk import kiosk_sync  # noqa: E402
+
+
+def main():
+    if not KIOSK_MODE:
+        sys.exit("Set KIOSK_MODE=1 (and KIOSK_DB_PATH) to sync a kiosk replica")
+
+    # First run on a fresh kiosk: create the local replica
+    Base.metadata.create_all(bind=engine)
+
+    result = kiosk_sync.run_once()
+    print(json.dumps(result, indent=2))
+    if result["status"] != "ok":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Overload test for admission control, against a running server.
+#   cd backend
+#   python scripts/load_test.py admin@example.com secret
+#   python scripts/load_test.py admin@example.com secret http://localhost:8000 20 3
+#
+# 1. Calibrate: closed loop with CONCURRENCY clients -> sustainable req/s
+# 2. Overload: open loop at MULTIPLIER x that rate for SECONDS, mixed traffic:
+#      catalog  GET  /books/?search=...          (catalog_read lane)
+#      reader   GET  /issues/admin/history        (read lane)
+#      approve  PUT  /issues/admin/approve-issue/  (priority lane; unknown id -> 404 after the lookup)
+# Latency is measured from the scheduled send time, so client-side queueing counts.
+# Compare a run with ADMISSION_ENABLED=0 on the server.
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CONCURRENCY = 16
+CLIENT_THREADS = 256
+
+MIX = [
+    ("catalog", 0.7),
+    ("reader", 0.2),
+    ("approve", 0.1),
+]
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    data = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    with urllib.request.urlopen(base_url + "/auth/login", data=data) as response:
+        return json.loads(response.read())["access_token"]
+
+
+def build_request(base_url: str, token: str, kind: str) -> urllib.request.Request:
+    headers = {"Authorization": f"Bearer {token}"}
+    if kind == "catalog":
+        term = random.choice("abcdefghijklmnopqrstuvwxyz")
+        return urllib.request.Request(f"{base_url}/books/?search={term}&page={random.randint(1, 3)}", headers=headers)
+    if kind == "reader":
+        return urllib.request.Request(f"{base_url}/issues/admin/history?compact=true", headers=headers)
+    return urllib.request.Request(
+        f"{base_url}/issues/admin/approve-issue/{random.randint(10**8, 10**9)}", method="PUT", headers=headers
+    )
+
+
+def send(request: urllib.request.Request) -> int:
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        error.read()
+        return error.code
+    except Exception:
+        return 0
+
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def calibrate(base_url: str, token: str, seconds: float) -> float:
+    done = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            kind = random.choices([k for k, _ in MIX], [w for _, w in MIX])[0]
+            if send(build_request(base_url, token, kind)) == 200 or kind == "approve":
+                with lock:
+                    done += 1
+
+    threads = [threading.Thread(target=client) for _ in range(CONCURRENCY)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done / seconds
+
+
+def overload(base_url: str, token: str, rate: float, seconds: float) -> dict:
+    results = {kind: [] for kind, _ in MIX}
+    lock = threading.Lock()
+
+    def fire(kind: str, scheduled: float):
+        status = send(build_request(base_url, token, kind))
+        with lock:
+            results[kind].append((status, time.perf_counter() - scheduled))
+
+    interval = 1 / rate
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as pool:
+        n = 0
+        while True:
+            scheduled = started + n * interval
+            if scheduled - started >= seconds:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = random.choices([k for k, _ in MIX], [w for _, w in MIX])[0]
+            pool.submit(fire, kind, scheduled)
+            n += 1
+    return results
+
+
+def report(results: dict):
+    print(f"{'class':8} {'sent':>6} {'ok':>6} {'shed':>6} {'other':>6} {'ok p50':>8} {'ok p99':>8} {'all p99':>8} {'max':>8}")
+    for kind, samples in results.items():
+        # approve targets unknown ids: 404 is the served answer
+        served = [s for s in samples if s[0] in (200, 404)]
+        shed = [s for s in samples if s[0] in (429, 503)]
+        ok_ms = [s[1] * 1000 for s in served]
+        all_ms = [s[1] * 1000 for s in samples]
+        print(f"{kind:8} {len(samples):>6} {len(served):>6} {len(shed):>6} {len(samples) - len(served) - len(shed):>6} "
+              f"{percentile(ok_ms, 0.5):>8.0f} {percentile(ok_ms, 0.99):>8.0f} "
+              f"{percentile(all_ms, 0.99):>8.0f} {max(all_ms, default=0):>8.0f}")
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("usage: load_test.py EMAIL PASSWORD [BASE_URL] [SECONDS] [MULTIPLIER]")
+    email, password = sys.argv[1], sys.argv[2]
+    base_url = sys.argv[3] if len(sys.argv) > 3 else "http://localhost:8000"
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 20
+    multiplier = float(sys.argv[5]) if len(sys.argv) > 5 else 3
+
+    token = login(base_url, email, password)
+
+    capacity = calibrate(base_url, token, min(seconds, 10))
+    print(f"Sustainable rate: {capacity:.1f} req/s; offering {capacity * multiplier:.1f} req/s for {seconds:.0f}s")
+
+    report(overload(base_url, token, capacity * multiplier, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Bytes on the wire and latency for the large list endpoints, per encoding
+# and response shape, against a running server.
+#   cd backend
+#   python scripts/measure_payloads.py admin@example.com secret
+#   python scripts/measure_payloads.py admin@example.com secret http://branch-proxy:8000 20
+import json
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ENDPOINTS = [
+    "/issues/admin/history",
+    "/issues/admin/pending-issues",
+    "/books/?size=50",
+    "/admin/dashboard/books",
+]
+
+VARIANTS = [
+    ("identity", False),
+    ("gzip", False),
+    ("br", False),
+    ("gzip", True),
+    ("br", True),
+]
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    data = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    with urllib.request.urlopen(base_url + "/auth/login", data=data) as response:
+        return json.loads(response.read())["access_token"]
+
+
+def fetch(url: str, token: str, encoding: str, etag: str | None = None):
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": encoding}
+    if etag:
+        headers["If-None-Match"] = etag
+    request = urllib.request.Request(url, headers=headers)
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            # urllib does not decode Content-Encoding: this is the wire size
+            body = response.read()
+            status, used, tag = response.status, response.headers.get("Content-Encoding", "identity"), response.headers.get("ETag")
+    except urllib.error.HTTPError as error:
+        body, status, used, tag = error.read(), error.code, "identity", error.headers.get("ETag")
+    return status, len(body), used, tag, (time.perf_counter() - started) * 1000
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("usage: measure_payloads.py EMAIL PASSWORD [BASE_URL] [RUNS]")
+    email, password = sys.argv[1], sys.argv[2]
+    base_url = sys.argv[3] if len(sys.argv) > 3 else "http://localhost:8000"
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+
+    token = login(base_url, email, password)
+    print(f"{'endpoint':32} {'encoding':9} {'compact':7} {'status':6} {'bytes':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for path in ENDPOINTS:
+        for encoding, compact in VARIANTS:
+            if compact and not path.startswith("/issues/"):
+                continue
+            separator = "&" if "?" in path else "?"
+            url = base_url + path + (f"{separator}compact=true" if compact else "")
+
+            samples = [fetch(url, token, encoding) for _ in range(runs)]
+            latencies = sorted(s[4] for s in samples)
+            status, size, used, tag, _ = samples[-1]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{path:32} {used:9} {str(compact):7} {status:<6} {size:>9} "
+                  f"{statistics.median(latencies):>8.1f} {p95:>8.1f}")
+
+        # Conditional re-fetch: what a client with a cached copy pays
+        status, size, used, tag, _ = fetch(base_url + path, token, "gzip")
+        if tag:
+            status, size, _, _, elapsed = fetch(base_url + path, token, "gzip", etag=tag)
+            print(f"{path:32} {'etag':9} {'-':7} {status:<6} {size:>9} {elapsed:>8.1f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# Full recompute of the co-borrowing tables and top-K neighbours.
+#   cd backend
+#   python scripts/rebuild_recommendations.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal  # noqa: E402
+from app.core.recommendations import rebuild_recommendations  # noqa: E402
+
+
+def main():
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        counts = rebuild_recommendations(db)
+    print(f"Rebuilt recommendations in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
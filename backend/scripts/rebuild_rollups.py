@@ -0,0 +1,28 @@
+# Nightly rebuild of the analytics rollups from issues + issues_archive.
+#   cd backend
+#   python scripts/rebuild_rollups.py                 # yesterday
+#   python scripts/rebuild_rollups.py 2025-01-01 2025-12-31
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal  # noqa: E402
+from app.core.analytics import rebuild_rollups  # noqa: E402
+
+
+def main():
+    if len(sys.argv) == 3:
+        start, end = date.fromisoformat(sys.argv[1]), date.fromisoformat(sys.argv[2])
+    else:
+        start = end = date.today() - timedelta(days=1)
+
+    with SessionLocal() as db:
+        counts = rebuild_rollups(db, start, end)
+
+    print(f"Rebuilt {start} .. {end}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+# Recomputes fines on every overdue open loan from the fine policies.
+#   cd backend
+#   python scripts/refresh_fines.py               # as of today
+#   python scripts/refresh_fines.py 2024-06-30
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import SessionLocal  # noqa: E402
+from app.core.fines import refresh_overdue_fines  # noqa: E402
+
+
+def main():
+    as_of = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    with SessionLocal() as db:
+        updated = refresh_overdue_fines(db, as_of)
+    print(f"Updated fines on {updated} overdue loans as of {as_of}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# Sends due-date reminders and overdue notices now, on every branch shard.
+#   cd backend
+#   python scripts/send_notifications.py                 # as of today, NOTIFY_SENDER from config
+#   python scripts/send_notifications.py 2024-06-30 smtp
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import shards  # noqa: E402
+from app.core.config import NOTIFY_SENDER  # noqa: E402
+from app.core.notifications import send_due_notifications, make_sender  # noqa: E402
+
+
+def main():
+    today = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    sender = make_sender(sys.argv[2] if len(sys.argv) > 2 else NOTIFY_SENDER)
+
+    for branch in shards.branches():
+        stats = send_due_notifications(session_factory=shards.sessions[branch], sender=sender, today=today)
+        print(f"{branch}: {stats or 'nothing due'}")
+
+
+if __name__ == "__main__":
+    main()
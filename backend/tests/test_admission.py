@@ -0,0 +1,147 @@
+import asyncio
+
+from app.core.admission import AdmissionController, Lane, classify
+
+
+def _controller(max_concurrent: int = 1, reserve: int = 0, queue_size: int = 4, max_wait_ms: int = 1000):
+    return AdmissionController(max_concurrent, reserve, [
+        Lane("priority", 1, queue_size, max_wait_ms, priority=0),
+        Lane("read", 1, queue_size, max_wait_ms, priority=3),
+    ])
+
+
+async def _settle():
+    # Let woken waiters and cancellations run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_requests_are_put_in_lanes():
+    assert classify("GET", "/books") == "catalog_read"
+    assert classify("GET", "/user/dashboard") == "read"
+    assert classify("PUT", "/issues/admin/approve-issue/3") == "priority"
+    assert classify("POST", "/books/") == "admin_write"
+    assert classify("POST", "/issues/request-issue/3") == "user_write"
+    assert classify("GET", "/admin/events") is None
+
+
+def test_full_queue_is_shed_at_once():
+    async def scenario():
+        controller = _controller(queue_size=1)
+        read = controller.lanes["read"]
+        assert await controller.acquire(read)
+        queued = asyncio.create_task(controller.acquire(read))
+        await _settle()
+
+        assert not await controller.acquire(read)
+
+        controller.release(read, 0.01)
+        assert await queued
+        return controller
+
+    controller = asyncio.run(scenario())
+    read = controller.lanes["read"]
+    assert (read.shed_queue_full, read.queued, read.admitted) == (1, 1, 2)
+
+
+def test_waiter_past_its_deadline_is_shed():
+    async def scenario():
+        controller = _controller(max_wait_ms=50)
+        read = controller.lanes["read"]
+        assert await controller.acquire(read)
+        return controller, await controller.acquire(read)
+
+    controller, admitted = asyncio.run(scenario())
+    read = controller.lanes["read"]
+    assert not admitted
+    assert (read.shed_deadline, len(read.waiters), read.active) == (1, 0, 1)
+
+
+def test_release_hands_the_slot_to_the_next_waiter():
+    async def scenario():
+        controller = _controller()
+        read = controller.lanes["read"]
+        assert await controller.acquire(read)
+        queued = asyncio.create_task(controller.acquire(read))
+        await _settle()
+
+        controller.release(read, 0.01)
+        # Taken for the waiter inside release(); nobody can slip in between
+        assert (read.active, controller.active, len(read.waiters)) == (1, 1, 0)
+        return await queued
+
+    assert asyncio.run(scenario())
+
+
+def test_priority_lane_is_served_first():
+    async def scenario():
+        controller = _controller()
+        read, priority = controller.lanes["read"], controller.lanes["priority"]
+        assert await controller.acquire(read)
+        waiting_read = asyncio.create_task(controller.acquire(read))
+        await _settle()
+        waiting_priority = asyncio.create_task(controller.acquire(priority))
+        await _settle()
+
+        controller.release(read, 0.01)
+        await _settle()
+        first = (waiting_priority.done(), waiting_read.done())
+
+        controller.release(priority, 0.01)
+        await _settle()
+        assert await waiting_read
+        return first
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_priority_reserve_admits_past_the_global_limit():
+    async def scenario():
+        controller = _controller(max_concurrent=1, reserve=1)
+        read, priority = controller.lanes["read"], controller.lanes["priority"]
+        assert await controller.acquire(read)
+        admitted = await controller.acquire(priority)
+        return controller, admitted
+
+    controller, admitted = asyncio.run(scenario())
+    assert admitted
+    assert controller.active == 2
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = _controller()
+        read = controller.lanes["read"]
+        assert await controller.acquire(read)
+        queued = asyncio.create_task(controller.acquire(read))
+        await _settle()
+
+        queued.cancel()
+        await _settle()
+        assert queued.cancelled()
+        assert len(read.waiters) == 0
+
+        controller.release(read, 0.01)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.active == 0
+
+
+def test_waiter_cancelled_after_the_hand_off_gives_the_slot_back():
+    async def scenario():
+        controller = _controller()
+        read = controller.lanes["read"]
+        assert await controller.acquire(read)
+        queued = asyncio.create_task(controller.acquire(read))
+        await _settle()
+
+        # The slot is handed over, but the request goes away before it resumes
+        controller.release(read, 0.01)
+        queued.cancel()
+        await _settle()
+        assert queued.cancelled()
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert (controller.active, controller.lanes["read"].active) == (0, 0)
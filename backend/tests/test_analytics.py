@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+from app.core.analytics import RollupFrameCache, frames, rebuild_rollups
+from app.core.archive import archive_batch
+from app.database import shards
+from app.models.analytics import DailyBookStat
+from app.models.issue import Issue
+from app.models.issue_archive import IssueArchive
+
+
+def _borrow_and_return(client, admin, reader, book):
+    client.post(f"/issues/request-issue/{book['id']}", headers=reader)
+    pending = client.get("/issues/admin/pending-issues", headers=admin).json()
+    issue_id = next(i["id"] for i in pending if i["book"]["id"] == book["id"])
+    client.put(f"/issues/admin/approve-issue/{issue_id}", headers=admin)
+    client.put(f"/issues/request-return/{issue_id}", headers=reader)
+    assert client.put(f"/issues/admin/approve-return/{issue_id}", headers=admin).status_code == 200
+    return issue_id
+
+
+def test_rebuild_counts_archived_issues(client, admin, make_user, make_book, db):
+    book = make_book()
+    issue_id = _borrow_and_return(client, admin, make_user(), book)
+    today = date.today()
+
+    # Archive everything closed before tomorrow, i.e. this issue too
+    while archive_batch(db, today + timedelta(days=1)):
+        pass
+    assert db.query(Issue).filter(Issue.id == issue_id).first() is None
+    assert db.query(IssueArchive).filter(IssueArchive.id == issue_id).one()
+
+    rebuild_rollups(db, today, today)
+
+    stat = db.query(DailyBookStat).filter(DailyBookStat.day == today, DailyBookStat.book_id == book["id"]).one()
+    assert (stat.borrows, stat.returns) == (1, 1)
+
+
+def test_closed_day_frames_are_cached_per_shard():
+    old = date.today() - timedelta(days=30)
+    loaded = {}
+    for branch, borrows in (("main", 7), ("north", 11)):
+        with shards.session(branch) as session:
+            session.add(DailyBookStat(day=old, book_id=10**6, borrows=borrows))
+            session.commit()
+            frame = frames.load(session, DailyBookStat, ["book_id", "borrows"], old, old)
+            loaded[branch] = frame["borrows"][frame["book_id"] == 10**6].tolist()
+
+    assert loaded == {"main": [7], "north": [11]}
+
+
+def test_rebuild_reaches_frames_cached_by_other_workers(db):
+    # A second frame cache stands in for another uvicorn worker
+    other_worker = RollupFrameCache()
+    old = date.today() - timedelta(days=400)
+    db.add(DailyBookStat(day=old, book_id=10**6 + 1, borrows=5))
+    db.commit()
+    assert other_worker.load(db, DailyBookStat, ["borrows"], old, old)["borrows"].tolist() == [5]
+
+    # No issues on that day, so the rebuild drops the row
+    rebuild_rollups(db, old, old)
+
+    assert other_worker.load(db, DailyBookStat, ["borrows"], old, old)["borrows"].tolist() == []
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.cache import SQLiteCacheBackend, TwoTierCache
+
+
+# Two caches over one SQLite file, each with its own backend connection,
+# stand in for two uvicorn workers on one host
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    return [TwoTierCache(SQLiteCacheBackend(path), poll_seconds=0) for _ in range(2)]
+
+
+def test_invalidation_reaches_the_other_worker(workers):
+    a, b = workers
+    a.set("books", "1", {"title": "Old"})
+    assert b.get("books", "1") == {"title": "Old"}
+
+    a.invalidate("books", "1")
+
+    assert b.get("books", "1") is None
+    assert a.get("books", "1") is None
+
+
+def test_namespace_invalidation_keeps_other_namespaces(workers):
+    a, b = workers
+    for key in ("1", "2"):
+        a.set("books", key, key)
+    a.set("users", "1", "kept")
+    assert [b.get("books", "1"), b.get("books", "2"), b.get("users", "1")] == ["1", "2", "kept"]
+
+    a.invalidate("books")
+
+    assert [b.get("books", "1"), b.get("books", "2")] == [None, None]
+    assert b.get("users", "1") == "kept"
+
+
+def test_local_tier_evicts_least_recently_used(tmp_path):
+    cache = TwoTierCache(SQLiteCacheBackend(str(tmp_path / "cache.sqlite3")), local_max_entries=2, poll_seconds=0)
+    for key in ("1", "2", "3"):
+        cache.set("books", key, key)
+
+    assert cache.stats()["local_entries"] == 2
+    # "1" fell out of the local tier but is still shared
+    assert cache.get("books", "1") == "1"
+    assert cache.get("books", "3") == "3"
+    stats = cache.stats()["namespaces"]["books"]
+    assert (stats["shared_hits"], stats["local_hits"]) == (1, 1)
+
+
+def test_stats_count_hits_misses_and_loads(workers):
+    a, _ = workers
+    assert a.get_or_load("books", "1", lambda: "loaded") == "loaded"
+    assert a.get_or_load("books", "1", lambda: "unused") == "loaded"
+    a.invalidate("books", "1")
+
+    stats = a.stats()
+    assert stats["backend"] == "SQLiteCacheBackend"
+    books = stats["namespaces"]["books"]
+    assert (books["lookups"], books["misses"], books["local_hits"]) == (2, 1, 1)
+    assert (books["hit_ratio"], books["invalidations"]) == (0.5, 1)
+
+
+def test_load_racing_an_invalidation_is_not_cached(workers):
+    a, b = workers
+
+    def loader():
+        # Another worker writes and invalidates after this load read the data
+        b.invalidate("books", "1")
+        return "stale"
+
+    assert a.get_or_load("books", "1", loader) == "stale"
+
+    assert a.get("books", "1") is None
+    assert b.get("books", "1") is None
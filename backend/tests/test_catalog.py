@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from app.core.catalog import catalog_for, prune_changes
+from app.models.catalog_change import CatalogChange
+
+from conftest import unique
+
+
+def test_category_writes_reach_the_snapshot(client, admin, user):
+    created = client.post("/categories/", json={"name": unique("cat")}, headers=admin).json()
+    assert created["id"] in {c["id"] for c in client.get("/categories/", headers=user).json()}
+
+    renamed = unique("renamed")
+    assert client.put(f"/categories/{created['id']}", json={"name": renamed}, headers=admin).status_code == 200
+    names = {c["id"]: c["name"] for c in client.get("/categories/", headers=user).json()}
+    assert names[created["id"]] == renamed
+
+    assert client.delete(f"/categories/{created['id']}", headers=admin).status_code == 200
+    assert created["id"] not in {c["id"] for c in client.get("/categories/", headers=user).json()}
+
+
+def test_category_with_books_cannot_be_deleted(client, admin, make_book):
+    book = make_book()
+    assert client.delete(f"/categories/{book['category_id']}", headers=admin).status_code == 400
+
+
+def test_prune_keeps_deletions_and_recent_changes(db):
+    old = datetime.utcnow() - timedelta(days=1)
+    stale = CatalogChange(entity="book", entity_id=10**6, created_at=old)
+    tombstone = CatalogChange(entity="book", entity_id=10**6 + 1, deleted=True, created_at=old)
+    fresh = CatalogChange(entity="book", entity_id=10**6 + 2)
+    db.add_all([stale, tombstone, fresh])
+    db.commit()
+
+    assert prune_changes(db, retention_seconds=3600) >= 1
+    left = {c.id for c in db.query(CatalogChange).filter(CatalogChange.entity_id >= 10**6)}
+    assert left == {tombstone.id, fresh.id}
+
+
+def test_idle_snapshot_reloads_instead_of_reading_a_pruned_log(client, admin, make_book, db):
+    book = make_book()
+    catalog = catalog_for(db)
+    catalog.sync(db, force=True)
+    assert book["id"] in catalog.books
+
+    # A worker that slept through a prune: its cursor is behind entries that are gone
+    catalog.books.pop(book["id"])
+    catalog.last_change_id = 0
+    db.query(CatalogChange).filter(CatalogChange.entity == "book", CatalogChange.entity_id == book["id"]).delete()
+    db.commit()
+
+    catalog.sync(db, force=True)
+    assert book["id"] not in catalog.books
+
+    catalog._applied_at -= 10**6
+    catalog.sync(db, force=True)
+    assert book["id"] in catalog.books
@@ -0,0 +1,41 @@
+import inspect
+
+from app.core.events import broker
+from app.routes.admin_routes import require_stream_admin
+
+
+def test_stream_auth_runs_off_the_event_loop():
+    # FastAPI runs plain def dependencies in the threadpool
+    assert not inspect.iscoroutinefunction(require_stream_admin)
+
+
+def test_stream_rejects_non_admins(client, user):
+    assert client.get("/admin/events", headers=user).status_code == 403
+    assert client.get("/admin/events").status_code == 401
+
+
+class _Recorder:
+
+    def __init__(self):
+        self.events = []
+
+    def attach(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event: dict):
+        self.events.append(event)
+
+
+def test_issue_events_name_their_branch(client, north_admin, make_user, make_book):
+    book = make_book(copies=1, headers=north_admin)
+    reader = make_user("north")
+    recorder, original = _Recorder(), broker.backend
+    broker.set_backend(recorder)
+    try:
+        assert client.post(f"/issues/request-issue/{book['id']}", headers=reader).status_code == 200
+    finally:
+        broker.set_backend(original)
+
+    requested = [e for e in recorder.events if e["type"] == "issue.requested"]
+    assert [e["data"]["branch"] for e in requested] == ["north"]
+    assert requested[0]["data"]["book_id"] == book["id"]
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from app.core.fines import FineRules, fine_for
+
+AS_OF = date(2025, 3, 31)
+
+
+def _old_fine(issue_date: date, as_of: date) -> int:
+    # The fine before per-category policies
+    return max(0, ((as_of - issue_date).days - 7) * 10)
+
+
+def test_default_policy_matches_the_old_formula():
+    issue_dates = [AS_OF - timedelta(days=d) for d in (0, 1, 6, 7, 8, 10, 30, 365)]
+    category_ids = [None, 1, 2, None, 3, 1, None, 4]
+
+    overdue, fines = FineRules([], []).evaluate(issue_dates, category_ids, AS_OF)
+
+    assert fines.tolist() == [_old_fine(d, AS_OF) for d in issue_dates]
+    assert overdue.tolist() == [max(0, (AS_OF - d).days - 7) for d in issue_dates]
+
+
+def test_category_policy_overrides_the_default():
+    rules = FineRules([{
+        "category_id": 5, "loan_days": 14, "grace_days": 2,
+        "daily_rate": 5, "max_fine": 40, "skip_holidays": True,
+    }], [])
+    issued = AS_OF - timedelta(days=20)
+
+    _, fines = rules.evaluate([issued, issued, AS_OF - timedelta(days=60)], [5, 6, 5], AS_OF)
+
+    # 6 days late, 2 forgiven, 5 a day; other categories keep the default;
+    # long overdue loans stop at the cap
+    assert fines.tolist() == [20, _old_fine(issued, AS_OF), 40]
+
+
+def test_holidays_are_not_charged():
+    rules = FineRules([], [(AS_OF - timedelta(days=1)).isoformat()])
+    issued = AS_OF - timedelta(days=10)
+
+    overdue, fines = rules.evaluate([issued], [None], AS_OF)
+
+    assert (overdue.tolist(), fines.tolist()) == ([3], [20])
+
+
+def test_policy_edits_reach_fine_for(client, admin, make_book, db):
+    category_id = make_book()["category_id"]
+    issued = AS_OF - timedelta(days=10)
+    assert fine_for(db, issued, category_id, AS_OF) == 30
+
+    policy = client.put("/admin/fines/policies", json={
+        "category_id": category_id, "loan_days": 7, "daily_rate": 1, "skip_holidays": False,
+    }, headers=admin)
+    assert policy.status_code == 200
+    assert fine_for(db, issued, category_id, AS_OF) == 3
+
+    assert client.delete(f"/admin/fines/policies/{policy.json()['id']}", headers=admin).status_code == 200
+    assert fine_for(db, issued, category_id, AS_OF) == 30
@@ -0,0 +1,83 @@
+from app.models.hold import Hold
+from app.models.issue import Issue
+
+from conftest import user_id
+
+
+def _open_issue(db, headers, book_id):
+    db.expire_all()
+    return db.query(Issue)\
+        .filter(Issue.user_id == user_id(headers), Issue.book_id == book_id, Issue.issue_rejected == False)\
+        .first()
+
+
+def _checked_out(client, admin, make_user, book):
+    # One reader has the only copy
+    reader = make_user()
+    assert client.post(f"/issues/request-issue/{book['id']}", headers=reader).status_code == 200
+    pending = client.get("/issues/admin/pending-issues", headers=admin).json()
+    issue_id = next(i["id"] for i in pending if i["book"]["id"] == book["id"])
+    assert client.put(f"/issues/admin/approve-issue/{issue_id}", headers=admin).status_code == 200
+    return reader, issue_id
+
+
+def _return(client, admin, reader, issue_id):
+    assert client.put(f"/issues/request-return/{issue_id}", headers=reader).status_code == 200
+    assert client.put(f"/issues/admin/approve-return/{issue_id}", headers=admin).status_code == 200
+
+
+def test_return_promotes_front_of_queue(client, admin, make_user, make_book, db):
+    book = make_book(copies=1)
+    reader, issue_id = _checked_out(client, admin, make_user, book)
+    first, second = make_user(), make_user()
+    assert client.post(f"/holds/{book['id']}", headers=first).status_code == 200
+    assert client.post(f"/holds/{book['id']}", headers=second).status_code == 200
+
+    _return(client, admin, reader, issue_id)
+
+    assert _open_issue(db, first, book["id"]).issue_requested
+    assert _open_issue(db, second, book["id"]) is None
+
+
+def test_rejected_promotion_moves_to_next_hold(client, admin, make_user, make_book, db):
+    book = make_book(copies=1)
+    reader, issue_id = _checked_out(client, admin, make_user, book)
+    first, second = make_user(), make_user()
+    client.post(f"/holds/{book['id']}", headers=first)
+    client.post(f"/holds/{book['id']}", headers=second)
+    _return(client, admin, reader, issue_id)
+
+    promoted = _open_issue(db, first, book["id"])
+    assert client.put(f"/issues/admin/reject-issue/{promoted.id}", headers=admin).status_code == 200
+
+    following = _open_issue(db, second, book["id"])
+    assert following is not None and following.issue_requested
+    assert client.put(f"/issues/admin/approve-issue/{following.id}", headers=admin).status_code == 200
+    assert client.get(f"/holds/admin/book/{book['id']}", headers=admin).json() == []
+
+
+def test_rejection_with_empty_queue_reopens_requests(client, admin, make_user, make_book, db):
+    book = make_book(copies=1)
+    reader, issue_id = _checked_out(client, admin, make_user, book)
+    waiting = make_user()
+    client.post(f"/holds/{book['id']}", headers=waiting)
+    _return(client, admin, reader, issue_id)
+
+    promoted = _open_issue(db, waiting, book["id"])
+    client.put(f"/issues/admin/reject-issue/{promoted.id}", headers=admin)
+
+    assert client.post(f"/issues/request-issue/{book['id']}", headers=make_user()).status_code == 200
+
+
+def test_cancelled_hold_hands_free_copy_to_next(client, make_user, make_book, db):
+    # A free copy with a queue in front of it and no pending request
+    book = make_book(copies=1)
+    first, second = make_user(), make_user()
+    front = Hold(user_id=user_id(first), book_id=book["id"])
+    db.add_all([front, Hold(user_id=user_id(second), book_id=book["id"])])
+    db.commit()
+    assert client.post(f"/issues/request-issue/{book['id']}", headers=make_user()).status_code == 400
+
+    assert client.delete(f"/holds/{front.id}", headers=first).status_code == 200
+
+    assert _open_issue(db, second, book["id"]).issue_requested
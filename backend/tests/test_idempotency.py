@@ -0,0 +1,165 @@
+import asyncio
+
+from app.core.idempotency import DatabaseIdempotencyStore, IdempotencyMiddleware
+from app.database import SessionLocal
+from app.models.issue import Issue
+
+from conftest import unique, user_id
+
+
+def _issues(db, headers, book_id):
+    db.expire_all()
+    return db.query(Issue)\
+        .filter(Issue.user_id == user_id(headers), Issue.book_id == book_id)\
+        .count()
+
+
+def test_retry_replays_first_response(client, user, make_book, db):
+    book = make_book(copies=2)
+    headers = {**user, "Idempotency-Key": unique("key")}
+
+    first = client.post(f"/issues/request-issue/{book['id']}", headers=headers)
+    retry = client.post(f"/issues/request-issue/{book['id']}", headers=headers)
+
+    assert first.status_code == 200
+    assert retry.status_code == first.status_code
+    assert retry.json() == first.json()
+    assert retry.headers.get("idempotent-replayed") == "true"
+    assert _issues(db, user, book["id"]) == 1
+
+
+def test_new_key_runs_the_handler_again(client, make_user, make_book, db):
+    book = make_book(copies=2)
+    reader = make_user()
+
+    first = client.post(f"/issues/request-issue/{book['id']}", headers={**reader, "Idempotency-Key": unique("key")})
+    second = client.post(f"/issues/request-issue/{book['id']}", headers={**reader, "Idempotency-Key": unique("key")})
+
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in second.headers
+    assert _issues(db, reader, book["id"]) == 1
+
+
+def test_key_is_scoped_to_the_caller(client, make_user, make_book, db):
+    book = make_book(copies=2)
+    key = unique("key")
+    one, two = make_user(), make_user()
+
+    assert client.post(f"/issues/request-issue/{book['id']}", headers={**one, "Idempotency-Key": key}).status_code == 200
+    other = client.post(f"/issues/request-issue/{book['id']}", headers={**two, "Idempotency-Key": key})
+
+    assert other.status_code == 200
+    assert "idempotent-replayed" not in other.headers
+    assert _issues(db, two, book["id"]) == 1
+
+
+def test_reused_key_with_different_body_is_rejected(client, admin, make_book):
+    book = make_book(copies=1)
+    headers = {**admin, "Idempotency-Key": unique("key")}
+
+    assert client.put(f"/books/{book['id']}", json={"title": unique("Title")}, headers=headers).status_code == 200
+    changed = client.put(f"/books/{book['id']}", json={"title": unique("Title")}, headers=headers)
+
+    assert changed.status_code == 422
+    assert "different request body" in changed.json()["detail"]
+
+
+# ---------------- ACROSS WORKERS ----------------
+# Two middleware instances over one DatabaseIdempotencyStore stand in for two
+# uvicorn workers: they share the claim rows but not the in-process futures.
+
+def _worker(app, wait_seconds: float = 5):
+    return IdempotencyMiddleware(app, store=DatabaseIdempotencyStore(SessionLocal), wait_seconds=wait_seconds)
+
+
+async def _call(middleware, key: bytes) -> dict:
+    scope = {
+        "type": "http", "method": "POST", "path": "/issues/request-issue/1", "query_string": b"",
+        "headers": [(b"authorization", b"Bearer test"), (b"idempotency-key", key)],
+    }
+    sent = {"headers": {}, "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+            sent["headers"] = dict(message["headers"])
+        else:
+            sent["body"] += message.get("body", b"")
+
+    await middleware(scope, receive, send)
+    return sent
+
+
+def _handler(status: int = 200):
+    calls = []
+    finish = asyncio.Event()
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        await finish.wait()
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": f'{{"run": {len(calls)}}}'.encode()})
+
+    return app, calls, finish
+
+
+def test_duplicate_in_another_worker_waits_for_the_first_response():
+    async def scenario():
+        app, calls, finish = _handler()
+        key = unique("key").encode()
+        first = asyncio.create_task(_call(_worker(app), key))
+        await asyncio.sleep(0.2)
+        second = asyncio.create_task(_call(_worker(app), key))
+        await asyncio.sleep(0.3)
+        finish.set()
+        return calls, await first, await second
+
+    calls, first, second = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert first["status"] == second["status"] == 200
+    assert second["body"] == first["body"]
+    assert second["headers"].get(b"idempotent-replayed") == b"true"
+
+
+def test_duplicate_gives_up_with_409_while_the_first_still_runs():
+    async def scenario():
+        app, calls, finish = _handler()
+        key = unique("key").encode()
+        first = asyncio.create_task(_call(_worker(app), key))
+        await asyncio.sleep(0.2)
+        second = await _call(_worker(app, wait_seconds=0.3), key)
+        finish.set()
+        await first
+        return calls, second
+
+    calls, second = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert second["status"] == 409
+
+
+def test_failed_request_releases_its_claim():
+    async def scenario():
+        app, calls, finish = _handler(status=503)
+        finish.set()
+        key = unique("key").encode()
+        await _call(_worker(app), key)
+        retry = await _call(_worker(app), key)
+        return calls, retry
+
+    calls, retry = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert b"idempotent-replayed" not in retry["headers"]
+
+
+def test_claim_of_a_dead_worker_is_taken_over():
+    key = unique("key")
+    assert DatabaseIdempotencyStore(SessionLocal, claim_seconds=0).claim(key, "fp")
+    store = DatabaseIdempotencyStore(SessionLocal)
+    assert store.claim(key, "fp")
+    assert not store.claim(key, "fp")
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.inventory import remove_copy
+from app.database import shards
+from app.models.book import Book
+from app.models.book_copy import BookCopy
+from app.models.issue import Issue
+from app.models.user import User
+from app.routes.book_routes import update_book
+from app.routes.issue_routes import approve_issue
+from app.schemas.book_schema import BookUpdate
+
+from conftest import unique, user_id
+
+
+def test_copy_counters_do_not_lose_concurrent_updates(client, admin, make_book, db):
+    book = make_book(copies=1)
+    stale = db.query(Book).filter(Book.id == book["id"]).one()
+    assert stale.total_copies == 1
+
+    # Another request adds two copies after this session read the book
+    barcodes = [unique("bc"), unique("bc")]
+    response = client.post(f"/books/{book['id']}/copies", json=[{"barcode": b} for b in barcodes], headers=admin)
+    assert response.status_code == 200
+
+    copy = db.query(BookCopy).filter(BookCopy.barcode == barcodes[0]).one()
+    remove_copy(db, stale, copy)
+    db.commit()
+
+    with shards.session("main") as fresh:
+        row = fresh.query(Book).filter(Book.id == book["id"]).one()
+        assert (row.total_copies, row.available_copies) == (2, 2)
+
+
+def _take_last_copy(book_id):
+    # Another request hands out the last copy after the test session read the book
+    with shards.session("main") as other:
+        other.query(Book).filter(Book.id == book_id).update({Book.available_copies: 0})
+        other.commit()
+
+
+def test_approval_cannot_hand_out_a_copy_that_is_gone(client, admin, user, make_book, db):
+    book = make_book(copies=1)
+    assert client.post(f"/issues/request-issue/{book['id']}", headers=user).status_code == 200
+    issue_id = next(i["id"] for i in client.get("/issues/admin/pending-issues", headers=admin).json()
+                    if i["book"]["id"] == book["id"])
+
+    stale = db.query(Book).filter(Book.id == book["id"]).one()
+    assert stale.available_copies == 1
+    _take_last_copy(book["id"])
+
+    with pytest.raises(HTTPException) as rejected:
+        approve_issue(issue_id, db=db, current_user=db.get(User, user_id(admin)))
+    assert rejected.value.status_code == 400
+    db.rollback()
+
+    with shards.session("main") as fresh:
+        assert fresh.query(Book.available_copies).filter(Book.id == book["id"]).scalar() == 0
+        assert not fresh.get(Issue, issue_id).issue_approved
+
+
+def test_total_copies_edit_keeps_concurrent_loans(client, admin, make_book, db):
+    book = make_book(copies=1)
+    stale = db.query(Book).filter(Book.id == book["id"]).one()
+    assert stale.available_copies == 1
+    _take_last_copy(book["id"])
+
+    update_book(book["id"], BookUpdate(total_copies=2), db=db, current_user=db.get(User, user_id(admin)))
+
+    with shards.session("main") as fresh:
+        row = fresh.query(Book).filter(Book.id == book["id"]).one()
+        assert (row.total_copies, row.available_copies) == (2, 1)
@@ -0,0 +1,100 @@
+import uuid
+from datetime import date
+
+from app.core.inventory import tracked_available
+from app.core.kiosk import SYNC_COLUMNS
+from app.models.book import Book
+from app.models.book_copy import BookCopy
+from app.models.issue import Issue
+
+from conftest import KIOSK_KEY, unique, user_id
+
+
+def _entry(op, issue_id, user, book, **payload):
+    return {
+        "key": uuid.uuid4().hex, "op": op, "issue_id": issue_id,
+        "payload": {"issue_id": issue_id, "user_id": user, "book_id": book["id"],
+                    "issue_date": date.today().isoformat(), **payload},
+    }
+
+
+def _push(client, admin, entries):
+    response = client.post("/sync/push", json={"entries": entries}, headers={**admin, **KIOSK_KEY})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+
+def _pending_issue(client, admin, reader, book):
+    client.post(f"/issues/request-issue/{book['id']}", headers=reader)
+    pending = client.get("/issues/admin/pending-issues", headers=admin).json()
+    return next(i["id"] for i in pending if i["book"]["id"] == book["id"])
+
+
+def test_sync_needs_the_branch_kiosk_key(client, admin, user, north_admin):
+    assert client.get("/sync/pull/users", headers=admin).status_code == 403
+    assert client.get("/sync/pull/users", headers={**admin, "X-Kiosk-Key": "wrong"}).status_code == 403
+    assert client.get("/sync/pull/users", headers={**user, **KIOSK_KEY}).status_code == 403
+    # No key configured for north: its admin cannot sync at all
+    assert client.get("/sync/pull/users", headers={**north_admin, **KIOSK_KEY}).status_code == 403
+    assert client.post("/sync/push", json={"entries": []}, headers=admin).status_code == 403
+
+
+def test_users_pull_ships_login_columns_only(client, admin):
+    response = client.get("/sync/pull/users", headers={**admin, **KIOSK_KEY})
+    assert response.status_code == 200
+    rows = response.json()["rows"]
+    assert rows and all(set(row) == set(SYNC_COLUMNS["users"]) for row in rows)
+
+
+def test_kiosk_hand_out_books_a_barcoded_copy(client, admin, make_user, make_book, db):
+    book = make_book(copies=0)
+    client.post(f"/books/{book['id']}/copies", json=[{"barcode": unique("bc")}], headers=admin)
+    reader = make_user()
+    issue_id = _pending_issue(client, admin, reader, book)
+
+    [result] = _push(client, admin, [_entry("issue.approved", issue_id, user_id(reader), book)])
+
+    assert result["status"] == "applied"
+    db.expire_all()
+    issue = db.get(Issue, issue_id)
+    assert issue.copy_id is not None
+    assert db.get(BookCopy, issue.copy_id).available is False
+    stock = db.get(Book, book["id"]).available_copies
+    assert stock == tracked_available(db, book["id"]) == 0
+
+
+def test_replayed_batch_is_answered_from_receipts(client, admin, make_user, make_book, db):
+    book = make_book(copies=2)
+    reader = make_user()
+    issue_id = _pending_issue(client, admin, reader, book)
+    entries = [_entry("issue.approved", issue_id, user_id(reader), book)]
+
+    first = _push(client, admin, entries)
+    again = _push(client, admin, entries)
+
+    assert first == again and first[0]["status"] == "applied"
+    db.expire_all()
+    assert db.get(Book, book["id"]).available_copies == 1
+
+
+def test_physical_events_win_and_decisions_lose(client, admin, make_user, make_book, db):
+    book = make_book(copies=1)
+    reader = make_user()
+    issue_id = _pending_issue(client, admin, reader, book)
+    client.put(f"/issues/admin/approve-issue/{issue_id}", headers=admin)
+
+    # Kiosk rejected the same request while offline: central's approval stands
+    [rejected] = _push(client, admin, [_entry("issue.rejected", issue_id, user_id(reader), book)])
+    assert rejected["status"] == "conflict"
+
+    # Offline request for a book the reader already has at central: merged into that issue
+    [merged] = _push(client, admin, [_entry("issue.requested", -1, user_id(reader), book)])
+    assert (merged["status"], merged["issue_id"]) == ("conflict", issue_id)
+
+    # Book handed back at the kiosk: applied even though central never saw a return request
+    [returned] = _push(client, admin, [_entry("return.approved", issue_id, user_id(reader), book,
+                                              return_date=date.today().isoformat())])
+    assert returned["status"] == "applied"
+    db.expire_all()
+    assert db.get(Issue, issue_id).return_approved
+    assert db.get(Book, book["id"]).available_copies == 1
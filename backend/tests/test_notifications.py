@@ -0,0 +1,76 @@
+from datetime import date, datetime, timedelta
+
+from app.core.notifications import send_due_notifications
+from app.database import shards
+from app.models.issue import Issue
+from app.models.notification import NotificationLog
+
+
+class RecordingSender:
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, messages):
+        self.sent += messages
+        return [True] * len(messages)
+
+
+def _run(sender):
+    return send_due_notifications(
+        session_factory=shards.sessions["main"], sender=sender, pause_seconds=0, max_per_second=0
+    )
+
+
+def _overdue_loan(client, admin, make_user, make_book, db) -> int:
+    book = make_book()
+    reader = make_user()
+    client.post(f"/issues/request-issue/{book['id']}", headers=reader)
+    pending = client.get("/issues/admin/pending-issues", headers=admin).json()
+    issue_id = next(i["id"] for i in pending if i["book"]["id"] == book["id"])
+    client.put(f"/issues/admin/approve-issue/{issue_id}", headers=admin)
+
+    db.query(Issue).filter(Issue.id == issue_id).update({Issue.issue_date: date.today() - timedelta(days=30)})
+    db.commit()
+    return issue_id
+
+
+def _sent_for(sender, issue_id):
+    return [m for m in sender.sent if m["issue_id"] == issue_id]
+
+
+def test_notice_is_claimed_once_and_not_resent(client, admin, make_user, make_book, db):
+    issue_id = _overdue_loan(client, admin, make_user, make_book, db)
+
+    first = RecordingSender()
+    _run(first)
+    [notice] = _sent_for(first, issue_id)
+    assert notice["kind"] == "overdue"
+
+    second = RecordingSender()
+    _run(second)
+    assert _sent_for(second, issue_id) == []
+    db.expire_all()
+    assert [row.status for row in db.query(NotificationLog).filter(NotificationLog.issue_id == issue_id)] == ["sent"]
+
+
+def test_stale_claim_from_a_dead_run_is_taken_over(client, admin, make_user, make_book, db):
+    stale_id = _overdue_loan(client, admin, make_user, make_book, db)
+    busy_id = _overdue_loan(client, admin, make_user, make_book, db)
+    for issue_id, claimed_at in ((stale_id, datetime.utcnow() - timedelta(days=1)), (busy_id, datetime.utcnow())):
+        db.add(NotificationLog(
+            issue_id=issue_id, user_id=0, kind="overdue", stage=3,
+            due_date=date.today(), status="claimed", created_at=claimed_at,
+        ))
+    db.commit()
+
+    sender = RecordingSender()
+    _run(sender)
+
+    # The dead run's claim is sent now; one claimed moments ago is left to its run
+    assert len(_sent_for(sender, stale_id)) == 1
+    assert _sent_for(sender, busy_id) == []
+    db.expire_all()
+    statuses = {row.issue_id: row.status for row in db.query(NotificationLog)
+                .filter(NotificationLog.issue_id.in_([stale_id, busy_id]))}
+    assert statuses == {stale_id: "sent", busy_id: "claimed"}
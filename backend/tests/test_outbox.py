@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from app.core.outbox import dispatchers, enqueue
+from app.models.outbox import OutboxEvent, OutboxReceipt
+
+
+def test_dispatcher_delivers_pending_events(client, make_user, make_book, db):
+    book = make_book()
+    client.post(f"/issues/request-issue/{book['id']}", headers=make_user())
+
+    while dispatchers["main"].drain_once():
+        pass
+
+    db.expire_all()
+    assert db.query(OutboxEvent).filter(OutboxEvent.dispatched == False, OutboxEvent.dead == False).count() == 0
+
+
+def test_sweep_deletes_only_old_dispatched_events(db):
+    old = datetime.utcnow() - timedelta(days=30)
+    for kind in ("swept", "recent", "dead"):
+        enqueue(db, f"test.{kind}", None, {})
+    db.flush()
+    swept, recent, dead = db.query(OutboxEvent).order_by(OutboxEvent.id.desc()).limit(3).all()[::-1]
+    swept.dispatched, swept.dispatched_at = True, old
+    recent.dispatched, recent.dispatched_at = True, datetime.utcnow()
+    dead.dead, dead.created_at = True, old
+    db.add(OutboxReceipt(handler="test", idempotency_key=swept.idempotency_key, processed_at=old))
+    db.commit()
+    ids = {swept.id, recent.id, dead.id}
+    kept = {recent.id, dead.id}
+    swept_key = swept.idempotency_key
+
+    assert dispatchers["main"].sweep(retention_seconds=24 * 3600) >= 1
+
+    db.expire_all()
+    assert {e.id for e in db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids))} == kept
+    assert db.query(OutboxReceipt).filter(OutboxReceipt.idempotency_key == swept_key).count() == 0
@@ -0,0 +1,38 @@
+import marshal
+
+from app.core.profiling import request_profiler
+
+
+def test_cost_per_call_is_measured_at_startup(client):
+    # install_request_profiling() ran when the app was imported, not in a request
+    assert request_profiler._cost_per_call_ns is not None
+
+
+def test_non_admin_profile_header_is_ignored(client, user):
+    profiled = request_profiler.profiled
+
+    response = client.get("/books/", headers={**user, "X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert "x-profile" not in response.headers
+    assert request_profiler.profiled == profiled
+
+
+def test_admin_capture_can_be_downloaded(client, admin):
+    response = client.get("/books/", headers={**admin, "X-Profile": "1"})
+    assert response.status_code == 200
+    capture_id = response.headers["x-profile-id"]
+    assert float(response.headers["x-profile-wall-ms"]) >= 0
+
+    text = client.get(f"/admin/metrics/profile/requests/{capture_id}", headers=admin)
+    assert text.status_code == 200
+    assert "function calls" in text.text
+
+    raw = client.get(f"/admin/metrics/profile/requests/{capture_id}", params={"format": "prof"}, headers=admin)
+    assert raw.status_code == 200
+    assert marshal.loads(raw.content)
+
+    recent = client.get("/admin/metrics/profile/requests", headers=admin).json()["recent"]
+    assert recent[0]["id"] == int(capture_id)
+    assert recent[0]["path"] == "/books/"
@@ -0,0 +1,89 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from jose import jwt
+
+from app.core.provisioning import import_roster, shared_hash_pool, shutdown_hash_pool
+from app.models.user import User
+
+from conftest import PASSWORD, unique
+
+
+def _email(headers: dict) -> str:
+    return jwt.get_unverified_claims(headers["Authorization"].split()[1])["sub"]
+
+
+def _import(db, rows: list[tuple], chunk_size: int = 1000) -> dict:
+    roster = "username,email,password\n" + "".join(f"{u},{e},{p}\n" for u, e, p in rows)
+    # Threads instead of the spawned hash processes keep the test fast
+    with ThreadPoolExecutor(2) as executor:
+        return import_roster(db, io.StringIO(roster), chunk_size=chunk_size, executor=executor)
+
+
+def _name() -> tuple[str, str]:
+    name = unique("r")
+    return name, f"{name}@example.com"
+
+
+def test_duplicates_within_the_roster_are_reported_per_line(db):
+    (first, first_email), (second, second_email) = _name(), _name()
+    result = _import(db, [
+        (first, first_email, PASSWORD),
+        (unique("r"), first_email.upper(), PASSWORD),
+        (first, second_email, PASSWORD),
+        (second, second_email, PASSWORD),
+    ])
+
+    assert result["created"] == 2
+    assert [(e["line"], e["error"]) for e in result["errors"]] == [
+        (3, "Duplicate email in roster"),
+        (4, "Duplicate username in roster"),
+    ]
+    assert db.query(User).filter(User.username.in_([first, second])).count() == 2
+
+
+def test_duplicates_across_chunks_are_caught(db):
+    name, email = _name()
+    result = _import(db, [(name, email, PASSWORD), (*_name(), PASSWORD), (unique("r"), email, PASSWORD)], chunk_size=2)
+
+    assert result["created"] == 2
+    assert [(e["line"], e["error"]) for e in result["errors"]] == [(4, "Duplicate email in roster")]
+
+
+def test_existing_accounts_on_any_shard_are_rejected(client, db, make_user):
+    north_email = _email(make_user("north"))
+    main_username = _email(make_user()).split("@")[0]
+    result = _import(db, [
+        (unique("r"), north_email, PASSWORD),
+        (main_username, _name()[1], PASSWORD),
+    ])
+
+    assert result["created"] == 0
+    assert [(e["line"], e["error"]) for e in result["errors"]] == [
+        (2, "Email already registered"),
+        (3, "Username already taken"),
+    ]
+
+
+def test_invalid_rows_are_skipped_and_the_rest_created(db):
+    name, email = _name()
+    result = _import(db, [
+        (unique("r"), "not-an-email", PASSWORD),
+        (unique("r"), _name()[1], "short"),
+        (name, email, PASSWORD),
+    ])
+
+    assert result["created"] == 1
+    assert [e["line"] for e in result["errors"]] == [2, 3]
+    assert "email" in result["errors"][0]["error"]
+    assert "password" in result["errors"][1]["error"]
+
+
+def test_imports_share_one_hash_pool():
+    pool = shared_hash_pool()
+    assert shared_hash_pool() is pool
+
+    shutdown_hash_pool()
+
+    assert shared_hash_pool() is not pool
+    shutdown_hash_pool()
@@ -0,0 +1,47 @@
+import pytest
+
+from app.core.query_budget import budget_for, count_queries, max_queries
+from app.database import shards
+from app.routes import admin_routes, category_routes
+
+
+@pytest.fixture
+def busy_library(client, admin, make_user, make_book):
+    # Several rows per list, so a lazy load per row would blow the budget
+    for _ in range(3):
+        book = make_book(copies=2)
+        reader = make_user()
+        client.post(f"/issues/request-issue/{book['id']}", headers=reader)
+        client.post(f"/issues/request-issue/{book['id']}", headers=make_user())
+
+        pending = client.get("/issues/admin/pending-issues", headers=admin).json()
+        issue_id = next(i["id"] for i in pending if i["book"]["id"] == book["id"])
+        client.put(f"/issues/admin/approve-issue/{issue_id}", headers=admin)
+        client.put(f"/issues/request-return/{issue_id}", headers=reader)
+
+
+@pytest.mark.parametrize("path, endpoint", [
+    ("/admin/dashboard/pending-issues", admin_routes.pending_issue_requests),
+    ("/admin/dashboard/pending-returns", admin_routes.pending_return_requests),
+    ("/admin/dashboard/books", admin_routes.book_inventory),
+    ("/categories/", category_routes.get_categories),
+])
+def test_endpoint_stays_within_its_query_budget(client, admin, busy_library, path, endpoint):
+    with max_queries(budget_for(endpoint), all_threads=True):
+        response = client.get(path, headers=admin)
+    assert response.status_code == 200
+    assert len(response.json()) >= 3
+
+
+def test_summary_budget_counts_every_shard_it_fans_out_to(client, admin, busy_library):
+    admin_routes.cache.invalidate("admin_dashboard")
+    budget = budget_for(admin_routes.admin_dashboard_summary)
+
+    with max_queries(budget, all_threads=True):
+        assert client.get("/admin/dashboard/summary", headers=admin).status_code == 200
+
+    # Per request too (not only all_threads): fan-out workers inherit the request's counter
+    admin_routes.cache.invalidate("admin_dashboard")
+    with count_queries() as counter:
+        admin_routes._all_branches_summary()
+    assert counter.count == len(shards.engines)
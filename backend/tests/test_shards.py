@@ -0,0 +1,78 @@
+from jose import jwt
+
+from app.core.cache import cache
+from app.core.jwt import create_access_token
+from app.database import shards
+from app.models.book import Book
+from app.models.issue import Issue
+from app.models.user import User
+from app.routes.admin_routes import SUMMARY_FIELDS, _dashboard_summary
+
+from conftest import user_id
+
+
+def _claims(headers: dict) -> dict:
+    return jwt.get_unverified_claims(headers["Authorization"].split()[1])
+
+
+def _titles(client, headers, title: str) -> list[str]:
+    response = client.get("/books", params={"search": title}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [b["title"] for b in response.json()["data"]]
+
+
+def test_north_user_is_routed_to_the_north_shard(client, north_admin, make_user, make_book):
+    reader = make_user("north")
+    email = _claims(reader)["sub"]
+    assert _claims(reader)["branch"] == "north"
+
+    book = make_book(copies=1, headers=north_admin)
+    assert client.post(f"/issues/request-issue/{book['id']}", headers=reader).status_code == 200
+
+    with shards.session("north") as north, shards.session("main") as main:
+        assert north.query(User).filter(User.email == email).count() == 1
+        assert main.query(User).filter(User.email == email).count() == 0
+        assert north.query(Book).filter(Book.title == book["title"]).count() == 1
+        assert main.query(Book).filter(Book.title == book["title"]).count() == 0
+        assert north.query(Issue).filter(Issue.user_id == user_id(reader), Issue.book_id == book["id"]).one().branch == "north"
+
+
+def test_books_and_issues_do_not_leak_between_branches(client, admin, north_admin, make_user, make_book):
+    main_book = make_book(copies=1)
+    north_book = make_book(copies=1, headers=north_admin)
+    main_reader, north_reader = make_user(), make_user("north")
+
+    assert _titles(client, main_reader, north_book["title"]) == []
+    assert _titles(client, north_reader, main_book["title"]) == []
+    assert _titles(client, north_reader, north_book["title"]) == [north_book["title"]]
+
+    client.post(f"/issues/request-issue/{north_book['id']}", headers=north_reader)
+    pending_main = client.get("/issues/admin/pending-issues", headers=admin).json()
+    pending_north = client.get("/issues/admin/pending-issues", headers=north_admin).json()
+    assert north_book["title"] not in [i["book"]["title"] for i in pending_main]
+    assert north_book["title"] in [i["book"]["title"] for i in pending_north]
+
+
+def test_unknown_branch_claim_is_rejected(client, user):
+    # Validly signed, but for a branch with no shard
+    forged = create_access_token(data={**_claims(user), "branch": "nowhere"})
+
+    response = client.get("/books", headers={"Authorization": f"Bearer {forged}"})
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Unknown branch"
+
+
+def test_summary_sums_every_branch(client, admin, north_admin, make_book):
+    make_book(copies=1, headers=north_admin)
+    cache.invalidate("admin_dashboard")
+
+    summary = client.get("/admin/dashboard/summary", headers=admin).json()
+
+    expected = {}
+    for branch in shards.branches():
+        with shards.session(branch) as session:
+            expected[branch] = _dashboard_summary(session)
+    assert summary["branches"] == expected
+    for field in SUMMARY_FIELDS:
+        assert summary[field] == sum(counts[field] for counts in expected.values())
@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react';
 import { Container, Typography, Grid, Card, CardContent } from '@mui/material';
 import { useAuth } from '../context/AuthContext';
-import { getUserDashboard, getAdminSummary } from '../services/api';
+import { getUserDashboard, getAdminSummary, subscribeAdminEvents } from '../services/api';
 
 function Dashboard() {
   const { user } = useAuth();
@@ -16,7 +16,49 @@ function Dashboard() {
         console.error(err);
       }
     };
-    fetchData();
+
+    if (user.role !== 'ADMIN') {
+      fetchData();
+      return undefined;
+    }
+
+    // Subscribe first, then load: a delta that lands while the load is in
+    // flight may or may not be in its result, so load again until one
+    // completes without any.
+    let loading = false;
+    let dirty = false;
+    const load = async () => {
+      if (loading) {
+        dirty = true;
+        return;
+      }
+      loading = true;
+      do {
+        dirty = false;
+        await fetchData();
+      } while (dirty);
+      loading = false;
+    };
+
+    return subscribeAdminEvents((type, event) => {
+      if (loading || type === 'resync') {
+        load();
+        return;
+      }
+      setData((prev) => {
+        const next = { ...prev };
+        // Issue ids repeat across shards; the branch says which one changed
+        const branch = event.data && event.data.branch;
+        const branches = { ...(prev.branches || {}) };
+        if (branch) branches[branch] = { ...(branches[branch] || {}) };
+        Object.entries(event.deltas || {}).forEach(([key, delta]) => {
+          next[key] = (next[key] || 0) + delta;
+          if (branch) branches[branch][key] = (branches[branch][key] || 0) + delta;
+        });
+        next.branches = branches;
+        return next;
+      });
+    }, load);
   }, [user]);
 
   return (
@@ -36,6 +36,79 @@ export const registerUser = (data) =>
 export const getAdminSummary = () =>
   api.get("/admin/dashboard/summary");
 
+/*
+  Admin live events (SSE). EventSource cannot send the bearer token,
+  so the stream is read with fetch. onOpen runs once the server has
+  subscribed us (first chunk received), on every (re)connect. A stream
+  that ends or fails is reopened with exponential backoff.
+  Returns an unsubscribe function.
+*/
+export const subscribeAdminEvents = (onEvent, onOpen) => {
+  const controller = new AbortController();
+  let delay = 1000;
+
+  const run = async () => {
+    const response = await fetch(`${api.defaults.baseURL}/admin/events`, {
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+      signal: controller.signal,
+    });
+    if (response.status === 401 || response.status === 403) {
+      const err = new Error("Not allowed to subscribe");
+      err.fatal = true;
+      throw err;
+    }
+    if (!response.ok) throw new Error(`Event stream failed: ${response.status}`);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let opened = false;
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      if (!opened) {
+        opened = true;
+        delay = 1000;
+        if (onOpen) onOpen();
+      }
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let type = "message";
+        let data = "";
+        chunk.split("\n").forEach((line) => {
+          if (line.startsWith("event: ")) type = line.slice(7);
+          if (line.startsWith("data: ")) data += line.slice(6);
+        });
+        if (data) onEvent(type, JSON.parse(data));
+      }
+    }
+  };
+
+  const loop = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        await run();
+      } catch (err) {
+        if (err.name === "AbortError") return;
+        console.error(err);
+        if (err.fatal) return;
+      }
+      if (controller.signal.aborted) return;
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      delay = Math.min(delay * 2, 30000);
+    }
+  };
+
+  loop();
+  return () => controller.abort();
+};
+
 export const getUserDashboard = () =>
   api.get("/user/dashboard");
 
@@ -85,6 +158,16 @@ export const getMyBooks = () =>
 export const getMyHistory = () =>
   api.get("/issues/my-history");
 
+/* ================= HOLD QUEUE (USER) ================= */
+export const placeHold = (bookId) =>
+  api.post(`/holds/${bookId}`);
+
+export const getMyHolds = () =>
+  api.get("/holds/my-holds");
+
+export const cancelHold = (holdId) =>
+  api.delete(`/holds/${holdId}`);
+
 /* ================= ISSUE / RETURN (ADMIN) ================= */
 export const getPendingIssues = () =>
   api.get("/issues/admin/pending-issues");